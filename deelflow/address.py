@@ -0,0 +1,203 @@
+"""
+Address normalization
+
+One canonical form for street addresses, shared by every model that stores
+one (Property, Lead, DiscoveredLead, PropertyAIAnalysis) and by the combined
+property search. The normalized key is persisted in an indexed ``address_key``
+column, so matching and dedup are equality lookups.
+
+Normalization follows USPS Publication 28 conventions: upper case, no
+punctuation, single spaces, standard street suffix, directional and
+secondary-unit abbreviations, two-letter state codes and 5-digit ZIP codes.
+A single-line address ("1247 Oak Street, Dallas, TX 75201") is split into its
+parts when city/state/zip are not given separately.
+
+Pure Python (no Django imports), so the FastAPI app can use it directly.
+"""
+
+from collections import namedtuple
+import re
+
+ADDRESS_KEY_MAX_LENGTH = 255
+
+NormalizedAddress = namedtuple('NormalizedAddress', ['street', 'unit', 'city', 'state', 'zipcode'])
+
+STREET_SUFFIXES = {
+    'ALLEY': 'ALY', 'ALLY': 'ALY', 'ANNEX': 'ANX', 'ARCADE': 'ARC', 'AVENUE': 'AVE', 'AV': 'AVE', 'AVEN': 'AVE',
+    'AVENU': 'AVE', 'AVN': 'AVE', 'AVNUE': 'AVE', 'BAYOU': 'BYU', 'BEACH': 'BCH', 'BEND': 'BND', 'BLUFF': 'BLF',
+    'BOTTOM': 'BTM', 'BOULEVARD': 'BLVD', 'BOUL': 'BLVD', 'BOULV': 'BLVD', 'BRANCH': 'BR', 'BRIDGE': 'BRG',
+    'BROOK': 'BRK', 'BYPASS': 'BYP', 'CAMP': 'CP', 'CANYON': 'CYN', 'CAPE': 'CPE', 'CAUSEWAY': 'CSWY',
+    'CENTER': 'CTR', 'CENTRE': 'CTR', 'CENTR': 'CTR', 'CIRCLE': 'CIR', 'CIRC': 'CIR', 'CLIFF': 'CLF',
+    'CLUB': 'CLB', 'COMMON': 'CMN', 'CORNER': 'COR', 'COURSE': 'CRSE', 'COURT': 'CT', 'COVE': 'CV',
+    'CREEK': 'CRK', 'CRESCENT': 'CRES', 'CROSSING': 'XING', 'DALE': 'DL', 'DAM': 'DM', 'DIVIDE': 'DV',
+    'DRIVE': 'DR', 'DRIV': 'DR', 'DRV': 'DR', 'ESTATE': 'EST', 'ESTATES': 'ESTS', 'EXPRESSWAY': 'EXPY',
+    'EXTENSION': 'EXT', 'FALLS': 'FLS', 'FERRY': 'FRY', 'FIELD': 'FLD', 'FIELDS': 'FLDS', 'FLAT': 'FLT',
+    'FORD': 'FRD', 'FOREST': 'FRST', 'FORGE': 'FRG', 'FORK': 'FRK', 'FORT': 'FT', 'FREEWAY': 'FWY',
+    'GARDEN': 'GDN', 'GARDENS': 'GDNS', 'GATEWAY': 'GTWY', 'GLEN': 'GLN', 'GREEN': 'GRN', 'GROVE': 'GRV',
+    'HARBOR': 'HBR', 'HAVEN': 'HVN', 'HEIGHTS': 'HTS', 'HIGHWAY': 'HWY', 'HIGHWY': 'HWY', 'HILL': 'HL',
+    'HILLS': 'HLS', 'HOLLOW': 'HOLW', 'ISLAND': 'IS', 'JUNCTION': 'JCT', 'KEY': 'KY', 'KNOLL': 'KNL',
+    'LAKE': 'LK', 'LAKES': 'LKS', 'LANDING': 'LNDG', 'LANE': 'LN', 'LIGHT': 'LGT', 'LOOP': 'LOOP',
+    'MANOR': 'MNR', 'MEADOW': 'MDW', 'MEADOWS': 'MDWS', 'MILL': 'ML', 'MISSION': 'MSN', 'MOTORWAY': 'MTWY',
+    'MOUNT': 'MT', 'MOUNTAIN': 'MTN', 'ORCHARD': 'ORCH', 'PARKWAY': 'PKWY', 'PARKWY': 'PKWY', 'PKY': 'PKWY',
+    'PASSAGE': 'PSGE', 'PIKE': 'PIKE', 'PINE': 'PNE', 'PINES': 'PNES', 'PLACE': 'PL', 'PLAIN': 'PLN',
+    'PLAINS': 'PLNS', 'PLAZA': 'PLZ', 'POINT': 'PT', 'POINTS': 'PTS', 'PORT': 'PRT', 'PRAIRIE': 'PR',
+    'RANCH': 'RNCH', 'RAPIDS': 'RPDS', 'REST': 'RST', 'RIDGE': 'RDG', 'RIVER': 'RIV', 'ROAD': 'RD',
+    'ROUTE': 'RTE', 'SHOAL': 'SHL', 'SHORE': 'SHR', 'SHORES': 'SHRS', 'SKYWAY': 'SKWY', 'SPRING': 'SPG',
+    'SPRINGS': 'SPGS', 'SQUARE': 'SQ', 'STATION': 'STA', 'STREAM': 'STRM', 'STREET': 'ST', 'STR': 'ST',
+    'STRT': 'ST', 'SUMMIT': 'SMT', 'TERRACE': 'TER', 'TRACE': 'TRCE', 'TRAIL': 'TRL', 'TRAILS': 'TRL',
+    'TUNNEL': 'TUNL', 'TURNPIKE': 'TPKE', 'UNION': 'UN', 'VALLEY': 'VLY', 'VIADUCT': 'VIA', 'VIEW': 'VW',
+    'VILLAGE': 'VLG', 'VILLE': 'VL', 'VISTA': 'VIS', 'WALK': 'WALK', 'WAY': 'WAY', 'WELLS': 'WLS',
+}
+
+DIRECTIONALS = {
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+}
+
+UNIT_DESIGNATORS = {
+    'APARTMENT': 'APT', 'APT': 'APT', 'BASEMENT': 'BSMT', 'BSMT': 'BSMT', 'BUILDING': 'BLDG', 'BLDG': 'BLDG',
+    'DEPARTMENT': 'DEPT', 'DEPT': 'DEPT', 'FLOOR': 'FL', 'FL': 'FL', 'FRONT': 'FRNT', 'FRNT': 'FRNT',
+    'HANGAR': 'HNGR', 'LOBBY': 'LBBY', 'LOT': 'LOT', 'LOWER': 'LOWR', 'OFFICE': 'OFC', 'OFC': 'OFC',
+    'PENTHOUSE': 'PH', 'PH': 'PH', 'PIER': 'PIER', 'REAR': 'REAR', 'ROOM': 'RM', 'RM': 'RM', 'SIDE': 'SIDE',
+    'SLIP': 'SLIP', 'SPACE': 'SPC', 'SPC': 'SPC', 'STOP': 'STOP', 'SUITE': 'STE', 'STE': 'STE',
+    'TRAILER': 'TRLR', 'TRLR': 'TRLR', 'UNIT': 'UNIT', 'UPPER': 'UPPR', '#': '#',
+}
+
+# Designators that only say "this is a unit"; dropped from keys
+GENERIC_UNIT_DESIGNATORS = {'APT', 'UNIT', 'STE', '#'}
+
+STATES = {
+    'ALABAMA': 'AL', 'ALASKA': 'AK', 'ARIZONA': 'AZ', 'ARKANSAS': 'AR', 'CALIFORNIA': 'CA', 'COLORADO': 'CO',
+    'CONNECTICUT': 'CT', 'DELAWARE': 'DE', 'DISTRICT OF COLUMBIA': 'DC', 'FLORIDA': 'FL', 'GEORGIA': 'GA',
+    'HAWAII': 'HI', 'IDAHO': 'ID', 'ILLINOIS': 'IL', 'INDIANA': 'IN', 'IOWA': 'IA', 'KANSAS': 'KS',
+    'KENTUCKY': 'KY', 'LOUISIANA': 'LA', 'MAINE': 'ME', 'MARYLAND': 'MD', 'MASSACHUSETTS': 'MA',
+    'MICHIGAN': 'MI', 'MINNESOTA': 'MN', 'MISSISSIPPI': 'MS', 'MISSOURI': 'MO', 'MONTANA': 'MT',
+    'NEBRASKA': 'NE', 'NEVADA': 'NV', 'NEW HAMPSHIRE': 'NH', 'NEW JERSEY': 'NJ', 'NEW MEXICO': 'NM',
+    'NEW YORK': 'NY', 'NORTH CAROLINA': 'NC', 'NORTH DAKOTA': 'ND', 'OHIO': 'OH', 'OKLAHOMA': 'OK',
+    'OREGON': 'OR', 'PENNSYLVANIA': 'PA', 'PUERTO RICO': 'PR', 'RHODE ISLAND': 'RI', 'SOUTH CAROLINA': 'SC',
+    'SOUTH DAKOTA': 'SD', 'TENNESSEE': 'TN', 'TEXAS': 'TX', 'UTAH': 'UT', 'VERMONT': 'VT', 'VIRGINIA': 'VA',
+    'WASHINGTON': 'WA', 'WEST VIRGINIA': 'WV', 'WISCONSIN': 'WI', 'WYOMING': 'WY',
+}
+STATE_CODES = set(STATES.values())
+
+_PUNCTUATION = re.compile(r"[^A-Z0-9# ]+")
+_SPACES = re.compile(r"\s+")
+_STATE_ZIP = re.compile(r"^(?P<state>[A-Z ]+?)\s*(?P<zip>\d{5})?(?:\s*\d{4})?$")
+_ZIP = re.compile(r"(\d{5})")
+
+
+def _clean(value):
+    """Upper case, punctuation to spaces (keeping #), single spaces"""
+    value = (value or '').upper().replace('.', '').replace("'", '')
+    return _SPACES.sub(' ', _PUNCTUATION.sub(' ', value)).strip()
+
+
+def normalize_state(state):
+    state = _clean(state)
+    return STATES.get(state, state)
+
+
+def normalize_zip(zipcode):
+    match = _ZIP.search(zipcode or '')
+    return match.group(1) if match else ''
+
+
+def normalize_unit(unit):
+    """'Apartment 4b' -> 'APT 4B', '#12' -> '# 12', '4B' -> '# 4B'"""
+    tokens = _clean(unit).replace('#', ' # ').split()
+    if not tokens:
+        return ''
+    if tokens[0] in UNIT_DESIGNATORS:
+        return ' '.join([UNIT_DESIGNATORS[tokens[0]]] + tokens[1:])
+    return ' '.join(['#'] + tokens)
+
+
+def _split_unit(tokens):
+    """Split a trailing secondary unit ('APT 4', '# 4', 'STE 200') off street tokens"""
+    for i in range(len(tokens) - 1, 0, -1):
+        if tokens[i] in UNIT_DESIGNATORS:
+            return tokens[:i], ' '.join(tokens[i:])
+    return tokens, ''
+
+
+def normalize_street(street):
+    """Standard street line plus any unit found in it: ('123 N MAIN ST', 'APT 4')"""
+    tokens = _clean(street).replace('#', ' # ').split()
+    tokens, unit = _split_unit(tokens)
+    normalized = []
+    last = len(tokens) - 1
+    for i, token in enumerate(tokens):
+        if token in DIRECTIONALS:
+            # Pre-directional needs a name after it, post-directional a name before
+            # it: "500 West Avenue" keeps WEST as the street name
+            if (i == 1 and last - i >= 2) or (i == last and i >= 3):
+                token = DIRECTIONALS[token]
+        elif token in STREET_SUFFIXES and i > 1 and (i == last or tokens[i + 1] in DIRECTIONALS):
+            token = STREET_SUFFIXES[token]
+        normalized.append(token)
+    return ' '.join(normalized), normalize_unit(unit) if unit else ''
+
+
+def _parse_locality(parts):
+    """City, state and ZIP from the comma-separated tail of a one-line address"""
+    city = state = zipcode = ''
+    if parts:
+        match = _STATE_ZIP.match(_clean(parts[-1]))
+        if match and (normalize_state(match.group('state')) in STATE_CODES or match.group('zip')):
+            state, zipcode = match.group('state'), match.group('zip') or ''
+            parts = parts[:-1]
+        elif _clean(parts[-1]).isdigit():
+            zipcode, parts = parts[-1], parts[:-1]
+    if parts:
+        city = parts[-1]
+    return city, state, zipcode
+
+
+def normalize_address(address, unit=None, city=None, state=None, zipcode=None):
+    """
+    Canonical parts of an address
+
+    ``address`` may be a street line or a full one-line address; parts passed
+    separately win over parts parsed from it.
+    """
+    parts = [part for part in (address or '').split(',') if part.strip()]
+    street_line = parts[0] if parts else ''
+    rest = parts[1:]
+    # "123 Main St, Apt 4, Dallas, TX": a unit in its own segment
+    if rest and (_clean(rest[0]).split() or [''])[0] in UNIT_DESIGNATORS:
+        street_line = f"{street_line} {rest[0]}"
+        rest = rest[1:]
+    parsed_city, parsed_state, parsed_zip = _parse_locality(rest)
+
+    street, parsed_unit = normalize_street(street_line)
+    return NormalizedAddress(
+        street=street,
+        unit=normalize_unit(unit) if unit else parsed_unit,
+        city=_clean(city or parsed_city),
+        state=normalize_state(state or parsed_state),
+        zipcode=normalize_zip(zipcode or parsed_zip),
+    )
+
+
+def unit_identifier(unit):
+    """Unit without a generic designator: 'APT 4B', 'UNIT 4B' and '# 4B' all match as '4B'"""
+    tokens = unit.split()
+    if tokens and tokens[0] in GENERIC_UNIT_DESIGNATORS:
+        tokens = tokens[1:]
+    return ' '.join(tokens)
+
+
+def address_key(address, unit=None, city=None, state=None, zipcode=None):
+    """'STREET|UNIT|CITY|ST|ZIP5', or '' when there is no address at all"""
+    parts = normalize_address(address, unit, city, state, zipcode)
+    if not any(parts):
+        return ''
+    parts = parts._replace(unit=unit_identifier(parts.unit))
+    return '|'.join(parts)[:ADDRESS_KEY_MAX_LENGTH]
+
+
+def one_line_address(address, unit=None, city=None, state=None, zipcode=None):
+    """'123 N MAIN ST, APT 4, DALLAS, TX 75201'; parsing it gives back the same address_key"""
+    parts = normalize_address(address, unit, city, state, zipcode)
+    locality = ' '.join(part for part in (parts.state, parts.zipcode) if part)
+    return ', '.join(part for part in (parts.street, parts.unit, parts.city, locality) if part)
@@ -0,0 +1,162 @@
+"""
+AI result cache
+
+Analyses are keyed by (analysis_type, model_version, sha256 of the input). The
+AIAnalysis table is the persistent store: every analysis saved with a
+content_hash can be reused by any process. A bounded in-memory LRU sits in
+front of it, so repeated uploads of the same listing photos are answered
+without touching the database.
+
+The model version is part of the key, so new results never mix with old
+ones. ``invalidate_ai_cache`` detaches the rows of retired versions (their
+history is kept) and tells every process to drop its in-memory entries.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.forms.models import model_to_dict
+
+from deelflow.models import AIAnalysis
+from deelflow.realtime import on_process_event, publish_event
+
+logger = logging.getLogger(__name__)
+
+TOPIC_AI_CACHE_INVALIDATED = 'ai.cache_invalidated'
+
+
+def model_version(kind):
+    """Current model version for 'vision', 'nlp', 'voice' or 'analysis'"""
+    return settings.AI_MODEL_VERSIONS[kind]
+
+
+def content_hash(content):
+    """sha256 hex digest of bytes, or of a str encoded as UTF-8"""
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.sha256(content).hexdigest()
+
+
+def target_hash(target, exclude=('created_at', 'updated_at')):
+    """Hash of a model instance's label and field values, ignoring timestamps"""
+    values = model_to_dict(target, exclude=list(exclude))
+    return content_hash(target._meta.label + json.dumps(values, sort_keys=True, default=str))
+
+
+class AIResultCache:
+    """In-memory LRU over the AIAnalysis result store"""
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or getattr(settings, 'AI_RESULT_CACHE_SIZE', 1024)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._data[key] = result
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def peek(self, analysis_type, version, digest):
+        """Memory-only lookup; safe to call from the event loop"""
+        key = (analysis_type, version, digest)
+        with self._lock:
+            result = self._data.get(key)
+            if result is not None:
+                self._data.move_to_end(key)
+                self.memory_hits += 1
+            return result
+
+    def get(self, analysis_type, version, digest):
+        """Cached result or None, falling back to the database"""
+        result = self.peek(analysis_type, version, digest)
+        if result is not None:
+            return result
+        result = AIAnalysis.objects.filter(
+            analysis_type=analysis_type, model_version=version, content_hash=digest
+        ).values_list('result', flat=True).first()
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+        self._remember((analysis_type, version, digest), result)
+        return result
+
+    def put(self, analysis_type, version, digest, result, confidence, processing_time, property=None, lead=None):
+        """Save an analysis as an AIAnalysis row and remember it"""
+        analysis = AIAnalysis.objects.create(
+            property=property,
+            lead=lead,
+            analysis_type=analysis_type,
+            model_version=version,
+            content_hash=digest,
+            result=result,
+            confidence_score=confidence,
+            processing_time=processing_time,
+        )
+        self._remember((analysis_type, version, digest), result)
+        return analysis
+
+    def forget(self, versions=None, analysis_type=None, keep=()):
+        """Drop in-memory entries for ``versions`` (default all) except those in ``keep``"""
+        with self._lock:
+            for key in [key for key in self._data
+                        if (versions is None or key[1] in versions) and key[1] not in keep
+                        and (analysis_type is None or key[0] == analysis_type)]:
+                del self._data[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+
+ai_cache = AIResultCache()
+
+
+def invalidate_ai_cache(versions=None, analysis_type=None):
+    """
+    Stop serving cached results for ``versions`` (default: every version that
+    is not current). Rows keep their results but lose their content_hash.
+    Returns the number of rows detached.
+    """
+    rows = AIAnalysis.objects.exclude(content_hash='')
+    if versions:
+        rows = rows.filter(model_version__in=versions)
+    else:
+        rows = rows.exclude(model_version__in=settings.AI_MODEL_VERSIONS.values())
+    if analysis_type:
+        rows = rows.filter(analysis_type=analysis_type)
+    detached = rows.update(content_hash='')
+
+    data = {"versions": list(versions) if versions else None, "analysis_type": analysis_type}
+    _forget(data)
+    publish_event(TOPIC_AI_CACHE_INVALIDATED, data)
+    logger.info(f"AI result cache invalidated ({detached} rows, versions {data['versions'] or 'retired'})")
+    return detached
+
+
+def _forget(data):
+    data = data or {}
+    # Without explicit versions only retired ones go; entries for current versions stay
+    keep = () if data.get("versions") else set(settings.AI_MODEL_VERSIONS.values())
+    ai_cache.forget(data.get("versions"), data.get("analysis_type"), keep=keep)
+
+
+on_process_event(TOPIC_AI_CACHE_INVALIDATED, _forget)
@@ -0,0 +1,121 @@
+"""
+AI usage counters
+
+Each inference records an increment in memory; ``flush`` writes the totals
+into one row per model per minute (``bucket_start``) with F() expressions, so
+concurrent workers add to the same row without a read-modify-write. Totals
+are the sum over rows, and per-minute rates come straight from the buckets.
+
+``record`` only appends to a deque, which is atomic in CPython, so the hot
+path takes no lock. ``flush`` drains the deque from one thread and puts the
+counts back if the write fails.
+"""
+
+from collections import Counter, deque
+from datetime import timedelta
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from deelflow.models import NLPProcessingMetrics, VisionAnalysisMetrics, VoiceAICallMetrics
+
+logger = logging.getLogger(__name__)
+
+# kind -> (model, counter field, rate field, rate for new rows)
+METRIC_MODELS = {
+    'vision': (VisionAnalysisMetrics, 'total_analyses', 'accuracy_rate', 0.85),
+    'nlp': (NLPProcessingMetrics, 'total_processed', 'accuracy_rate', 0.82),
+    'voice': (VoiceAICallMetrics, 'total_calls', 'success_rate', 0.78),
+}
+
+
+def bucket_start(moment=None):
+    """Start of the minute containing ``moment`` (default now)"""
+    return (moment or timezone.now()).replace(second=0, microsecond=0)
+
+
+class UsageCounters:
+    """In-process increments waiting to be written to the metrics tables"""
+
+    def __init__(self):
+        self._pending = deque()
+        self.flushed = 0
+
+    def record(self, kind, count=1):
+        if kind not in METRIC_MODELS:
+            raise ValueError(f"Unknown AI metric kind: {kind}")
+        self._pending.append((kind, bucket_start(), count))
+
+    def pending(self):
+        return len(self._pending)
+
+    def _drain(self):
+        counts = Counter()
+        while True:
+            try:
+                kind, bucket, count = self._pending.popleft()
+            except IndexError:
+                return counts
+            counts[(kind, bucket)] += count
+
+    def flush(self):
+        """Write pending increments; returns the number of bucket rows touched"""
+        counts = self._drain()
+        written = 0
+        try:
+            for (kind, bucket), count in list(counts.items()):
+                add_to_bucket(kind, bucket, count)
+                del counts[(kind, bucket)]
+                written += 1
+        except Exception as e:
+            logger.error(f"Error flushing AI usage counters: {e}")
+            for (kind, bucket), count in counts.items():
+                self._pending.append((kind, bucket, count))
+            raise
+        self.flushed += written
+        return written
+
+
+usage_counters = UsageCounters()
+
+
+def add_to_bucket(kind, bucket, count):
+    """Atomically add ``count`` to one minute's row, creating it if needed"""
+    model, field, rate_field, default_rate = METRIC_MODELS[kind]
+    increment = {field: F(field) + count, 'updated_at': timezone.now()}
+    if model.objects.filter(bucket_start=bucket).update(**increment):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(bucket_start=bucket, **{field: count, rate_field: default_rate})
+    except IntegrityError:
+        # Another worker created the bucket first
+        model.objects.filter(bucket_start=bucket).update(**increment)
+
+
+def usage_totals(kind):
+    """All-time count (legacy running total plus every bucket) and latest rate"""
+    model, field, rate_field, _ = METRIC_MODELS[kind]
+    totals = model.objects.aggregate(total=Sum(field), last_updated=Max('updated_at'))
+    latest = model.objects.order_by('-updated_at').values_list(rate_field, flat=True).first()
+    return {
+        field: totals['total'] or 0,
+        rate_field: latest or 0,
+        "last_updated": totals['last_updated'],
+    }
+
+
+def per_minute(kind, minutes=60):
+    """Counts for each minute in the last ``minutes``, oldest first; empty minutes are 0"""
+    model, field, _, _ = METRIC_MODELS[kind]
+    end = bucket_start()
+    start = end - timedelta(minutes=minutes - 1)
+    counts = dict(
+        model.objects.filter(bucket_start__gte=start, bucket_start__lte=end).values_list('bucket_start', field)
+    )
+    return [
+        {"bucket_start": (start + timedelta(minutes=i)).isoformat(), "count": counts.get(start + timedelta(minutes=i), 0)}
+        for i in range(minutes)
+    ]
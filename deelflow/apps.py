@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DeelflowConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'deelflow'
+
+    def ready(self):
+        from . import db_pool, signals, stripe_catalog  # noqa: F401
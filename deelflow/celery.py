@@ -4,6 +4,7 @@ Celery configuration for DeelFlowAI
 
 import os
 from celery import Celery
+from celery.signals import task_postrun, task_prerun
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'deelflow.settings')
@@ -20,3 +21,16 @@ app.autodiscover_tasks()
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+
+# Persistent DB connections: bracket every task like Django brackets a request
+@task_prerun.connect
+def checkout_db_connection(**kwargs):
+    from deelflow import db_pool
+    db_pool.checkout()
+
+
+@task_postrun.connect
+def release_db_connection(**kwargs):
+    from deelflow import db_pool
+    db_pool.release()
@@ -0,0 +1,192 @@
+"""
+Materialized dashboard aggregates
+
+The dashboard endpoints read a single DashboardRollup row instead of running
+COUNT queries on every request. The row is rebuilt by the
+``refresh_dashboard_rollup`` Celery beat task and nudged between refreshes by
+save/delete signal deltas (see deelflow/signals.py).
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+import logging
+
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from deelflow.models import DashboardRollup, Deal, Lead, Property, User
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_KEY = 'global'
+RECENT_WINDOW = timedelta(days=30)
+
+# Model -> (total column, recent column) maintained by signal deltas
+ROLLUP_COUNTERS = {
+    Property: ('total_properties', 'recent_properties'),
+    Lead: ('total_leads', 'recent_leads'),
+    Deal: ('total_deals', 'recent_deals'),
+    User: ('total_users', None),
+}
+
+
+def compute_dashboard_stats():
+    """Count dashboard totals straight from the source tables"""
+    recent_since = timezone.now() - RECENT_WINDOW
+    return {
+        'total_properties': Property.objects.count(),
+        'total_leads': Lead.objects.count(),
+        'total_deals': Deal.objects.count(),
+        'total_users': User.objects.count(),
+        'recent_properties': Property.objects.filter(created_at__gte=recent_since).count(),
+        'recent_leads': Lead.objects.filter(created_at__gte=recent_since).count(),
+        'recent_deals': Deal.objects.filter(created_at__gte=recent_since).count(),
+    }
+
+
+def deal_status_breakdown():
+    """
+    Deal count and summed prices per status, from one GROUP BY query
+
+    Returns:
+        {status: {"count": int, "offer_total": Decimal, "final_total": Decimal}}
+        with every status in Deal.STATUS_CHOICES present
+    """
+    breakdown = {
+        status: {'count': 0, 'offer_total': Decimal('0'), 'final_total': Decimal('0')}
+        for status, _ in Deal.STATUS_CHOICES
+    }
+    rows = (
+        Deal.objects.order_by()
+        .values('status')
+        .annotate(
+            count=Count('id'),
+            offer_total=Coalesce(Sum('offer_price'), Value(Decimal('0')), output_field=DecimalField()),
+            final_total=Coalesce(Sum('final_price'), Value(Decimal('0')), output_field=DecimalField()),
+        )
+    )
+    for row in rows:
+        breakdown[row['status']] = {
+            'count': row['count'],
+            'offer_total': row['offer_total'],
+            'final_total': row['final_total'],
+        }
+    return breakdown
+
+
+def _month_starts(now, months):
+    """First instant of each of the last ``months`` calendar months, oldest first"""
+    current = timezone.localtime(now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    starts = [current]
+    for _ in range(months - 1):
+        previous = starts[0] - timedelta(days=1)
+        starts.insert(0, previous.replace(day=1))
+    return starts
+
+
+def compute_revenue_growth(months=6):
+    """
+    Monthly closed-deal revenue and cumulative user counts, oldest month first
+
+    Both series are bucketed in the database with TruncMonth, so each is a
+    single query returning at most ``months`` rows. As before, each userData
+    point counts every user who joined from that month up to now; it is the
+    running sum of the monthly signups taken from the newest month back.
+    """
+    starts = _month_starts(timezone.now(), months)
+    since = starts[0]
+
+    revenue_rows = (
+        Deal.objects.filter(status='closed', created_at__gte=since)
+        .annotate(month=TruncMonth('created_at'))
+        .order_by()
+        .values('month')
+        .annotate(revenue=Sum('final_price'))
+    )
+    revenue_by_month = {(row['month'].year, row['month'].month): row['revenue'] or 0 for row in revenue_rows}
+
+    user_rows = (
+        User.objects.filter(created_at__gte=since)
+        .annotate(month=TruncMonth('created_at'))
+        .order_by()
+        .values('month')
+        .annotate(joined=Count('id'))
+    )
+    users_by_month = {(row['month'].year, row['month'].month): row['joined'] for row in user_rows}
+
+    keys = [(start.year, start.month) for start in starts]
+    user_totals = []
+    total = 0
+    for key in reversed(keys):
+        total += users_by_month.get(key, 0)
+        user_totals.insert(0, total)
+    return {
+        "revenueData": [float(revenue_by_month.get(key, 0)) for key in keys],
+        "userData": user_totals,
+        "labels": [start.strftime("%b %Y") for start in starts]
+    }
+
+
+def refresh_dashboard_rollup():
+    """Recompute every aggregate and store it in the rollup row"""
+    values = compute_dashboard_stats()
+    values['revenue_growth'] = compute_revenue_growth()
+    values['refreshed_at'] = timezone.now()
+    rollup, _ = DashboardRollup.objects.update_or_create(key=ROLLUP_KEY, defaults=values)
+    return rollup
+
+
+def get_dashboard_rollup(fresh=False):
+    """
+    Return the rollup row, rebuilding it when asked or when none exists yet
+
+    Args:
+        fresh: Bypass the stored aggregates and recompute from source tables
+    """
+    if not fresh:
+        rollup = DashboardRollup.objects.filter(key=ROLLUP_KEY).first()
+        if rollup is not None:
+            return rollup
+    return refresh_dashboard_rollup()
+
+
+def apply_rollup_delta(model, instance, delta):
+    """
+    Adjust the rollup counters for one inserted (+1) or deleted (-1) row
+
+    Uses a single UPDATE with F() expressions so concurrent writers don't lose
+    increments. Recent-window counters drift as rows age out of the window;
+    the periodic refresh corrects them.
+    """
+    columns = ROLLUP_COUNTERS.get(model)
+    if not columns:
+        return
+    total_column, recent_column = columns
+    updates = {total_column: F(total_column) + delta}
+    created_at = getattr(instance, 'created_at', None)
+    if recent_column and created_at and created_at >= timezone.now() - RECENT_WINDOW:
+        updates[recent_column] = F(recent_column) + delta
+    updates['updated_at'] = timezone.now()
+    DashboardRollup.objects.filter(key=ROLLUP_KEY).update(**updates)
+
+
+def serialize_dashboard_stats(rollup):
+    """Shape the rollup row as the /stats payload"""
+    return {
+        "totalProperties": rollup.total_properties,
+        "totalLeads": rollup.total_leads,
+        "totalDeals": rollup.total_deals,
+        "totalUsers": rollup.total_users,
+        "recentProperties": rollup.recent_properties,
+        "recentLeads": rollup.recent_leads,
+        "recentDeals": rollup.recent_deals,
+        "lastUpdated": rollup.updated_at.isoformat()
+    }
+
+
+def serialize_revenue_growth(rollup):
+    """Shape the rollup row as the revenue/user growth chart payload"""
+    data = dict(rollup.revenue_growth or {})
+    data["lastUpdated"] = (rollup.refreshed_at or rollup.updated_at).isoformat()
+    return data
@@ -0,0 +1,75 @@
+"""
+Persistent database connection accounting
+
+Django keeps one connection per thread. CONN_MAX_AGE makes those connections
+persistent and CONN_HEALTH_CHECKS pings them before reuse. Together they form
+a pool whose size is the number of DB worker threads: the FastAPI DB executor
+threads, or one per Celery worker process.
+
+``checkout``/``release`` bracket each unit of work, the way Django's
+request_started/request_finished do for views. They recycle connections past
+their age or left unusable, and record how often a warm connection was reused
+versus opened from scratch.
+"""
+
+import threading
+import time
+
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.backends.signals import connection_created
+
+_lock = threading.Lock()
+_stats = {
+    'opened': 0,
+    'checkouts': 0,
+    'reused': 0,
+    'in_use': 0,
+    'peak_in_use': 0,
+}
+_started_at = time.time()
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    with _lock:
+        _stats['opened'] += 1
+
+
+connection_created.connect(_on_connection_created, dispatch_uid="db_pool_connection_created")
+
+
+def checkout(alias=DEFAULT_DB_ALIAS):
+    """Prepare this thread's connection for a unit of work"""
+    close_old_connections()
+    reused = connections[alias].connection is not None
+    with _lock:
+        _stats['checkouts'] += 1
+        _stats['reused'] += int(reused)
+        _stats['in_use'] += 1
+        _stats['peak_in_use'] = max(_stats['peak_in_use'], _stats['in_use'])
+
+
+def release():
+    """Finish a unit of work; obsolete or broken connections are closed here"""
+    with _lock:
+        _stats['in_use'] = max(0, _stats['in_use'] - 1)
+    close_old_connections()
+
+
+def pool_metrics(pool_size=None):
+    """Connection reuse and saturation for this process"""
+    settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+    with _lock:
+        stats = dict(_stats)
+    checkouts = stats['checkouts']
+    metrics = {
+        'vendor': connections[DEFAULT_DB_ALIAS].vendor,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+        **stats,
+        'reuse_ratio': round(stats['reused'] / checkouts, 3) if checkouts else 0.0,
+        'uptime_seconds': round(time.time() - _started_at),
+    }
+    if pool_size:
+        metrics['pool_size'] = pool_size
+        metrics['saturation'] = round(stats['in_use'] / pool_size, 3)
+    return metrics
@@ -1,67 +1,278 @@
+"""
+Lead discovery pipeline
+
+Sources are fetched concurrently by a bounded thread pool and parsed
+incrementally with lxml's pull parser, so records are extracted while the page
+is still downloading. Worker threads hand records to the calling thread through
+a bounded queue. The calling thread owns the database connection: it
+deduplicates records by normalized address key and upserts them in batches.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import queue
+import threading
+import time
+
 import requests
-from bs4 import BeautifulSoup
-from django.utils import timezone
+from lxml import etree
+
+from deelflow.address import address_key
 from deelflow.models import DiscoveredLead
 
-# Example: Scrape a mock public records site (replace with real URLs)
-def scrape_public_records():
-    url = 'https://www.mockcountyrecords.com/pre-foreclosures-usa'  # Replace with real public records URL
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    leads = []
-    for record in soup.select('.record-row'):
-        address = record.select_one('.address').text.strip()
-        owner = record.select_one('.owner').text.strip() if record.select_one('.owner') else None
-        city = record.select_one('.city').text.strip() if record.select_one('.city') else None
-        state = record.select_one('.state').text.strip() if record.select_one('.state') else None
-        zipcode = record.select_one('.zipcode').text.strip() if record.select_one('.zipcode') else None
-        details = record.select_one('.details').text.strip() if record.select_one('.details') else None
-        lead = DiscoveredLead(
-            owner_name=owner,
-            address=address,
-            city=city,
-            state=state,
-            zipcode=zipcode,
-            source='public_record',
-            details=details,
-            created_at=timezone.now(),
-            updated_at=timezone.now()
-        )
-        lead.save()
-        leads.append(lead)
-    return leads
-
-# Example: Scrape a mock property listing site (replace with real URLs)
-def scrape_property_sites():
-    url = 'https://www.mockpropertysite.com/distressed-properties-usa'  # Replace with real property site URL
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    leads = []
-    for listing in soup.select('.listing-row'):
-        address = listing.select_one('.address').text.strip()
-        owner = listing.select_one('.owner').text.strip() if listing.select_one('.owner') else None
-        city = listing.select_one('.city').text.strip() if listing.select_one('.city') else None
-        state = listing.select_one('.state').text.strip() if listing.select_one('.state') else None
-        zipcode = listing.select_one('.zipcode').text.strip() if listing.select_one('.zipcode') else None
-        details = listing.select_one('.details').text.strip() if listing.select_one('.details') else None
-        lead = DiscoveredLead(
-            owner_name=owner,
-            address=address,
-            city=city,
-            state=state,
-            zipcode=zipcode,
-            source='property_site',
-            details=details,
-            created_at=timezone.now(),
-            updated_at=timezone.now()
-        )
-        lead.save()
-        leads.append(lead)
-    return leads
-
-# Entry point for lead discovery
-
-def run_lead_discovery():
-    public_leads = scrape_public_records()
-    property_leads = scrape_property_sites()
-    return public_leads + property_leads
+logger = logging.getLogger(__name__)
+
+DISCOVERY_MAX_WORKERS = 4
+DISCOVERY_BATCH_SIZE = 500
+DISCOVERY_TIMEOUT = 20  # seconds per source request
+READ_CHUNK_SIZE = 64 * 1024
+QUEUE_PUT_TIMEOUT = 0.5  # seconds between checks for a stopped consumer
+
+LEAD_FIELDS = ('owner', 'city', 'state', 'zipcode', 'details')
+UPSERT_FIELDS = ['owner_name', 'address', 'city', 'state', 'zipcode', 'source', 'details', 'updated_at']
+
+LeadSource = namedtuple('LeadSource', ['source', 'url', 'row_class'])
+
+# Example sources: mock public records / property listing sites (replace with real URLs)
+DISCOVERY_SOURCES = [
+    LeadSource('public_record', 'https://www.mockcountyrecords.com/pre-foreclosures-usa', 'record-row'),
+    LeadSource('property_site', 'https://www.mockpropertysite.com/distressed-properties-usa', 'listing-row'),
+]
+
+_DONE = object()
+_thread_local = threading.local()
+
+
+def normalize_address_key(address, city=None, state=None, zipcode=None):
+    """Canonical address key (deelflow.address) used to dedupe discovered leads"""
+    return address_key(address, city=city, state=state, zipcode=zipcode) or None
+
+
+class DiscoveryStats:
+    """Thread-safe per-stage counters (fetch, parse, dedupe, write)"""
+
+    STAGES = ('fetch', 'parse', 'dedupe', 'write')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {stage: 0 for stage in self.STAGES}
+        self.seconds = {stage: 0.0 for stage in self.STAGES}
+        self.bytes_fetched = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    def add(self, stage, count=0, seconds=0.0):
+        with self._lock:
+            self.counts[stage] += count
+            self.seconds[stage] += seconds
+
+    def add_bytes(self, size):
+        with self._lock:
+            self.bytes_fetched += size
+
+    def add_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            stages = {
+                stage: {
+                    'count': self.counts[stage],
+                    'seconds': round(self.seconds[stage], 4),
+                    'per_second': round(self.counts[stage] / self.seconds[stage], 1) if self.seconds[stage] else None,
+                }
+                for stage in self.STAGES
+            }
+            return {
+                'stages': stages,
+                'bytes_fetched': self.bytes_fetched,
+                'duplicates': self.duplicates,
+                'errors': self.errors,
+                'elapsed_seconds': round(elapsed, 4),
+                'records_per_second': round(self.counts['write'] / elapsed, 1) if elapsed else None,
+            }
+
+
+def _session():
+    """One requests.Session per worker thread (keep-alive, pooled connections)"""
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
+
+def iter_source_chunks(url):
+    """Yield raw page bytes as they arrive; ``file://`` URLs read local fixtures"""
+    if url.startswith('file://'):
+        with open(url[len('file://'):], 'rb') as fh:
+            while True:
+                chunk = fh.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    with _session().get(url, stream=True, timeout=DISCOVERY_TIMEOUT) as response:
+        response.raise_for_status()
+        yield from response.iter_content(chunk_size=READ_CHUNK_SIZE)
+
+
+def _has_class(element, class_name):
+    return class_name in (element.get('class') or '').split()
+
+
+def _record_from_row(row, source):
+    """Pull the class-tagged fields out of one record row element"""
+    values = {}
+    for child in row.iter():
+        for class_name in (child.get('class') or '').split():
+            if class_name == 'address' or class_name in LEAD_FIELDS:
+                values.setdefault(class_name, ''.join(child.itertext()).strip() or None)
+    if not values.get('address'):
+        return None
+    return {
+        'owner_name': values.get('owner'),
+        'address': values['address'],
+        'city': values.get('city'),
+        'state': values.get('state'),
+        'zipcode': values.get('zipcode'),
+        'details': values.get('details'),
+        'source': source.source,
+    }
+
+
+def parse_source(source, stats):
+    """
+    Fetch and parse one source, yielding lead dicts as rows complete
+
+    Rows are cleared once read so memory stays flat regardless of page size.
+    """
+    parser = etree.HTMLPullParser(events=('end',))
+    fetch_seconds = parse_seconds = 0.0
+    parsed = 0
+    chunks = iter_source_chunks(source.url)
+    while True:
+        started = time.perf_counter()
+        chunk = next(chunks, None)
+        fetch_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        if chunk is None:
+            parser.close()
+        else:
+            stats.add_bytes(len(chunk))
+            parser.feed(chunk)
+        records = []
+        for _, element in parser.read_events():
+            if _has_class(element, source.row_class):
+                record = _record_from_row(element, source)
+                if record:
+                    records.append(record)
+                element.clear()
+        parse_seconds += time.perf_counter() - started
+        parsed += len(records)
+        yield from records
+        if chunk is None:
+            break
+    stats.add('fetch', 1, fetch_seconds)
+    stats.add('parse', parsed, parse_seconds)
+
+
+def _put(records, item, stop):
+    """Queue one item, giving up once the consumer has stopped; returns False if it did"""
+    while not stop.is_set():
+        try:
+            records.put(item, timeout=QUEUE_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _collect_source(source, records, stats, stop):
+    """Worker: stream one source's records into the shared queue"""
+    try:
+        for record in parse_source(source, stats):
+            if not _put(records, record, stop):
+                return
+    except Exception as e:
+        stats.add_error()
+        logger.error(f"Lead discovery failed for {source.url}: {str(e)}")
+    finally:
+        _put(records, _DONE, stop)
+
+
+def _write_batch(batch, stats):
+    """Upsert one batch of deduplicated leads keyed by address_key"""
+    started = time.perf_counter()
+    DiscoveredLead.objects.bulk_create(
+        [DiscoveredLead(**record) for record in batch],
+        update_conflicts=True,
+        unique_fields=['address_key'],
+        update_fields=UPSERT_FIELDS,
+    )
+    stats.add('write', len(batch), time.perf_counter() - started)
+
+
+def run_lead_discovery(sources=None, max_workers=DISCOVERY_MAX_WORKERS, batch_size=DISCOVERY_BATCH_SIZE, stats=None):
+    """
+    Run every discovery source and upsert the results
+
+    Args:
+        sources: LeadSource list (defaults to DISCOVERY_SOURCES)
+        max_workers: Maximum sources fetched at once
+        batch_size: Rows per bulk upsert
+        stats: Optional DiscoveryStats to accumulate into
+
+    Returns:
+        Per-stage counters from DiscoveryStats.summary()
+    """
+    sources = DISCOVERY_SOURCES if sources is None else sources
+    stats = stats or DiscoveryStats()
+    records = queue.Queue(maxsize=batch_size * 4)
+    stop = threading.Event()
+    seen = set()
+    batch = []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lead-discovery') as pool:
+        for source in sources:
+            pool.submit(_collect_source, source, records, stats, stop)
+
+        remaining = len(sources)
+        try:
+            while remaining:
+                record = records.get()
+                if record is _DONE:
+                    remaining -= 1
+                    continue
+                started = time.perf_counter()
+                key = normalize_address_key(record['address'], record['city'], record['state'], record['zipcode'])
+                # No key (nothing normalizable in the address): nothing to dedupe against
+                if key is not None and key in seen:
+                    stats.duplicates += 1
+                    stats.add('dedupe', 0, time.perf_counter() - started)
+                    continue
+                if key is not None:
+                    seen.add(key)
+                record['address_key'] = key
+                batch.append(record)
+                stats.add('dedupe', 1, time.perf_counter() - started)
+                if len(batch) >= batch_size:
+                    _write_batch(batch, stats)
+                    batch = []
+        except BaseException:
+            # Nothing drains the queue any more: release blocked workers so the
+            # pool can shut down and the error reaches the caller
+            stop.set()
+            raise
+
+    if batch:
+        _write_batch(batch, stats)
+
+    summary = stats.summary()
+    logger.info(
+        f"Lead discovery wrote {summary['stages']['write']['count']} leads "
+        f"({summary['duplicates']} duplicates) at {summary['records_per_second']} records/sec"
+    )
+    return summary
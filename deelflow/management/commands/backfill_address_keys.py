@@ -0,0 +1,124 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from deelflow.address import address_key, normalize_address, one_line_address
+from deelflow.models import DiscoveredLead, Lead, Property, PropertyAIAnalysis
+
+PROPERTY_FIELDS = ('address', 'unit_apt', 'city', 'state', 'zipcode')
+LEAD_FIELDS = ('address', 'city', 'state', 'zipcode')
+
+
+def property_keys(rows):
+    return [address_key(row.address, row.unit_apt, row.city, row.state, row.zipcode) for row in rows]
+
+
+def lead_keys(rows):
+    return [address_key(row.address, city=row.city, state=row.state, zipcode=row.zipcode) for row in rows]
+
+
+def ai_analysis_keys(rows):
+    """
+    Key of the one-line address, as written by analyze_property_ai. Older rows
+    hold only the property's street line and were matched to Property on it;
+    they take that property's full address, so they keep matching it. The
+    properties for a whole batch are fetched in one query.
+    """
+    legacy = [row for row in rows if not normalize_address(row.address).city]
+    full_addresses = {}
+    if legacy:
+        # Oldest first, so the most recently updated property wins
+        matches = (
+            Property.objects.filter(address__in={row.address for row in legacy})
+            .only(*PROPERTY_FIELDS).order_by('updated_at', 'id')
+        )
+        for match in matches:
+            full_addresses[match.address] = one_line_address(
+                match.address, match.unit_apt, match.city, match.state, match.zipcode
+            )
+    for row in legacy:
+        row.address = full_addresses.get(row.address, row.address)
+    return [address_key(row.address) for row in rows]
+
+
+def batches(rows, batch_size):
+    """Split a queryset iterator into lists of at most batch_size rows"""
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# name -> (model, fields read, batch key function, fields written, unique key column)
+KEYED_MODELS = {
+    'property': (Property, PROPERTY_FIELDS, property_keys, ['address_key'], False),
+    'lead': (Lead, LEAD_FIELDS, lead_keys, ['address_key'], False),
+    'discoveredlead': (DiscoveredLead, LEAD_FIELDS, lead_keys, ['address_key'], True),
+    'propertyaianalysis': (PropertyAIAnalysis, ('address',), ai_analysis_keys, ['address_key', 'address'], True),
+}
+
+
+class Command(BaseCommand):
+    help = 'Recompute the canonical address_key on property-like models (rows saved before it existed, or after a normalizer change).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models', choices=sorted(KEYED_MODELS),
+                            help='Model to backfill (repeatable); defaults to all')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for name in options['models'] or KEYED_MODELS:
+            model, fields, keys_for, writes, unique = KEYED_MODELS[name]
+            if unique:
+                updated, duplicates = self.backfill_unique(model, fields, keys_for, writes, options['batch_size'])
+                self.stdout.write(self.style.SUCCESS(
+                    f'{model.__name__}: {updated} keyed, {duplicates} older duplicates left without a key'
+                ))
+            else:
+                updated = self.backfill(model, fields, keys_for, writes, options['batch_size'])
+                self.stdout.write(self.style.SUCCESS(f'{model.__name__}: {updated} keys updated'))
+
+    def backfill(self, model, fields, keys_for, writes, batch_size):
+        """Write keys that changed; the column is not unique, so batches are independent"""
+        updated = 0
+        rows = model.objects.only('id', 'address_key', *fields).order_by('id')
+        for batch in batches(rows, batch_size):
+            changed = []
+            for row, key in zip(batch, keys_for(batch)):
+                if key != row.address_key:
+                    row.address_key = key
+                    changed.append(row)
+            if changed:
+                model.objects.bulk_update(changed, writes)
+                updated += len(changed)
+        return updated
+
+    def backfill_unique(self, model, fields, keys_for, writes, batch_size):
+        """
+        Newest row per address keeps the key; older duplicates get NULL (as in
+        migration 0025). Keys are cleared first, inside one transaction, so an
+        old-format key can never collide with a recomputed one mid-run.
+        """
+        updated = duplicates = 0
+        seen = set()
+        with transaction.atomic():
+            model.objects.exclude(address_key=None).update(address_key=None)
+            rows = model.objects.only('id', *fields).order_by('-updated_at', '-id')
+            for batch in batches(rows, batch_size):
+                keyed = []
+                for row, key in zip(batch, keys_for(batch)):
+                    if not key:
+                        continue
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                    row.address_key = key
+                    keyed.append(row)
+                if keyed:
+                    model.objects.bulk_update(keyed, writes)
+                    updated += len(keyed)
+        return updated, duplicates
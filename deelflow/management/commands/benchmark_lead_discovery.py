@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from pathlib import Path
+import json
+import re
+import tempfile
+
+from deelflow.lead_discovery import DiscoveryStats, LeadSource, run_lead_discovery
+
+FIXTURE_DIR = Path(__file__).resolve().parent.parent.parent / 'fixtures' / 'lead_discovery'
+
+# Fixture file -> (DiscoveredLead source, record row class)
+FIXTURE_SOURCES = {
+    'public_records.html': ('public_record', 'record-row'),
+    'property_sites.html': ('property_site', 'listing-row'),
+}
+
+ROW_PATTERN = re.compile(r'<(tr|div) class="(?:record-row|listing-row)">.*?</\1>', re.S)
+HOUSE_NUMBER = re.compile(r'(class="address">)(\d+)')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the lead discovery pipeline against local HTML fixtures and report records/sec.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures', default=str(FIXTURE_DIR), help='Directory holding the fixture pages')
+        parser.add_argument('--repeat', type=int, default=2500, help='Times each fixture row block is repeated per page')
+        parser.add_argument('--copies', type=int, default=2, help='Identical copies of each page (exercises dedupe)')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--keep', action='store_true', help='Commit the upserted leads instead of rolling back')
+
+    def handle(self, *args, **options):
+        fixture_dir = Path(options['fixtures'])
+        with tempfile.TemporaryDirectory(prefix='lead-discovery-bench-') as workdir:
+            sources = []
+            for name, (source, row_class) in FIXTURE_SOURCES.items():
+                page = self.build_page((fixture_dir / name).read_text(), options['repeat'])
+                for copy in range(options['copies']):
+                    path = Path(workdir) / f'{copy}-{name}'
+                    path.write_text(page)
+                    sources.append(LeadSource(source, f'file://{path}', row_class))
+
+            self.stdout.write(f'Running lead discovery over {len(sources)} fixture pages...')
+            stats = DiscoveryStats()
+            with transaction.atomic():
+                summary = run_lead_discovery(
+                    sources=sources,
+                    max_workers=options['workers'],
+                    batch_size=options['batch_size'],
+                    stats=stats,
+                )
+                if not options['keep']:
+                    transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(summary, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['stages']['write']['count']} unique leads, "
+            f"{summary['duplicates']} duplicates, {summary['records_per_second']} records/sec"
+        ))
+
+    def build_page(self, html, repeat):
+        """Repeat the fixture's rows ``repeat`` times, renumbering houses so each block is unique"""
+        rows = [match.group(0) for match in ROW_PATTERN.finditer(html)]
+        if not rows:
+            return html
+        start = html.index(rows[0])
+        end = html.index(rows[-1]) + len(rows[-1])
+        block = html[start:end]
+        body = ''.join(
+            HOUSE_NUMBER.sub(lambda m, n=n: f'{m.group(1)}{m.group(2)}-{n}', block)
+            for n in range(1, repeat + 1)
+        )
+        return html[:start] + body + html[end:]
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from deelflow.ai_cache import invalidate_ai_cache
+
+
+class Command(BaseCommand):
+    help = 'Stop reusing cached AI analyses from retired (or the given) model versions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-version', action='append', dest='versions',
+                            help='Model version to invalidate (repeatable); defaults to every version not in AI_MODEL_VERSIONS')
+        parser.add_argument('--analysis-type', help='Only this analysis type')
+
+    def handle(self, *args, **options):
+        if not options['versions']:
+            current = ', '.join(f'{kind}={version}' for kind, version in settings.AI_MODEL_VERSIONS.items())
+            self.stdout.write(f'Keeping current versions: {current}')
+        detached = invalidate_ai_cache(options['versions'], options['analysis_type'])
+        self.stdout.write(self.style.SUCCESS(f'{detached} cached analyses invalidated'))
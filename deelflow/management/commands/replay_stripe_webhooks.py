@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+
+from deelflow.stripe_webhooks import process_pending, replay
+
+
+def parse_moment(value):
+    """Accept an ISO datetime or a plain date (midnight); naive values use the current timezone"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Invalid date/time: {value}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = 'Reprocess stored Stripe webhook events created in a time range.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', required=True, help='Start of the range (inclusive), e.g. 2025-01-31T12:00')
+        parser.add_argument('--until', help='End of the range (exclusive); defaults to now')
+        parser.add_argument('--type', action='append', dest='event_types', help='Only this event type (repeatable)')
+        parser.add_argument('--queue', action='store_true', help='Hand processing to Celery instead of running it here')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        since = parse_moment(options['since'])
+        until = parse_moment(options['until']) if options['until'] else timezone.now()
+        if since >= until:
+            raise CommandError('--since must be before --until')
+
+        count = replay(since, until, options['event_types'])
+        self.stdout.write(f'{count} events queued for replay ({since.isoformat()} to {until.isoformat()})')
+        if not count:
+            return
+
+        if options['queue']:
+            from deelflow.tasks import process_stripe_webhook_events
+            process_stripe_webhook_events.delay(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS('Processing queued on Celery'))
+            return
+
+        processed, failed = process_pending(batch_size=options['batch_size'])
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f'{processed} events processed, {failed} failed'))
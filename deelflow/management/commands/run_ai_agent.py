@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 import time
 from datetime import datetime
+from deelflow.address import address_key
 from deelflow.models import PropertyAIAnalysis
 
 class Command(BaseCommand):
@@ -34,8 +35,9 @@ class Command(BaseCommand):
     def insert_properties(self, properties):
         for data in properties:
             obj, created = PropertyAIAnalysis.objects.update_or_create(
-                address=data['address'],
+                address_key=address_key(data['address']),
                 defaults={
+                    'address': data['address'],
                     'ai_confidence': data['ai_confidence'],
                     'distress_level': data['distress_level'],
                     'motivation': data['motivation'],
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deelflow', '0022_property_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('total_properties', models.IntegerField(default=0)),
+                ('total_leads', models.IntegerField(default=0)),
+                ('total_deals', models.IntegerField(default=0)),
+                ('total_users', models.IntegerField(default=0)),
+                ('recent_properties', models.IntegerField(default=0)),
+                ('recent_leads', models.IntegerField(default=0)),
+                ('recent_deals', models.IntegerField(default=0)),
+                ('revenue_growth', models.JSONField(blank=True, default=dict)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deelflow', '0023_dashboardrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignSendRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('channels', models.JSONField(blank=True, default=list)),
+                ('last_lead_id', models.BigIntegerField(default=0)),
+                ('waves_completed', models.IntegerField(default=0)),
+                ('sent_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='send_runs', to='deelflow.campaign')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['campaign', 'status'], name='campaign_send_run_status_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='deelflow.lead')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='deelflow.campaignsendrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run', 'status'], name='campaign_delivery_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='campaigndelivery',
+            constraint=models.UniqueConstraint(fields=('run', 'lead', 'channel'), name='campaign_delivery_unique'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+import re
+
+from django.db import migrations, models
+
+
+def _address_key(lead):
+    parts = [lead.address, lead.city, lead.state, (lead.zipcode or '')[:5]]
+    return '|'.join(re.sub(r'[^a-z0-9]+', ' ', (part or '').lower()).strip() for part in parts)
+
+
+def backfill_address_key(apps, schema_editor):
+    """Key existing leads; older duplicates of an address keep a NULL key"""
+    DiscoveredLead = apps.get_model('deelflow', 'DiscoveredLead')
+    seen = set()
+    batch = []
+    for lead in DiscoveredLead.objects.order_by('-updated_at', '-id').iterator(chunk_size=2000):
+        key = _address_key(lead)
+        if key in seen:
+            continue
+        seen.add(key)
+        lead.address_key = key
+        batch.append(lead)
+        if len(batch) >= 2000:
+            DiscoveredLead.objects.bulk_update(batch, ['address_key'])
+            batch = []
+    if batch:
+        DiscoveredLead.objects.bulk_update(batch, ['address_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deelflow', '0024_campaignsendrun_campaigndelivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discoveredlead',
+            name='address_key',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_address_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deelflow', '0025_discoveredlead_address_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('charge', 'Charge'), ('subscription', 'Subscription'), ('customer', 'Customer')], max_length=20)),
+                ('stripe_id', models.CharField(max_length=255)),
+                ('customer_id', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(blank=True, default='', max_length=50)),
+                ('amount_cents', models.BigIntegerField(default=0)),
+                ('amount_refunded_cents', models.BigIntegerField(default=0)),
+                ('mrr_cents', models.BigIntegerField(default=0)),
+                ('currency', models.CharField(default='usd', max_length=3)),
+                ('deleted', models.BooleanField(default=False)),
+                ('stripe_created', models.DateTimeField(blank=True, null=True)),
+                ('source', models.CharField(default='webhook', max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('object_type', 'stripe_id'), name='stripe_ledger_entry_unique')],
+                'indexes': [models.Index(fields=['object_type', 'status'], name='stripe_ledger_type_status_idx'), models.Index(fields=['object_type', 'stripe_created'], name='stripe_ledger_type_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StripeSyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_object_id', models.CharField(blank=True, default='', max_length=255)),
+                ('last_created', models.DateTimeField(blank=True, null=True)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
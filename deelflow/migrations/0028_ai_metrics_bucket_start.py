@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deelflow', '0027_stripewebhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visionanalysismetrics',
+            name='bucket_start',
+            field=models.DateTimeField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='nlpprocessingmetrics',
+            name='bucket_start',
+            field=models.DateTimeField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='voiceaicallmetrics',
+            name='bucket_start',
+            field=models.DateTimeField(blank=True, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deelflow', '0028_ai_metrics_bucket_start'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aianalysis',
+            name='model_version',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='aianalysis',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='aianalysis',
+            index=models.Index(fields=['analysis_type', 'model_version', 'content_hash'], name='ai_analysis_cache_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Existing rows are keyed by ``manage.py backfill_address_keys``"""
+
+    dependencies = [
+        ('deelflow', '0029_aianalysis_result_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='address_key',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='address_key',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        # Analyses are unique by address_key; the address text is display only
+        migrations.AlterField(
+            model_name='propertyaianalysis',
+            name='address',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddField(
+            model_name='propertyaianalysis',
+            name='address_key',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['address_key'], name='property_address_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['address_key'], name='lead_address_key_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def mark_payment_intent_entries(apps, schema_editor):
+    """
+    Charge rows were keyed by PaymentIntent; record it so the first charge-id
+    row for that PaymentIntent replaces them, and restart the charge backfill
+    so every charge gets its own row.
+    """
+    StripeLedgerEntry = apps.get_model('deelflow', 'StripeLedgerEntry')
+    StripeSyncCursor = apps.get_model('deelflow', 'StripeSyncCursor')
+    StripeLedgerEntry.objects.filter(object_type='charge', stripe_id__startswith='pi_').update(
+        payment_intent_id=models.F('stripe_id')
+    )
+    StripeSyncCursor.objects.filter(name='backfill:charge').update(last_object_id='', last_created=None, completed=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deelflow', '0030_address_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stripeledgerentry',
+            name='payment_intent_id',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='stripeledgerentry',
+            name='source_created',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='stripeledgerentry',
+            index=models.Index(fields=['object_type', 'payment_intent_id'], name='stripe_ledger_type_pi_idx'),
+        ),
+        migrations.RunPython(mark_payment_intent_entries, migrations.RunPython.noop),
+    ]
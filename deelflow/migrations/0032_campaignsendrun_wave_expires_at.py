@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deelflow', '0031_stripeledgerentry_charge_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaignsendrun',
+            name='wave_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
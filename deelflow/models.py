@@ -56,6 +56,7 @@ class DiscoveredLead(models.Model):
     financial_situation = models.CharField(max_length=100, blank=True, null=True)
     timeline_urgency = models.CharField(max_length=100, blank=True, null=True)
     negotiation_style = models.CharField(max_length=100, blank=True, null=True)
+    address_key = models.CharField(max_length=255, unique=True, null=True, blank=True)  # deelflow.address.address_key, for dedupe/upsert
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -66,6 +67,8 @@ class DiscoveredLead(models.Model):
 class VoiceAICallMetrics(models.Model):
     total_calls = models.IntegerField(default=0)
     success_rate = models.FloatField(default=0.0)
+    # Start of the minute these counts cover (deelflow.ai_usage); null on legacy running-total rows
+    bucket_start = models.DateTimeField(null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -75,6 +78,7 @@ class VoiceAICallMetrics(models.Model):
 class VisionAnalysisMetrics(models.Model):
     total_analyses = models.IntegerField(default=0)
     accuracy_rate = models.FloatField(default=0.0)
+    bucket_start = models.DateTimeField(null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -190,7 +194,8 @@ class Role(models.Model):
         return self.label
     
 class PropertyAIAnalysis(models.Model):
-    address = models.CharField(max_length=255, unique=True)
+    address = models.CharField(max_length=255)  # one-line address (deelflow.address.one_line_address)
+    address_key = models.CharField(max_length=255, unique=True, null=True, blank=True)  # deelflow.address.address_key of the property
     ai_confidence = models.FloatField()
     distress_level = models.FloatField()
     motivation = models.CharField(max_length=255)
@@ -209,6 +214,7 @@ class PropertyAIAnalysis(models.Model):
 class NLPProcessingMetrics(models.Model):
     total_processed = models.IntegerField(default=0)
     accuracy_rate = models.FloatField(default=0.0)
+    bucket_start = models.DateTimeField(null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -331,16 +337,83 @@ class Lead(models.Model):
     negotiation_style = models.CharField(max_length=100, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
     responded = models.BooleanField(default=False)
+    address_key = models.CharField(max_length=255, blank=True, default='')  # deelflow.address.address_key, set on save
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Not unique: existing duplicate leads share a key and must stay valid
+            models.Index(fields=['address_key'], name='lead_address_key_idx'),
+        ]
 
     def __str__(self):
         return f"Lead {self.id} - {self.name} ({self.status})"
 
 
+# --- Campaign Send Models ---
+class CampaignSendRun(models.Model):
+    """
+    One fan-out of a Campaign to its leads; doubles as the resume checkpoint
+    """
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="send_runs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    channels = models.JSONField(default=list, blank=True)  # e.g. ["email", "sms"]
+    last_lead_id = models.BigIntegerField(default=0)  # every lead id <= this has been processed
+    waves_completed = models.IntegerField(default=0)
+    wave_expires_at = models.DateTimeField(null=True, blank=True)  # set while a wave's chord is in flight
+    sent_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['campaign', 'status'], name='campaign_send_run_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Send run {self.id} - {self.campaign.name} ({self.status})"
+
+
+class CampaignDelivery(models.Model):
+    """Per-lead, per-channel delivery status for a CampaignSendRun"""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),  # claimed by a chunk task
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    run = models.ForeignKey(CampaignSendRun, on_delete=models.CASCADE, related_name="deliveries")
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name="deliveries")
+    channel = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'lead', 'channel'], name='campaign_delivery_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['run', 'status'], name='campaign_delivery_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.lead.name} via {self.channel} ({self.status})"
+
+
 class Channel(models.Model):
     CHANNEL_CHOICES = [
         ("email", "Email"),
@@ -433,11 +506,19 @@ class Property(models.Model):
     assignment_fee = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     seller_notes = models.TextField(blank=True, null=True)
     ai_analysis = models.ForeignKey('PropertyAIAnalysis', on_delete=models.SET_NULL, null=True, blank=True, related_name='property_analyses')
+    address_key = models.CharField(max_length=255, blank=True, default='')  # deelflow.address.address_key, set on save
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination for GET /api/properties/ walks (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='property_created_id_idx'),
+            # Matching against leads, AI analyses and ATTOM results. Not unique:
+            # existing duplicate listings share a key and must stay valid
+            models.Index(fields=['address_key'], name='property_address_key_idx'),
+        ]
     
     def __str__(self):
         return f"{self.address} - ${self.price}"
@@ -500,10 +581,16 @@ class AIAnalysis(models.Model):
     result = models.JSONField()
     confidence_score = models.FloatField()
     processing_time = models.FloatField()
+    # Result cache key (deelflow.ai_cache); an empty hash means "not reusable"
+    model_version = models.CharField(max_length=50, blank=True, default='')
+    content_hash = models.CharField(max_length=64, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['analysis_type', 'model_version', 'content_hash'], name='ai_analysis_cache_idx'),
+        ]
     
     def __str__(self):
         return f"{self.analysis_type} - {self.created_at}"
@@ -636,4 +723,115 @@ class PaymentTransaction(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.user.email} - {self.amount} {self.currency} ({self.status}) via {self.payment_gateway}"
\ No newline at end of file
+        return f"{self.user.email} - {self.amount} {self.currency} ({self.status}) via {self.payment_gateway}"
+
+# --- Stripe Ledger Models ---
+class StripeLedgerEntry(models.Model):
+    """
+    Local copy of the Stripe objects that revenue metrics are computed from,
+    kept current by webhook events, the event sync task and the backfill job
+    """
+    OBJECT_TYPE_CHOICES = [
+        ('charge', 'Charge'),
+        ('subscription', 'Subscription'),
+        ('customer', 'Customer'),
+    ]
+
+    object_type = models.CharField(max_length=20, choices=OBJECT_TYPE_CHOICES)
+    # Charges are keyed by charge id. A local PaymentTransaction is keyed by its
+    # PaymentIntent until a Stripe charge for that PaymentIntent replaces it
+    stripe_id = models.CharField(max_length=255)
+    payment_intent_id = models.CharField(max_length=255, blank=True, default='')  # charges
+    customer_id = models.CharField(max_length=255, blank=True, default='')
+    status = models.CharField(max_length=50, blank=True, default='')  # succeeded, active, canceled, ...
+    amount_cents = models.BigIntegerField(default=0)           # charges: amount captured
+    amount_refunded_cents = models.BigIntegerField(default=0)  # charges: amount refunded
+    mrr_cents = models.BigIntegerField(default=0)              # subscriptions: normalized monthly amount
+    currency = models.CharField(max_length=3, default='usd')
+    deleted = models.BooleanField(default=False)               # customers removed in Stripe
+    stripe_created = models.DateTimeField(null=True, blank=True)
+    # When Stripe produced this data (event created, or backfill fetch time); older data never overwrites newer
+    source_created = models.DateTimeField(null=True, blank=True)
+    source = models.CharField(max_length=20, default='webhook')  # webhook, sync, backfill, transaction
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['object_type', 'stripe_id'], name='stripe_ledger_entry_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['object_type', 'status'], name='stripe_ledger_type_status_idx'),
+            models.Index(fields=['object_type', 'stripe_created'], name='stripe_ledger_type_created_idx'),
+            models.Index(fields=['object_type', 'payment_intent_id'], name='stripe_ledger_type_pi_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type} {self.stripe_id} ({self.status})"
+
+
+class StripeSyncCursor(models.Model):
+    """Resume point for a Stripe sync: the fully synced event time or the last backfilled object"""
+    name = models.CharField(max_length=50, unique=True)  # "events", "backfill:charge", ...
+    last_object_id = models.CharField(max_length=255, blank=True, default='')
+    last_created = models.DateTimeField(null=True, blank=True)
+    completed = models.BooleanField(default=False)  # backfill cursors: reached the oldest object
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_object_id or '-'}"
+
+
+class StripeWebhookEvent(models.Model):
+    """
+    Raw Stripe webhook event, stored before it is acknowledged and processed
+    later by a Celery task; the unique event_id absorbs redeliveries
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    stripe_created = models.DateTimeField()  # processing order
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    deliveries = models.IntegerField(default=1)  # times Stripe sent this event
+    received_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'stripe_created'], name='stripe_webhook_queue_idx'),
+            models.Index(fields=['stripe_created'], name='stripe_webhook_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
+
+
+# --- Dashboard Rollup Model ---
+class DashboardRollup(models.Model):
+    """
+    Pre-aggregated dashboard counters, refreshed by a Celery beat task
+    and adjusted incrementally by model save/delete signals
+    """
+    key = models.CharField(max_length=50, unique=True)  # e.g. "global"
+    total_properties = models.IntegerField(default=0)
+    total_leads = models.IntegerField(default=0)
+    total_deals = models.IntegerField(default=0)
+    total_users = models.IntegerField(default=0)
+    recent_properties = models.IntegerField(default=0)
+    recent_leads = models.IntegerField(default=0)
+    recent_deals = models.IntegerField(default=0)
+    revenue_growth = models.JSONField(default=dict, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)  # last full recompute
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard rollup {self.key} ({self.updated_at})"
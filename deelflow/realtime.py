@@ -0,0 +1,99 @@
+"""
+Real-time event publishing
+
+Model-change events are published after the surrounding transaction commits.
+With REALTIME_BACKPLANE = 'redis' they go to Redis pub/sub, so every FastAPI
+worker receives them. This works from Django, FastAPI threads and Celery alike.
+With the in-memory backplane they go to in-process listeners registered by the
+FastAPI app.
+"""
+
+from datetime import datetime
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'deelflow:realtime:'  # must match fastapi_app/app/core/pubsub.py
+
+TOPIC_PROPERTY_CREATED = 'property.created'
+TOPIC_DEAL_STATUS_CHANGED = 'deal.status_changed'
+TOPIC_ACTIVITY_CREATED = 'activity.created'
+
+# Model events browsers may receive. Anything else on the backplane (cache
+# invalidation and similar) is process-internal and never sent to a socket.
+CLIENT_TOPICS = {TOPIC_PROPERTY_CREATED, TOPIC_DEAL_STATUS_CHANGED, TOPIC_ACTIVITY_CREATED}
+
+_local_listeners = []
+_process_handlers = {}
+_redis_client = None
+
+
+def add_local_listener(callback):
+    """Register ``callback(envelope)`` for the in-memory backplane"""
+    if callback not in _local_listeners:
+        _local_listeners.append(callback)
+
+
+def remove_local_listener(callback):
+    if callback in _local_listeners:
+        _local_listeners.remove(callback)
+
+
+def on_process_event(topic, callback):
+    """
+    Handle ``topic`` inside each receiving process instead of forwarding it to
+    sockets (cache invalidation and similar); ``callback(data)``
+    """
+    _process_handlers[topic] = callback
+
+
+def handle_process_event(topic, message):
+    """Run the process-level handler for a received event; False if there is none"""
+    callback = _process_handlers.get(topic)
+    if callback is None:
+        return False
+    try:
+        callback(json.loads(message).get("data"))
+    except Exception as e:
+        logger.error(f"Error handling realtime event {topic}: {str(e)}")
+    return True
+
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+def build_message(topic, data):
+    """Client-facing payload, serialized once here and forwarded verbatim to sockets"""
+    return json.dumps({
+        "type": topic,
+        "data": data,
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }, default=str)
+
+
+def publish_event(topic, data, user_id=None):
+    """Publish one event now; failures are logged, never raised into the caller"""
+    message = build_message(topic, data)
+    envelope = json.dumps({"topic": topic, "user_id": user_id, "message": message})
+    try:
+        if settings.REALTIME_BACKPLANE == 'redis':
+            _redis().publish(CHANNEL_PREFIX + topic, envelope)
+        else:
+            for callback in list(_local_listeners):
+                callback(envelope)
+    except Exception as e:
+        logger.error(f"Error publishing realtime event {topic}: {str(e)}")
+
+
+def publish_on_commit(topic, data, user_id=None):
+    """Publish once the current transaction commits (immediately in autocommit)"""
+    transaction.on_commit(lambda: publish_event(topic, data, user_id))
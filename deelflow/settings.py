@@ -99,16 +99,43 @@ WSGI_APPLICATION = 'deelflow.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'deelflowai',
-        'USER': 'postgres',
-        'PASSWORD': 'Awhpr148',
-        'HOST': '44.203.111.241',
-        'PORT': '5432',
+# Connections are persistent: each worker thread (FastAPI DB executor, Celery
+# worker) keeps its connection for DB_CONN_MAX_AGE seconds and pings it before
+# reuse. DB_ENGINE=sqlite switches to a local file for benchmarks.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'postgresql')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '600'))  # seconds; 0 = close after every request/job
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', 'true').lower() == 'true'
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'deelflowai'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', 'Awhpr148'),
+            'HOST': os.environ.get('DB_HOST', '44.203.111.241'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '10')),
+                # TCP keepalives stop idle pooled connections being silently dropped by NAT/firewalls
+                'keepalives': 1,
+                'keepalives_idle': 60,
+                'keepalives_interval': 10,
+                'keepalives_count': 5,
+            },
+        }
     }
-}
 
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [
@@ -169,6 +196,51 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', 'pk_test_your_key_here')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', 'sk_test_your_key_here')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', 'whsec_your_webhook_secret_here')
+STRIPE_CATALOG_TTL = int(os.environ.get('STRIPE_CATALOG_TTL', '300'))  # seconds; webhooks invalidate sooner only with REALTIME_BACKPLANE=redis
+
+# AI result cache: analyses are reused for identical content until the model version changes
+AI_MODEL_VERSIONS = {
+    'vision': os.environ.get('AI_VISION_MODEL_VERSION', 'vision-stub-1'),
+    'nlp': os.environ.get('AI_NLP_MODEL_VERSION', 'nlp-stub-1'),
+    'voice': os.environ.get('AI_VOICE_MODEL_VERSION', 'voice-stub-1'),
+    'analysis': os.environ.get('AI_ANALYSIS_MODEL_VERSION', 'analysis-stub-1'),
+}
+AI_RESULT_CACHE_SIZE = int(os.environ.get('AI_RESULT_CACHE_SIZE', '1024'))  # in-memory LRU entries per process
+
+# Celery Broker / Result Backend (chords need a result backend)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/1')
+
+# Realtime WebSocket backplane ('redis' to fan events out across workers, 'memory' for one process)
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
+REALTIME_BACKPLANE = os.environ.get('REALTIME_BACKPLANE', 'memory')
+
+# Campaign Send Fan-out
+CAMPAIGN_SEND_CHUNK_SIZE = int(os.environ.get('CAMPAIGN_SEND_CHUNK_SIZE', '500'))  # leads per subtask
+CAMPAIGN_SEND_WAVE_CHUNKS = int(os.environ.get('CAMPAIGN_SEND_WAVE_CHUNKS', '20'))  # subtasks per chord
+# Seconds past a wave's last scheduled chunk before its chord is presumed lost and the run may be resumed
+CAMPAIGN_WAVE_GRACE = int(os.environ.get('CAMPAIGN_WAVE_GRACE', '1800'))
+CAMPAIGN_CHANNEL_RATE_LIMITS = {  # messages per second, per channel
+    'email': 50,
+    'sms': 10,
+    'call': 1,
+}
+
+# Celery Beat Schedule
+CELERY_BEAT_SCHEDULE = {
+    'refresh-dashboard-rollup': {
+        'task': 'deelflow.tasks.refresh_dashboard_rollup',
+        'schedule': 300.0,  # every 5 minutes
+    },
+    'process-stripe-webhooks': {
+        'task': 'deelflow.tasks.process_stripe_webhook_events',
+        'schedule': 60.0,  # retries failed events and picks up any missed trigger
+    },
+    'sync-stripe-ledger': {
+        'task': 'deelflow.tasks.sync_stripe_ledger',
+        'schedule': 900.0,  # every 15 minutes; webhooks keep it current in between
+    },
+}
 
 # Frontend and API URL Configuration
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
@@ -0,0 +1,118 @@
+"""
+Model signal handlers for DeelFlowAI
+"""
+
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from deelflow.address import address_key
+from deelflow.dashboard import ROLLUP_COUNTERS, apply_rollup_delta
+from deelflow.models import ActivityFeed, Deal, DiscoveredLead, Lead, PaymentTransaction, Property, PropertyAIAnalysis
+from deelflow.stripe_ledger import record_transaction
+from deelflow.realtime import (
+    TOPIC_ACTIVITY_CREATED, TOPIC_DEAL_STATUS_CHANGED, TOPIC_PROPERTY_CREATED,
+    publish_on_commit
+)
+
+
+def _rollup_on_save(sender, instance, created, **kwargs):
+    if created:
+        apply_rollup_delta(sender, instance, 1)
+
+
+def _rollup_on_delete(sender, instance, **kwargs):
+    apply_rollup_delta(sender, instance, -1)
+
+
+for _model in ROLLUP_COUNTERS:
+    post_save.connect(_rollup_on_save, sender=_model, dispatch_uid=f"rollup_save_{_model.__name__}")
+    post_delete.connect(_rollup_on_delete, sender=_model, dispatch_uid=f"rollup_delete_{_model.__name__}")
+
+
+# --- Realtime model-change events ---
+
+def _remember_deal_status(sender, instance, **kwargs):
+    # __dict__, not the attribute: a deferred status (.only()/.defer()) would cost a query per row
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+def _publish_property_created(sender, instance, created, **kwargs):
+    if created:
+        publish_on_commit(TOPIC_PROPERTY_CREATED, {
+            "id": instance.id,
+            "address": instance.address,
+            "city": instance.city,
+            "state": instance.state,
+            "price": instance.price,
+            "status": instance.status,
+        })
+
+
+def _publish_deal_status(sender, instance, created, **kwargs):
+    # None on either side: status was deferred when loaded, so there is no known change
+    previous = getattr(instance, '_loaded_status', None)
+    status = instance.__dict__.get('status')
+    if not created and previous is not None and status is not None and previous != status:
+        publish_on_commit(TOPIC_DEAL_STATUS_CHANGED, {
+            "id": instance.id,
+            "property_id": instance.property_id,
+            "previous_status": previous,
+            "status": status,
+        })
+    instance._loaded_status = status
+
+
+def _publish_activity(sender, instance, created, **kwargs):
+    if created:
+        publish_on_commit(TOPIC_ACTIVITY_CREATED, {
+            "id": instance.id,
+            "user_id": instance.user_id,
+            "action_type": instance.action_type,
+            "description": instance.description,
+            "timestamp": instance.timestamp,
+        })
+
+
+post_init.connect(_remember_deal_status, sender=Deal, dispatch_uid="realtime_deal_init")
+post_save.connect(_publish_property_created, sender=Property, dispatch_uid="realtime_property_created")
+post_save.connect(_publish_deal_status, sender=Deal, dispatch_uid="realtime_deal_status")
+post_save.connect(_publish_activity, sender=ActivityFeed, dispatch_uid="realtime_activity_created")
+
+
+# --- Stripe ledger ---
+
+def _ledger_on_transaction(sender, instance, **kwargs):
+    record_transaction(instance)
+
+
+post_save.connect(_ledger_on_transaction, sender=PaymentTransaction, dispatch_uid="stripe_ledger_transaction")
+
+
+# --- Address keys ---
+# Bulk writes (bulk_create/bulk_update/update) skip these; they set address_key themselves
+
+def _key_property(sender, instance, **kwargs):
+    instance.address_key = address_key(
+        instance.address, instance.unit_apt, instance.city, instance.state, instance.zipcode
+    )
+
+
+def _key_lead(sender, instance, **kwargs):
+    instance.address_key = address_key(instance.address, city=instance.city, state=instance.state, zipcode=instance.zipcode)
+
+
+def _key_discovered_lead(sender, instance, **kwargs):
+    # Unique column: rows without an address stay NULL instead of colliding on ''
+    instance.address_key = address_key(
+        instance.address, city=instance.city, state=instance.state, zipcode=instance.zipcode
+    ) or None
+
+
+def _key_ai_analysis(sender, instance, **kwargs):
+    # address is the property's one-line address, which parses to the property's key
+    instance.address_key = address_key(instance.address) or None
+
+
+pre_save.connect(_key_property, sender=Property, dispatch_uid="address_key_property")
+pre_save.connect(_key_lead, sender=Lead, dispatch_uid="address_key_lead")
+pre_save.connect(_key_discovered_lead, sender=DiscoveredLead, dispatch_uid="address_key_discovered_lead")
+pre_save.connect(_key_ai_analysis, sender=PropertyAIAnalysis, dispatch_uid="address_key_ai_analysis")
@@ -0,0 +1,152 @@
+"""
+Stripe subscription catalog
+
+Active products and prices are fetched once, indexed by product id and turned
+into the pricing-page payload. The result is kept in memory until
+STRIPE_CATALOG_TTL expires, or until a product.* / price.* webhook
+invalidates it.
+
+Webhooks are applied by Celery, so the invalidation has to be published on the
+realtime backplane to reach the FastAPI workers that serve the catalog. That
+only works with REALTIME_BACKPLANE = 'redis'. The default 'memory' backplane
+stays inside one process, so a webhook only clears the Celery worker's own
+copy and the other processes keep serving theirs for up to STRIPE_CATALOG_TTL.
+"""
+
+import logging
+import threading
+import time
+
+import stripe
+from django.conf import settings
+
+from deelflow.realtime import on_process_event, publish_event
+
+logger = logging.getLogger(__name__)
+
+TOPIC_CATALOG_CHANGED = 'stripe.catalog_changed'
+CATALOG_EVENT_PREFIXES = ('product.', 'price.')
+
+
+class StripeCatalog:
+    """
+    In-memory snapshot of the Stripe catalog
+
+    An expired snapshot is still served while a single caller rebuilds it, so a
+    TTL refresh never makes concurrent page loads wait on Stripe. A snapshot is
+    only built inline on first use and after an explicit invalidation.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _ttl(self):
+        return self.ttl if self.ttl is not None else getattr(settings, 'STRIPE_CATALOG_TTL', 300)
+
+    @staticmethod
+    def build():
+        """Fetch active products and prices and index prices by product id"""
+        prices_by_product = {}
+        for price in stripe.Price.list(active=True, limit=100).auto_paging_iter():
+            prices_by_product.setdefault(price.product, []).append(price)
+
+        packages = []
+        for product in stripe.Product.list(active=True, limit=100).auto_paging_iter():
+            product_prices = prices_by_product.get(product.id)
+            if not product_prices:
+                continue
+            # The first listed price is the one shown on the pricing page
+            price = product_prices[0]
+            features = product.metadata.get('features')
+            packages.append({
+                "id": product.id,
+                "name": product.name,
+                "description": product.description,
+                "price_id": price.id,
+                "amount": price.unit_amount / 100,  # Convert from cents
+                "currency": price.currency,
+                "interval": price.recurring.interval if price.recurring else None,
+                "features": features.split(',') if features else []
+            })
+
+        return {
+            "packages": packages,
+            "total": len(packages),
+            "prices_by_product": {
+                product_id: [price.id for price in prices]
+                for product_id, prices in prices_by_product.items()
+            },
+        }
+
+    def peek(self):
+        """Return the snapshot if it is fresh, without ever calling Stripe"""
+        snapshot, loaded_at = self._snapshot, self._loaded_at
+        if snapshot is not None and time.monotonic() - loaded_at < self._ttl():
+            return snapshot
+        return None
+
+    def get(self):
+        """Return the catalog snapshot, building or refreshing it when needed"""
+        fresh = self.peek()
+        if fresh is not None:
+            return fresh
+        snapshot = self._snapshot
+        if snapshot is not None and not self._refresh_lock.acquire(blocking=False):
+            return snapshot  # another caller is already refreshing
+        if snapshot is None:
+            self._refresh_lock.acquire()
+        try:
+            current = self.peek()
+            if current is not None:
+                return current  # refreshed while we waited for the lock
+            with self._lock:
+                generation = self._generation
+            fresh = self.build()
+            with self._lock:
+                # Don't overwrite an invalidation that arrived mid-build with older data
+                if generation == self._generation:
+                    self._snapshot, self._loaded_at = fresh, time.monotonic()
+            return fresh
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self):
+        """Drop this process's snapshot"""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+            self._loaded_at = 0.0
+
+    def stats(self):
+        return {
+            "loaded": self._snapshot is not None,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._snapshot is not None else None,
+            "ttl_seconds": self._ttl(),
+        }
+
+
+catalog = StripeCatalog()
+
+
+def is_catalog_event(event_type):
+    return event_type.startswith(CATALOG_EVENT_PREFIXES)
+
+
+def invalidate_catalog(event_type=None):
+    """
+    Invalidate here and tell every other process to do the same
+
+    Other processes only hear about it with the redis backplane; with the
+    memory backplane their copies expire with the TTL instead.
+    """
+    catalog.invalidate()
+    publish_event(TOPIC_CATALOG_CHANGED, {"event_type": event_type})
+    logger.info(f"Stripe catalog invalidated ({event_type or 'manual'})")
+
+
+on_process_event(TOPIC_CATALOG_CHANGED, lambda data: catalog.invalidate())
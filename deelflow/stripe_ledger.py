@@ -0,0 +1,330 @@
+"""
+Local Stripe ledger
+
+Revenue metrics are computed from StripeLedgerEntry rows instead of live
+Charge/Subscription/Customer list calls. The ledger is fed from four places:
+
+- webhook events, applied as they arrive
+- ``sync_events``: a periodic catch-up over the Event API, starting from the
+  "events" cursor, for anything a webhook missed. Only the sync moves that
+  cursor, so a later webhook never hides an earlier missed one
+- ``backfill``: a resumable, paginated walk over the full history of each object type
+- completed stripe PaymentTransaction rows recorded by the app itself
+
+Every write is an upsert on (object_type, stripe_id) that only replaces a row
+with data at least as recent (``source_created``: the event's time, or when a
+backfill page was fetched). Replayed, retried or out-of-order events therefore
+never roll a row back, and replaying any source is safe.
+
+Charges are keyed by charge id, so each attempt on a PaymentIntent is its own
+row. A PaymentTransaction recorded by the app is keyed by its PaymentIntent
+until Stripe data for one of its charges arrives and replaces it.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+import logging
+
+import stripe
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from deelflow.models import PaymentTransaction, StripeLedgerEntry, StripeSyncCursor
+
+logger = logging.getLogger(__name__)
+
+LEDGER_EVENT_TYPES = [
+    'charge.succeeded',
+    'charge.failed',
+    'charge.refunded',
+    'charge.updated',
+    'customer.created',
+    'customer.updated',
+    'customer.deleted',
+    'customer.subscription.created',
+    'customer.subscription.updated',
+    'customer.subscription.deleted',
+]
+MRR_STATUSES = ('active', 'trialing', 'past_due')
+PAGE_SIZE = 100
+EVENT_RETENTION_DAYS = 30  # Stripe only lists events from the last 30 days
+# Events can show up in the list API a little after they are created, so each
+# sync only counts as complete up to this long before it started
+EVENT_SYNC_LAG = timedelta(minutes=5)
+
+EVENTS_CURSOR = 'events'
+UPDATE_FIELDS = [
+    'customer_id', 'payment_intent_id', 'status', 'amount_cents', 'amount_refunded_cents', 'mrr_cents',
+    'currency', 'deleted', 'stripe_created', 'source_created', 'source',
+]
+# Monthly multiplier for each recurring interval
+INTERVAL_MONTHS = {'day': 365 / 12, 'week': 52 / 12, 'month': 1, 'year': 1 / 12}
+
+
+def _datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc) if timestamp else None
+
+
+def _customer(obj):
+    customer = obj.get('customer') or ''
+    return customer if isinstance(customer, str) else customer.get('id', '')
+
+
+def monthly_amount_cents(subscription):
+    """Normalize every subscription item to a monthly amount"""
+    total = 0.0
+    for item in (subscription.get('items') or {}).get('data', []):
+        price = item.get('price') or {}
+        recurring = price.get('recurring') or {}
+        per_month = INTERVAL_MONTHS.get(recurring.get('interval'), 1) / (recurring.get('interval_count') or 1)
+        total += (price.get('unit_amount') or 0) * (item.get('quantity') or 1) * per_month
+    return round(total)
+
+
+def _payment_intent(charge):
+    payment_intent = charge.get('payment_intent') or ''
+    return payment_intent if isinstance(payment_intent, str) else payment_intent.get('id', '')
+
+
+def charge_entry(charge, source, as_of=None):
+    return StripeLedgerEntry(
+        object_type='charge',
+        stripe_id=charge['id'],
+        payment_intent_id=_payment_intent(charge),
+        customer_id=_customer(charge),
+        status=charge.get('status') or '',
+        amount_cents=charge.get('amount') or 0,
+        amount_refunded_cents=charge.get('amount_refunded') or 0,
+        currency=charge.get('currency') or 'usd',
+        stripe_created=_datetime(charge.get('created')),
+        source_created=as_of,
+        source=source,
+    )
+
+
+def subscription_entry(subscription, source, as_of=None):
+    return StripeLedgerEntry(
+        object_type='subscription',
+        stripe_id=subscription['id'],
+        customer_id=_customer(subscription),
+        status=subscription.get('status') or '',
+        mrr_cents=monthly_amount_cents(subscription),
+        currency=subscription.get('currency') or 'usd',
+        stripe_created=_datetime(subscription.get('created')),
+        source_created=as_of,
+        source=source,
+    )
+
+
+def customer_entry(customer, source, as_of=None):
+    return StripeLedgerEntry(
+        object_type='customer',
+        stripe_id=customer['id'],
+        customer_id=customer['id'],
+        status='deleted' if customer.get('deleted') else 'active',
+        currency=customer.get('currency') or 'usd',
+        deleted=bool(customer.get('deleted')),
+        stripe_created=_datetime(customer.get('created')),
+        source_created=as_of,
+        source=source,
+    )
+
+
+ENTRY_BUILDERS = {
+    'charge': charge_entry,
+    'subscription': subscription_entry,
+    'customer': customer_entry,
+}
+
+
+def _update_if_newer(entry, strictly=False):
+    """Overwrite the stored row unless it holds newer data; returns rows updated"""
+    rows = StripeLedgerEntry.objects.filter(object_type=entry.object_type, stripe_id=entry.stripe_id)
+    if entry.source_created is not None:
+        lookup = 'source_created__lt' if strictly else 'source_created__lte'
+        rows = rows.filter(Q(source_created__isnull=True) | Q(**{lookup: entry.source_created}))
+    values = {field: getattr(entry, field) for field in UPDATE_FIELDS}
+    return rows.update(updated_at=timezone.now(), **values)
+
+
+def upsert_entries(entries):
+    """
+    Insert or refresh ledger rows. Existing rows are updated with a conditional
+    UPDATE (one per entry); the rest are inserted in one statement.
+    """
+    if not entries:
+        return 0
+    # Not updated: either new, or the stored row is newer (then the insert is a no-op)
+    missing = [entry for entry in entries if not _update_if_newer(entry)]
+    if missing:
+        StripeLedgerEntry.objects.bulk_create(missing, ignore_conflicts=True)
+        # A row another writer inserted in the meantime still gets newer data
+        for entry in missing:
+            _update_if_newer(entry, strictly=True)
+    _replace_transaction_entries(entries)
+    return len(entries)
+
+
+def _replace_transaction_entries(entries):
+    """Drop PaymentIntent-keyed placeholders once a real charge for them is stored"""
+    payment_intents = {
+        entry.payment_intent_id for entry in entries
+        if entry.object_type == 'charge' and entry.payment_intent_id and entry.stripe_id != entry.payment_intent_id
+    }
+    if payment_intents:
+        StripeLedgerEntry.objects.filter(object_type='charge', stripe_id__in=payment_intents).delete()
+
+
+def advance_cursor(name, object_id, created):
+    """Move a cursor forward; never back (events can arrive out of order)"""
+    cursor, _ = StripeSyncCursor.objects.get_or_create(name=name)
+    if cursor.last_created is None or created >= cursor.last_created:
+        cursor.last_object_id = object_id
+        cursor.last_created = created
+        cursor.save(update_fields=['last_object_id', 'last_created', 'updated_at'])
+
+
+def is_ledger_event(event_type):
+    return event_type in LEDGER_EVENT_TYPES
+
+
+def apply_event(event, source='webhook'):
+    """Apply one Stripe event to the ledger; returns False for unrelated events"""
+    if not is_ledger_event(event['type']):
+        return False
+    obj = event['data']['object']
+    if event['type'] == 'customer.deleted':
+        obj = dict(obj, deleted=True)
+    upsert_entries([ENTRY_BUILDERS[obj['object']](obj, source, _datetime(event['created']))])
+    return True
+
+
+def sync_events():
+    """
+    Catch up on ledger events since the events cursor; returns how many were
+    applied. The cursor then moves to the point everything before is known to
+    be applied (the sync start less EVENT_SYNC_LAG), whatever webhooks did.
+    """
+    started = timezone.now()
+    cursor, _ = StripeSyncCursor.objects.get_or_create(name=EVENTS_CURSOR)
+    since = cursor.last_created or started - timedelta(days=EVENT_RETENTION_DAYS)
+    events = stripe.Event.list(
+        types=LEDGER_EVENT_TYPES,
+        created={'gte': int(since.timestamp())},
+        limit=PAGE_SIZE,
+    ).auto_paging_iter()
+    # The API lists newest first; apply oldest first so later states win
+    applied = 0
+    last_event_id = ''
+    for event in sorted(events, key=lambda event: (event['created'], event['id'])):
+        apply_event(event, source='sync')
+        applied += 1
+        last_event_id = event['id']
+    advance_cursor(EVENTS_CURSOR, last_event_id or cursor.last_object_id, started - EVENT_SYNC_LAG)
+    return applied
+
+
+BACKFILL_RESOURCES = {
+    'charge': (lambda: stripe.Charge, {}),
+    'subscription': (lambda: stripe.Subscription, {'status': 'all'}),
+    'customer': (lambda: stripe.Customer, {}),
+}
+
+
+def backfill(object_type, max_pages=None):
+    """
+    Page through every Stripe object of one type, newest first, upserting each
+    page. The cursor records the last object seen, so an interrupted backfill
+    resumes where it stopped. Returns the number of objects written.
+    """
+    resource, params = BACKFILL_RESOURCES[object_type]
+    builder = ENTRY_BUILDERS[object_type]
+    cursor, _ = StripeSyncCursor.objects.get_or_create(name=f'backfill:{object_type}')
+    written = pages = 0
+    while not cursor.completed and (max_pages is None or pages < max_pages):
+        page_params = dict(params, limit=PAGE_SIZE)
+        if cursor.last_object_id:
+            page_params['starting_after'] = cursor.last_object_id
+        fetched_at = timezone.now()
+        page = resource().list(**page_params)
+        written += upsert_entries([builder(obj, 'backfill', fetched_at) for obj in page.data])
+        pages += 1
+        if page.data:
+            cursor.last_object_id = page.data[-1]['id']
+            cursor.last_created = _datetime(page.data[-1].get('created'))
+        cursor.completed = not page.has_more
+        cursor.save()
+    return written
+
+
+def transaction_entry(transaction):
+    cents = int(transaction.amount * 100)
+    return StripeLedgerEntry(
+        object_type='charge',
+        stripe_id=transaction.payment_intent_id or transaction.transaction_id,
+        payment_intent_id=transaction.payment_intent_id or '',
+        status='succeeded',
+        amount_cents=cents,
+        amount_refunded_cents=cents if transaction.status == 'refunded' else 0,
+        currency=transaction.currency.lower(),
+        stripe_created=transaction.completed_at or transaction.created_at,
+        # A later save (completed -> refunded) replaces the earlier state
+        source_created=transaction.updated_at,
+        source='transaction',
+    )
+
+
+def _without_stripe_charges(entries):
+    """Transaction entries whose PaymentIntent has no charge from Stripe in the ledger yet"""
+    payment_intents = {entry.payment_intent_id for entry in entries if entry.payment_intent_id}
+    charged = set(
+        StripeLedgerEntry.objects.filter(object_type='charge', payment_intent_id__in=payment_intents)
+        .exclude(stripe_id=F('payment_intent_id'))
+        .values_list('payment_intent_id', flat=True)
+    ) if payment_intents else set()
+    return [entry for entry in entries if entry.payment_intent_id not in charged]
+
+
+def record_transaction(transaction):
+    """Add a completed Stripe PaymentTransaction unless Stripe data for it already exists"""
+    if transaction.payment_gateway != 'stripe' or transaction.status not in ('completed', 'refunded'):
+        return
+    upsert_entries(_without_stripe_charges([transaction_entry(transaction)]))
+
+
+def import_payment_transactions(batch_size=1000):
+    """Seed the ledger from local Stripe payment history"""
+    transactions = PaymentTransaction.objects.filter(
+        payment_gateway='stripe', status__in=['completed', 'refunded']
+    ).iterator(chunk_size=batch_size)
+    imported, batch = 0, []
+    for transaction in transactions:
+        batch.append(transaction_entry(transaction))
+        if len(batch) >= batch_size:
+            imported += upsert_entries(_without_stripe_charges(batch))
+            batch = []
+    if batch:
+        imported += upsert_entries(_without_stripe_charges(batch))
+    return imported
+
+
+def revenue_metrics():
+    """Total revenue, MRR and customer count in one indexed aggregate"""
+    totals = StripeLedgerEntry.objects.filter(
+        object_type__in=['charge', 'subscription', 'customer']
+    ).aggregate(
+        revenue_cents=Coalesce(Sum(
+            F('amount_cents') - F('amount_refunded_cents'),
+            filter=Q(object_type='charge', status='succeeded'),
+        ), 0),
+        mrr_cents=Coalesce(Sum('mrr_cents', filter=Q(object_type='subscription', status__in=MRR_STATUSES)), 0),
+        customer_count=Count('id', filter=Q(object_type='customer', deleted=False)),
+    )
+    cursor = StripeSyncCursor.objects.filter(name=EVENTS_CURSOR).first()
+    return {
+        "total_revenue": totals['revenue_cents'] / 100,
+        "monthly_recurring_revenue": totals['mrr_cents'] / 100,
+        "customer_count": totals['customer_count'],
+        "currency": "usd",
+        "synced_through": cursor.last_created.isoformat() if cursor and cursor.last_created else None,
+    }
@@ -0,0 +1,207 @@
+"""
+Stripe webhook ingestion
+
+The webhook view only verifies and stores each event (StripeWebhookEvent,
+unique on event_id) and acknowledges Stripe. Celery then processes the queue
+in batches ordered by Stripe's created timestamp.
+
+Every webhook queues a drain task, so several workers can be asked to drain
+at once. process_pending holds a Postgres advisory lock while it runs and the
+other workers return immediately, so events are applied by one consumer in
+order. A failed event blocks every newer one until it succeeds or runs out of
+attempts; otherwise a retried checkout.session.completed could land after the
+customer.subscription.deleted that followed it and resurrect the
+subscription. Redelivered events only bump a counter. Handlers are
+idempotent, so a replayed or retried event leaves the same state behind.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+import logging
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from deelflow.models import Subscription, SubscriptionPackage, StripeWebhookEvent, User
+from deelflow.stripe_catalog import invalidate_catalog, is_catalog_event
+from deelflow.stripe_ledger import apply_event as apply_ledger_event, is_ledger_event
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)   # before a failed event is picked up again
+STALE_CLAIM = timedelta(minutes=10)  # a "processing" claim older than this is assumed lost
+CONSUMER_LOCK = 0x5714E  # pg advisory lock key held by the one draining worker
+
+
+def is_valid_event(event):
+    """True if the payload has the fields record_event needs"""
+    return (
+        isinstance(event, dict)
+        and isinstance(event.get('id'), str) and bool(event['id'])
+        and isinstance(event.get('type'), str)
+        and isinstance(event.get('created'), int) and not isinstance(event['created'], bool)
+    )
+
+
+def record_event(event):
+    """Store one verified event; returns False if Stripe already delivered it"""
+    _, created = StripeWebhookEvent.objects.get_or_create(
+        event_id=event['id'],
+        defaults={
+            'event_type': event['type'],
+            'payload': event,
+            'stripe_created': datetime.fromtimestamp(event['created'], tz=dt_timezone.utc),
+        },
+    )
+    if not created:
+        StripeWebhookEvent.objects.filter(event_id=event['id']).update(deliveries=F('deliveries') + 1)
+    return created
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """Lock and mark the oldest ready events as processing
+
+    Nothing newer than a failed event that is still waiting for its retry is
+    claimed, so events are never applied out of order.
+    """
+    now = timezone.now()
+    ready = (
+        Q(status='pending')
+        | Q(status='failed', attempts__lt=MAX_ATTEMPTS, claimed_at__lt=now - RETRY_DELAY)
+        | Q(status='processing', claimed_at__lt=now - STALE_CLAIM)
+    )
+    waiting = (
+        StripeWebhookEvent.objects
+        .filter(status='failed', attempts__lt=MAX_ATTEMPTS, claimed_at__gte=now - RETRY_DELAY)
+        .order_by('stripe_created', 'id')
+        .first()
+    )
+    if waiting is not None:
+        ready &= Q(stripe_created__lt=waiting.stripe_created) | Q(
+            stripe_created=waiting.stripe_created, id__lt=waiting.id
+        )
+    with transaction.atomic():
+        ids = list(
+            StripeWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(ready)
+            .order_by('stripe_created', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        StripeWebhookEvent.objects.filter(id__in=ids).update(
+            status='processing', claimed_at=now, attempts=F('attempts') + 1
+        )
+    return list(StripeWebhookEvent.objects.filter(id__in=ids).order_by('stripe_created', 'id'))
+
+
+def handle_event(event):
+    """Apply one Stripe event to local state; safe to run more than once"""
+    event_type = event['type']
+
+    if event_type == 'checkout.session.completed':
+        session = event['data']['object']
+        metadata = session.get('metadata') or {}
+        package_id = metadata.get('package_id')
+        user_id = metadata.get('user_id')
+
+        if package_id and user_id and session.get('subscription'):
+            # A replay can still apply checkout after the deletion; never
+            # create an active row for a subscription Stripe already deleted
+            deleted = StripeWebhookEvent.objects.filter(
+                event_type='customer.subscription.deleted',
+                payload__data__object__id=session['subscription'],
+            ).exists()
+            Subscription.objects.get_or_create(
+                stripe_subscription_id=session['subscription'],
+                defaults={
+                    'user': User.objects.get(id=user_id),
+                    'package': SubscriptionPackage.objects.get(id=package_id),
+                    'stripe_customer_id': session['customer'],
+                    'status': 'canceled' if deleted else 'active',
+                },
+            )
+
+    elif event_type == 'customer.subscription.deleted':
+        Subscription.objects.filter(
+            stripe_subscription_id=event['data']['object']['id']
+        ).update(status='canceled')
+
+    if is_ledger_event(event_type):
+        apply_ledger_event(event)
+
+    if is_catalog_event(event_type):
+        invalidate_catalog(event_type)
+
+
+def process_batch(batch_size=BATCH_SIZE):
+    """Claim and process one batch in order; returns (processed, failed)
+
+    Stops at the first failure and hands the rest of the batch back to the
+    queue, where it waits behind the failed event.
+    """
+    processed = failed = 0
+    batch = claim_batch(batch_size)
+    for index, record in enumerate(batch):
+        try:
+            with transaction.atomic():
+                handle_event(record.payload)
+            record.status, record.error, record.processed_at = 'processed', '', timezone.now()
+            processed += 1
+        except Exception as e:
+            logger.error(f"Error processing Stripe event {record.event_id}: {str(e)}")
+            record.status, record.error = 'failed', str(e)
+            failed += 1
+        record.save(update_fields=['status', 'error', 'processed_at'])
+        if record.status == 'failed':
+            StripeWebhookEvent.objects.filter(id__in=[r.id for r in batch[index + 1:]]).update(
+                status='pending', claimed_at=None, attempts=F('attempts') - 1
+            )
+            break
+    return processed, failed
+
+
+def _acquire_consumer_lock():
+    if connection.vendor != 'postgresql':
+        return True  # sqlite (benchmarks) serializes writers anyway
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [CONSUMER_LOCK])
+        return cursor.fetchone()[0]
+
+
+def _release_consumer_lock():
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [CONSUMER_LOCK])
+
+
+def process_pending(batch_size=BATCH_SIZE, max_batches=None):
+    """Drain the queue batch by batch; returns (processed, failed)
+
+    Returns (0, 0) straight away if another worker is already draining.
+    """
+    if not _acquire_consumer_lock():
+        return 0, 0
+    totals = [0, 0]
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            processed, failed = process_batch(batch_size)
+            if not processed and not failed:
+                break
+            totals[0] += processed
+            totals[1] += failed
+            batches += 1
+            if failed:
+                break  # newer events wait until the failed one is retried
+    finally:
+        _release_consumer_lock()
+    return tuple(totals)
+
+
+def replay(since, until, event_types=None):
+    """Queue every stored event created in [since, until) for processing again"""
+    events = StripeWebhookEvent.objects.filter(stripe_created__gte=since, stripe_created__lt=until)
+    if event_types:
+        events = events.filter(event_type__in=event_types)
+    return events.update(status='pending', attempts=0, error='', claimed_at=None, processed_at=None)
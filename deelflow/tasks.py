@@ -8,6 +8,8 @@ import time
 import random
 import logging
 
+from deelflow.address import address_key, one_line_address
+
 logger = logging.getLogger(__name__)
 
 @shared_task
@@ -32,9 +34,11 @@ def analyze_property_ai(property_id):
             'comparables_confidence': round(random.uniform(80, 98), 2),
         }
         
+        # The full one-line address parses back to the same key, so backfill_address_keys keeps it
+        parts = (property.address, property.unit_apt, property.city, property.state, property.zipcode)
         PropertyAIAnalysis.objects.update_or_create(
-            address=property.address,
-            defaults=analysis_data
+            address_key=address_key(*parts),
+            defaults={'address': one_line_address(*parts), **analysis_data}
         )
         
         logger.info(f"AI analysis completed for property {property_id}")
@@ -83,7 +87,9 @@ def discover_leads():
         
         for lead_data in sample_leads:
             DiscoveredLead.objects.get_or_create(
-                address=lead_data['address'],
+                address_key=address_key(
+                    lead_data['address'], city=lead_data['city'], state=lead_data['state'], zipcode=lead_data['zipcode']
+                ),
                 defaults=lead_data
             )
         
@@ -98,9 +104,23 @@ def process_ai_analysis(analysis_type, target_id, target_model):
     """Background task to process AI analysis"""
     try:
         Model = apps.get_model('deelflow', target_model)
-        AIAnalysis = apps.get_model('deelflow', 'AIAnalysis')
+        
+        from deelflow.ai_cache import ai_cache, model_version, target_hash
         
         target = Model.objects.get(id=target_id)
+        links = {
+            'property': target if target_model == 'Property' else None,
+            'lead': target if target_model == 'Lead' else None,
+        }
+        
+        # Reuse the analysis of identical content under the current model version
+        version = model_version('analysis')
+        digest = target_hash(target)
+        cached = ai_cache.get(analysis_type, version, digest)
+        if cached is not None:
+            # The hash covers the target's id, so the stored row already belongs to it
+            logger.info(f"AI analysis reused from cache for {target_model} {target_id}")
+            return f"AI analysis reused from cache for {target_model} {target_id}"
         
         # Simulate AI processing
         processing_time = random.uniform(0.5, 3.0)
@@ -119,15 +139,8 @@ def process_ai_analysis(analysis_type, target_id, target_model):
             }
         }
         
-        # Create AI analysis record
-        ai_analysis = AIAnalysis.objects.create(
-            property=target if target_model == 'Property' else None,
-            lead=target if target_model == 'Lead' else None,
-            analysis_type=analysis_type,
-            result=result,
-            confidence_score=result['confidence'],
-            processing_time=processing_time
-        )
+        # Create AI analysis record (also the cache entry)
+        ai_cache.put(analysis_type, version, digest, result, result['confidence'], processing_time, **links)
         
         logger.info(f"AI analysis completed for {target_model} {target_id}")
         return f"AI analysis completed for {target_model} {target_id}"
@@ -174,25 +187,263 @@ def update_business_metrics():
         logger.error(f"Error updating business metrics: {str(e)}")
         return f"Error updating business metrics: {str(e)}"
 
+@shared_task
+def refresh_dashboard_rollup():
+    """Periodic task to rebuild the materialized dashboard aggregates"""
+    try:
+        from deelflow.dashboard import refresh_dashboard_rollup as refresh
+        
+        rollup = refresh()
+        logger.info(f"Dashboard rollup refreshed at {rollup.refreshed_at.isoformat()}")
+        return "Dashboard rollup refreshed"
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard rollup: {str(e)}")
+        return f"Error refreshing dashboard rollup: {str(e)}"
+
+@shared_task
+def sync_stripe_ledger():
+    """Periodic task to apply Stripe events missed by the webhook to the revenue ledger"""
+    try:
+        from deelflow.stripe_ledger import sync_events
+        
+        applied = sync_events()
+        logger.info(f"Stripe ledger synced: {applied} events applied")
+        return f"Stripe ledger synced: {applied} events applied"
+    except Exception as e:
+        logger.error(f"Error syncing Stripe ledger: {str(e)}")
+        return f"Error syncing Stripe ledger: {str(e)}"
+
+@shared_task
+def process_stripe_webhook_events(batch_size=100):
+    """Drain queued Stripe webhook events in ordered batches"""
+    try:
+        from deelflow.stripe_webhooks import process_pending
+        
+        processed, failed = process_pending(batch_size=batch_size)
+        if processed or failed:
+            logger.info(f"Stripe webhook events processed: {processed} ok, {failed} failed")
+        return f"Stripe webhook events processed: {processed} ok, {failed} failed"
+    except Exception as e:
+        logger.error(f"Error processing Stripe webhook events: {str(e)}")
+        return f"Error processing Stripe webhook events: {str(e)}"
+
+@shared_task
+def backfill_stripe_ledger(object_types=None, max_pages=None, include_transactions=True):
+    """
+    Backfill the revenue ledger from local payment history and the full
+    Stripe history of charges, subscriptions and customers
+    
+    Each object type pages from its own cursor, so rerunning the task resumes
+    an interrupted backfill; with max_pages the task requeues itself until done.
+    """
+    try:
+        from deelflow.stripe_ledger import BACKFILL_RESOURCES, backfill, import_payment_transactions
+        
+        StripeSyncCursor = apps.get_model('deelflow', 'StripeSyncCursor')
+        object_types = object_types or list(BACKFILL_RESOURCES)
+        imported = import_payment_transactions() if include_transactions else 0
+        written = {object_type: backfill(object_type, max_pages=max_pages) for object_type in object_types}
+        
+        pending = StripeSyncCursor.objects.filter(
+            name__in=[f'backfill:{object_type}' for object_type in object_types], completed=True
+        ).count() < len(object_types)
+        if pending:
+            backfill_stripe_ledger.delay(object_types, max_pages, include_transactions=False)
+        logger.info(f"Stripe ledger backfill: {imported} transactions, {written}{' (continuing)' if pending else ''}")
+        return f"Stripe ledger backfill: {imported} transactions, {written}"
+    except Exception as e:
+        logger.error(f"Error backfilling Stripe ledger: {str(e)}")
+        return f"Error backfilling Stripe ledger: {str(e)}"
+
 @shared_task
 def send_campaign_messages(campaign_id):
-    """Background task to send campaign messages"""
+    """
+    Background task to send campaign messages
+    
+    Starts a CampaignSendRun (or resumes the campaign's unfinished one from its
+    checkpoint) and hands off to dispatch_campaign_wave, which fans the leads
+    out to chunked subtasks. Triggering a send while a wave is in flight does
+    nothing: the wave's chord callback carries the run on.
+    """
     try:
+        from deelflow.campaign_dispatch import parse_channels
+        
         Campaign = apps.get_model('deelflow', 'Campaign')
-        Lead = apps.get_model('deelflow', 'Lead')
+        CampaignSendRun = apps.get_model('deelflow', 'CampaignSendRun')
         
         campaign = Campaign.objects.get(id=campaign_id)
-        leads = Lead.objects.filter(campaign=campaign)
-        
-        # Simulate sending messages
-        for lead in leads:
-            # Here you would integrate with actual messaging services
-            # (SMS, Email, Voice, etc.)
-            logger.info(f"Sending {campaign.channel} message to {lead.name}")
-            time.sleep(0.1)  # Simulate processing time
+        run = CampaignSendRun.objects.filter(campaign=campaign, status='running').first()
+        if run:
+            logger.info(f"Resuming send run {run.id} for campaign {campaign_id} after lead {run.last_lead_id}")
+        else:
+            channels = parse_channels(campaign.channel)
+            if not channels:
+                return f"Campaign {campaign_id} has no channels configured"
+            run = CampaignSendRun.objects.create(campaign=campaign, channels=channels)
+            logger.info(f"Started send run {run.id} for campaign {campaign_id} on {', '.join(channels)}")
         
-        logger.info(f"Campaign {campaign_id} messages sent to {leads.count()} leads")
-        return f"Campaign {campaign_id} messages sent to {leads.count()} leads"
+        return dispatch_campaign_wave(run.id)
     except Exception as e:
         logger.error(f"Error sending campaign messages: {str(e)}")
         return f"Error sending campaign messages: {str(e)}"
+
+@shared_task
+def dispatch_campaign_wave(run_id):
+    """
+    Queue the next wave of lead chunks for a send run as a chord
+
+    The run is claimed first (wave_expires_at set only if no wave is in
+    flight), so a repeated trigger never queues the same deliveries twice. A
+    claim that outlives its wave by CAMPAIGN_WAVE_GRACE is presumed lost.
+    """
+    CampaignSendRun = apps.get_model('deelflow', 'CampaignSendRun')
+    claimed = dispatched = False
+    try:
+        from datetime import timedelta
+        from celery import chord, group
+        from django.conf import settings
+        from django.db.models import Q
+        from django.utils import timezone
+        from deelflow.campaign_dispatch import (
+            channel_countdown, record_pending_deliveries, stream_wave_lead_ids
+        )
+        
+        now = timezone.now()
+        grace = timedelta(seconds=settings.CAMPAIGN_WAVE_GRACE)
+        claimed = CampaignSendRun.objects.filter(id=run_id, status='running').filter(
+            Q(wave_expires_at__isnull=True) | Q(wave_expires_at__lt=now)
+        ).update(wave_expires_at=now + grace)
+        run = CampaignSendRun.objects.get(id=run_id)
+        if run.status != 'running':
+            return f"Send run {run_id} is {run.status}"
+        if not claimed:
+            return f"Send run {run_id} already has a wave in flight"
+        
+        # No wave holds the run, so rows still "sending" were left by a chunk that died mid-send
+        CampaignDelivery = apps.get_model('deelflow', 'CampaignDelivery')
+        CampaignDelivery.objects.filter(run_id=run_id, status='sending').update(status='pending')
+        
+        subtasks = []
+        queued = {channel: 0 for channel in run.channels}
+        last_lead_id = run.last_lead_id
+        for lead_ids in stream_wave_lead_ids(run):
+            record_pending_deliveries(run, run.channels, lead_ids)
+            for channel in run.channels:
+                subtasks.append(
+                    send_campaign_chunk.si(run_id, channel, lead_ids).set(
+                        countdown=channel_countdown(channel, queued[channel])
+                    )
+                )
+                queued[channel] += len(lead_ids)
+            last_lead_id = lead_ids[-1]
+        
+        if not subtasks:
+            return finish_campaign_run(run_id)
+        
+        # The claim lasts until the last chunk is due, plus the grace period
+        countdown = max(channel_countdown(channel, queued[channel]) for channel in run.channels)
+        CampaignSendRun.objects.filter(id=run_id).update(
+            wave_expires_at=timezone.now() + timedelta(seconds=countdown) + grace
+        )
+        chord(group(subtasks))(
+            campaign_wave_done.si(run_id, last_lead_id, run.waves_completed).on_error(
+                campaign_wave_failed.si(run_id, run.waves_completed)
+            )
+        )
+        dispatched = True
+        logger.info(f"Send run {run_id}: dispatched {len(subtasks)} chunks up to lead {last_lead_id}")
+        return f"Send run {run_id} wave dispatched ({len(subtasks)} chunks)"
+    except Exception as e:
+        if claimed and not dispatched:
+            CampaignSendRun.objects.filter(id=run_id).update(wave_expires_at=None)
+        logger.error(f"Error dispatching campaign wave: {str(e)}")
+        return f"Error dispatching campaign wave: {str(e)}"
+
+@shared_task
+def send_campaign_chunk(run_id, channel, lead_ids):
+    """Send one channel's messages to a chunk of leads and record statuses in bulk"""
+    try:
+        from django.db import transaction
+        from django.db.models import F
+        from deelflow.campaign_dispatch import send_deliveries
+        
+        CampaignDelivery = apps.get_model('deelflow', 'CampaignDelivery')
+        CampaignSendRun = apps.get_model('deelflow', 'CampaignSendRun')
+        
+        # Claim the pending rows in a short transaction (pending -> sending); a
+        # duplicate chunk finds nothing left to claim. Providers are called
+        # outside it, so no transaction or row lock is held while sending.
+        with transaction.atomic():
+            ids = list(
+                CampaignDelivery.objects.select_for_update(skip_locked=True).filter(
+                    run_id=run_id, channel=channel, lead_id__in=lead_ids, status='pending'
+                ).values_list('id', flat=True)
+            )
+            CampaignDelivery.objects.filter(id__in=ids).update(status='sending')
+        deliveries = list(CampaignDelivery.objects.filter(id__in=ids).select_related('lead'))
+        sent, failed = send_deliveries(deliveries, channel)
+        CampaignDelivery.objects.bulk_update(deliveries, ['status', 'attempts', 'error', 'sent_at'])
+        CampaignSendRun.objects.filter(id=run_id).update(
+            sent_count=F('sent_count') + sent,
+            failed_count=F('failed_count') + failed
+        )
+        return f"Send run {run_id}: {channel} chunk sent={sent} failed={failed}"
+    except Exception as e:
+        # Raised, not returned: a failed chunk must fail the chord so the
+        # checkpoint never moves past its unsent deliveries
+        logger.error(f"Error sending campaign chunk: {str(e)}")
+        raise
+
+@shared_task
+def campaign_wave_done(run_id, last_lead_id, wave=None):
+    """Chord callback: advance the run checkpoint, release the wave claim and start the next wave"""
+    try:
+        from django.db.models import F
+        
+        CampaignDelivery = apps.get_model('deelflow', 'CampaignDelivery')
+        CampaignSendRun = apps.get_model('deelflow', 'CampaignSendRun')
+        runs = CampaignSendRun.objects.filter(id=run_id, status='running')
+        if wave is not None:
+            # A wave redispatched after its claim expired finishes twice; only the first counts
+            runs = runs.filter(waves_completed=wave)
+        unfinished = CampaignDelivery.objects.filter(
+            run_id=run_id, lead_id__lte=last_lead_id, status__in=['pending', 'sending']
+        ).count()
+        if unfinished:
+            # Keep the checkpoint so a resumed send retries this wave's leftovers
+            runs.update(wave_expires_at=None)
+            logger.warning(f"Send run {run_id}: {unfinished} deliveries unfinished, wave {wave} not advanced")
+            return f"Send run {run_id} wave {wave} left {unfinished} deliveries unfinished"
+        if not runs.update(
+            last_lead_id=last_lead_id,
+            waves_completed=F('waves_completed') + 1,
+            wave_expires_at=None
+        ):
+            return f"Send run {run_id} wave {wave} already completed"
+        dispatch_campaign_wave.delay(run_id)
+        return f"Send run {run_id} checkpoint at lead {last_lead_id}"
+    except Exception as e:
+        logger.error(f"Error completing campaign wave: {str(e)}")
+        return f"Error completing campaign wave: {str(e)}"
+
+@shared_task
+def campaign_wave_failed(run_id, wave):
+    """Chord error callback: release the wave claim without moving the checkpoint"""
+    CampaignSendRun = apps.get_model('deelflow', 'CampaignSendRun')
+    CampaignSendRun.objects.filter(id=run_id, status='running', waves_completed=wave).update(wave_expires_at=None)
+    logger.error(f"Send run {run_id}: wave {wave} failed; send the campaign again to resume it")
+    return f"Send run {run_id} wave {wave} failed"
+
+def finish_campaign_run(run_id):
+    """Mark a send run completed once no leads remain past its checkpoint"""
+    from django.utils import timezone
+    
+    CampaignSendRun = apps.get_model('deelflow', 'CampaignSendRun')
+    CampaignSendRun.objects.filter(id=run_id, status='running').update(
+        status='completed',
+        wave_expires_at=None,
+        finished_at=timezone.now()
+    )
+    run = CampaignSendRun.objects.get(id=run_id)
+    logger.info(f"Campaign {run.campaign_id} messages sent: {run.sent_count} sent, {run.failed_count} failed")
+    return f"Campaign {run.campaign_id} messages sent: {run.sent_count} sent, {run.failed_count} failed"
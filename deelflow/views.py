@@ -7,8 +7,10 @@ from rest_framework.response import Response
 from django.conf import settings
 from django.contrib.auth.models import User
 from .models import SubscriptionPackage, Subscription
+from .stripe_webhooks import is_valid_event, record_event
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
+from django.db import transaction
 import stripe
 import json
 import logging
@@ -94,6 +96,15 @@ def create_checkout_session(request):
         }, status=400)
 
 
+def _queue_webhook_processing():
+    from .tasks import process_stripe_webhook_events
+    try:
+        process_stripe_webhook_events.delay()
+    except Exception as e:
+        # The beat schedule drains the queue anyway
+        logger.warning(f"Could not queue Stripe webhook processing: {str(e)}")
+
+
 # Function 3: Handle Stripe webhooks (when payment is completed)
 @csrf_exempt
 @api_view(['POST'])
@@ -105,9 +116,8 @@ def stripe_webhook(request):
     # For local testing, skip signature verification
     if settings.DEBUG:
         try:
-            event = json.loads(payload.decode('utf-8'))
-            logger.info(f"✅ LOCAL WEBHOOK TEST - Event received: {event.get('type', 'unknown')}")
-        except json.JSONDecodeError:
+            json.loads(payload.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
             return JsonResponse({'status': 'invalid payload'}, status=400)
     else:
         try:
@@ -120,39 +130,16 @@ def stripe_webhook(request):
         except stripe.error.SignatureVerificationError:
             return JsonResponse({'status': 'invalid signature'}, status=400)
 
-    # Handle the event
-    if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        
-        # Get package and user info from metadata
-        package_id = session['metadata'].get('package_id')
-        user_id = session['metadata'].get('user_id')
-        
-        if package_id and user_id:
-            # Create subscription record
-            package = SubscriptionPackage.objects.get(id=package_id)
-            user = User.objects.get(id=user_id)
-            
-            Subscription.objects.create(
-                user=user,
-                package=package,
-                stripe_subscription_id=session['subscription'],
-                stripe_customer_id=session['customer'],
-                status='active'
-            )
-    
-    elif event['type'] == 'customer.subscription.deleted':
-        subscription_data = event['data']['object']
-        
-        # Update subscription status to canceled
-        try:
-            subscription = Subscription.objects.get(
-                stripe_subscription_id=subscription_data['id']
-            )
-            subscription.status = 'canceled'
-            subscription.save()
-        except Subscription.DoesNotExist:
-            pass
+    # Store the raw JSON event and acknowledge; Celery applies it (see deelflow/stripe_webhooks.py)
+    event = json.loads(payload.decode('utf-8'))
+    if not is_valid_event(event):
+        return JsonResponse({'status': 'invalid payload'}, status=400)
+    if settings.DEBUG:
+        logger.info(f"✅ LOCAL WEBHOOK TEST - Event received: {event['type']}")
+    if record_event(event):
+        transaction.on_commit(_queue_webhook_processing)
+    else:
+        logger.info(f"Duplicate Stripe event {event['id']} acknowledged")
     
     return JsonResponse({'status': 'success'})
 
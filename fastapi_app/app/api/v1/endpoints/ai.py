@@ -2,10 +2,13 @@
 AI services endpoints
 """
 
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from typing import List, Optional
 from app.core.auth_middleware import get_current_user, require_permission
+from app.core.config import settings
 from app.core.exceptions import NotFoundError, AuthorizationError
+from app.core.streaming import UploadTooLarge, receive_upload
 from app.services.ai_service import AIService
 from app.schemas.ai import AIAnalysisResponse, VisionAnalysisRequest, NLPProcessingRequest
 import logging
@@ -34,11 +37,10 @@ async def analyze_property_image(
                 detail="File must be an image"
             )
         
-        # Read file content
-        content = await file.read()
-        
-        # Perform analysis
-        analysis = await ai_service.analyze_image(content, analysis_type)
+        # Size-check and hash the file Starlette already spooled (no copy)
+        with await receive_upload(file, settings.AI_IMAGE_MAX_BYTES) as upload:
+            # Perform analysis on a zero-copy view
+            analysis = await ai_service.analyze_image(upload.view(), analysis_type, content_hash=upload.sha256)
         
         return AIAnalysisResponse(
             analysis_type="vision",
@@ -47,6 +49,13 @@ async def analyze_property_image(
             processing_time=analysis.get("processing_time", 0.0)
         )
     
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Vision analysis error: {e}")
         raise HTTPException(
@@ -54,6 +63,72 @@ async def analyze_property_image(
             detail="Failed to analyze image"
         )
 
+@router.post("/vision/analyze/batch", response_model=List[AIAnalysisResponse])
+async def analyze_property_images(
+    files: List[UploadFile] = File(...),
+    analysis_type: str = "property_condition",
+    current_user = Depends(get_current_user)
+):
+    """Analyze several property images in one request (results in upload order)"""
+    uploads = []
+    try:
+        ai_service = AIService()
+        
+        # Check permissions
+        if not ai_service.has_permission(current_user, "use_ai_vision"):
+            raise AuthorizationError("Permission to use AI vision required")
+        
+        if len(files) > settings.AI_BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {settings.AI_BATCH_MAX_FILES} files per request"
+            )
+        
+        # Validate file types
+        for file in files:
+            if not (file.content_type or "").startswith('image/'):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{file.filename} must be an image"
+                )
+        
+        # Starlette has spooled every file already; each is size-checked and hashed in place
+        for file in files:
+            uploads.append(await receive_upload(file, settings.AI_IMAGE_MAX_BYTES))
+        
+        # Analyzed concurrently, so the vision batcher can group them
+        analyses = await asyncio.gather(*(
+            ai_service.analyze_image(upload.view(), analysis_type, content_hash=upload.sha256)
+            for upload in uploads
+        ))
+        
+        return [
+            AIAnalysisResponse(
+                analysis_type="vision",
+                result=analysis,
+                confidence=analysis.get("confidence", 0.0),
+                processing_time=analysis.get("processing_time", 0.0)
+            )
+            for analysis in analyses
+        ]
+    
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch vision analysis error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to analyze images"
+        )
+    finally:
+        for upload in uploads:
+            upload.close()
+
 @router.post("/nlp/process", response_model=AIAnalysisResponse)
 async def process_text(
     request: NLPProcessingRequest,
@@ -109,11 +184,10 @@ async def analyze_voice_call(
                 detail="File must be an audio file"
             )
         
-        # Read file content
-        content = await audio_file.read()
-        
-        # Perform analysis
-        analysis = await ai_service.analyze_audio(content, analysis_type)
+        # Size-check and hash the file Starlette already spooled (no copy)
+        with await receive_upload(audio_file, settings.AI_AUDIO_MAX_BYTES) as upload:
+            # Perform analysis on a zero-copy view
+            analysis = await ai_service.analyze_audio(upload.view(), analysis_type, content_hash=upload.sha256)
         
         return AIAnalysisResponse(
             analysis_type="voice",
@@ -122,6 +196,13 @@ async def analyze_voice_call(
             processing_time=analysis.get("processing_time", 0.0)
         )
     
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Voice analysis error: {e}")
         raise HTTPException(
@@ -2,92 +2,140 @@
 WebSocket endpoints for real-time updates
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query, status
+from typing import List, Dict, Any, Optional
 import json
 import logging
 
+from app.core.broadcast import ConnectionManager
+from app.core.config import settings
+from app.core.pubsub import create_backplane
+from app.core.security import verify_token
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-class ConnectionManager:
-    """Manages WebSocket connections"""
-    
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.user_connections: Dict[int, List[WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, user_id: int = None):
-        """Accept a new WebSocket connection"""
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        
-        if user_id:
-            if user_id not in self.user_connections:
-                self.user_connections[user_id] = []
-            self.user_connections[user_id].append(websocket)
-        
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
-    
-    def disconnect(self, websocket: WebSocket, user_id: int = None):
-        """Remove a WebSocket connection"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        
-        if user_id and user_id in self.user_connections:
-            if websocket in self.user_connections[user_id]:
-                self.user_connections[user_id].remove(websocket)
-                if not self.user_connections[user_id]:
-                    del self.user_connections[user_id]
-        
-        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
-    
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        """Send message to specific WebSocket"""
-        try:
-            await websocket.send_text(message)
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-    
-    async def send_to_user(self, message: str, user_id: int):
-        """Send message to specific user"""
-        if user_id in self.user_connections:
-            for websocket in self.user_connections[user_id]:
-                try:
-                    await websocket.send_text(message)
-                except Exception as e:
-                    logger.error(f"Error sending to user {user_id}: {e}")
-    
-    async def broadcast(self, message: str):
-        """Broadcast message to all connections"""
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting message: {e}")
-
+# Every worker delivers backplane events to the sockets held in its own manager
 manager = ConnectionManager()
+backplane = create_backplane(settings.REALTIME_BACKPLANE, settings.REDIS_URL)
+
+TOPIC_ACTIVITY_UPDATE = "activity_update"
+TOPIC_NOTIFICATION = "notification"
+SOCKET_TOPICS = {TOPIC_ACTIVITY_UPDATE, TOPIC_NOTIFICATION}
+
+
+async def deliver_event(topic: str, message: str, user_id: Optional[int] = None):
+    """Backplane handler: hand one event to this worker's connections"""
+    from deelflow.realtime import CLIENT_TOPICS, handle_process_event
+    if handle_process_event(topic, message):
+        return
+    if topic not in CLIENT_TOPICS and topic not in SOCKET_TOPICS:
+        # Internal topic whose handler this process has not registered (yet)
+        logger.debug(f"Dropping internal realtime event {topic}")
+        return
+    if user_id is not None:
+        await manager.send_to_user(message, user_id)
+    else:
+        await manager.broadcast(message, topic=topic)
+
+
+async def start_realtime():
+    """Start the backplane (and bridge Django model events when running in-memory)"""
+    await backplane.start(deliver_event)
+    if settings.REALTIME_BACKPLANE != "redis":
+        from deelflow.realtime import add_local_listener
+        add_local_listener(backplane.publish_threadsafe)
+
+
+async def stop_realtime():
+    """Stop the backplane and every socket writer"""
+    if settings.REALTIME_BACKPLANE != "redis":
+        from deelflow.realtime import remove_local_listener
+        remove_local_listener(backplane.publish_threadsafe)
+    await backplane.stop()
+    await manager.close()
+
+
+def parse_topics(topics: Optional[str]) -> List[str]:
+    return [topic.strip() for topic in (topics or "").split(",") if topic.strip()]
+
+
+def handle_subscription(websocket: WebSocket, data: str) -> bool:
+    """Apply {"action": "subscribe"|"unsubscribe", "topics": [...]}; False if not one"""
+    try:
+        request = json.loads(data)
+    except json.JSONDecodeError:
+        return False
+    if not isinstance(request, dict) or request.get("action") not in ("subscribe", "unsubscribe"):
+        return False
+    topics = [str(topic) for topic in request.get("topics") or []]
+    if request["action"] == "subscribe":
+        manager.subscribe(websocket, topics)
+    else:
+        manager.unsubscribe(websocket, topics)
+    return True
+
 
 @router.websocket("/live-activity")
-async def websocket_live_activity(websocket: WebSocket):
-    """WebSocket endpoint for live activity feed"""
-    await manager.connect(websocket)
+async def websocket_live_activity(websocket: WebSocket, topics: Optional[str] = Query(None)):
+    """
+    WebSocket endpoint for live activity feed
+    
+    Pass ``?topics=property.created,deal.status_changed,activity.created`` (or send
+    a subscribe message) to receive only those events; otherwise every event is sent.
+    """
+    await manager.connect(websocket, topics=parse_topics(topics))
     
     try:
         while True:
             # Keep connection alive
             data = await websocket.receive_text()
             
+            if handle_subscription(websocket, data):
+                continue
+            
             # Echo back for testing
             await manager.send_personal_message(f"Echo: {data}", websocket)
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
+async def authenticate_socket(websocket: WebSocket, token: Optional[str], user_id: int) -> bool:
+    """
+    Accept the socket only for the user its JWT belongs to
+
+    The token comes from ``?token=`` or, failing that, a first message
+    ``{"action": "auth", "token": "..."}``. Otherwise the socket is closed
+    with 1008 (policy violation).
+    """
+    await websocket.accept()
+    if not token:
+        try:
+            request = json.loads(await websocket.receive_text())
+        except WebSocketDisconnect:
+            return False
+        except json.JSONDecodeError:
+            request = None
+        if isinstance(request, dict) and request.get("action") == "auth":
+            token = request.get("token")
+    payload = verify_token(token) if isinstance(token, str) and token else None
+    if not payload or str(payload.get("user_id")) != str(user_id):
+        logger.warning(f"WebSocket for user {user_id} rejected: missing, invalid or foreign token")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return False
+    return True
+
+
 @router.websocket("/user/{user_id}")
-async def websocket_user_updates(websocket: WebSocket, user_id: int):
-    """WebSocket endpoint for user-specific updates"""
-    await manager.connect(websocket, user_id)
+async def websocket_user_updates(websocket: WebSocket, user_id: int, token: Optional[str] = Query(None)):
+    """
+    WebSocket endpoint for user-specific updates
+
+    Requires the user's JWT (``?token=`` or a first ``{"action": "auth"}`` message)
+    """
+    if not await authenticate_socket(websocket, token, user_id):
+        return
+    manager.register(websocket, user_id)
     
     try:
         while True:
@@ -143,13 +191,13 @@ async def websocket_notifications(websocket: WebSocket):
 
 # Helper functions for sending updates
 async def send_activity_update(activity_data: Dict[str, Any]):
-    """Send activity update to all connected clients"""
+    """Send activity update to all connected clients (on every worker)"""
     message = json.dumps({
         "type": "activity_update",
         "data": activity_data,
         "timestamp": "2024-01-01T00:00:00Z"
     })
-    await manager.broadcast(message)
+    await backplane.publish(TOPIC_ACTIVITY_UPDATE, message)
 
 async def send_user_notification(user_id: int, notification_data: Dict[str, Any]):
     """Send notification to specific user"""
@@ -158,4 +206,4 @@ async def send_user_notification(user_id: int, notification_data: Dict[str, Any]
         "data": notification_data,
         "timestamp": "2024-01-01T00:00:00Z"
     })
-    await manager.send_to_user(message, user_id)
+    await backplane.publish(TOPIC_NOTIFICATION, message, user_id=user_id)
@@ -3,11 +3,12 @@ Authentication middleware for FastAPI endpoints
 Verifies JWT tokens and provides user authentication
 """
 
-from fastapi import HTTPException, Header, status
+from fastapi import Depends, HTTPException, Header, status
 from typing import Optional, Callable
 from functools import wraps
 import logging
 
+from app.core.db_executor import run_db
 from app.core.security import verify_token, extract_token_from_header
 
 logger = logging.getLogger(__name__)
@@ -138,45 +139,34 @@ def require_permission(permission_name: str):
     """
     Dependency function to require specific permission
     
+    Reuses get_current_user for the token and resolves the token's role to a
+    cached frozenset of permission names, so a warm check is a set lookup with
+    no DB query. The role cache is dropped whenever roles or permissions change.
+    
     Args:
         permission_name: Name of the permission required
     
     Returns:
         Dependency function that checks permission
     """
-    def check_permission(authorization: Optional[str] = Header(None)):
+    async def check_permission(current_user: dict = Depends(get_current_user)):
         """
         Check if user has the required permission
         """
-        if not authorization:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        from app.services.permission_matrix import get_role_permissions, peek_role_permissions
         
-        token = extract_token_from_header(authorization)
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication header format",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        role = current_user.get("role")
+        permissions = peek_role_permissions(role)
+        if permissions is None:
+            permissions = await run_db(get_role_permissions, role)
         
-        payload = verify_token(token)
-        if not payload:
+        if permission_name not in permissions:
+            logger.warning(f"Permission denied: role {role!r} lacks {permission_name}")
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token",
-                headers={"WWW-Authenticate": "Bearer"},
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Permission '{permission_name}' required",
             )
         
-        # TODO: Implement actual permission checking
-        # For now, just return the user payload
-        logger.info(f"Permission check requested: {permission_name} (not implemented)")
-        
-        return payload
+        return current_user
     
     return check_permission
-
-
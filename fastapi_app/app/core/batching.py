@@ -0,0 +1,183 @@
+"""
+Micro-batching
+Collects concurrent single-item requests into batches for a model backend that
+is cheaper per item when called with many at once
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+AI_BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", "16"))
+AI_BATCH_MAX_WAIT_MS = float(os.getenv("AI_BATCH_MAX_WAIT_MS", "10"))
+AI_BATCH_WORKERS = int(os.getenv("AI_BATCH_WORKERS", "2"))
+SAMPLE_SIZE = 1000  # recent batch sizes / waits kept for percentiles
+
+# backend(items) -> one result per item, in order; runs on a worker thread
+BatchBackend = Callable[[List[Any]], Sequence[Any]]
+
+
+def _percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class MicroBatcher:
+    """
+    Dynamic batching scheduler in front of a batch backend
+
+    ``submit`` queues one item and awaits its own result. A collector task takes
+    the oldest item, waits up to ``max_wait_ms`` for more (never past
+    ``max_batch``) and hands the batch to the backend on a worker pool. A batch
+    is only collected once a worker is free, so under load items pile up while
+    the workers are busy and batches grow on their own; at low load a request
+    waits at most ``max_wait_ms`` before it runs.
+
+    If the backend raises, or returns the wrong number of results, every caller
+    in that batch gets the exception.
+    """
+
+    def __init__(self, name: str, backend: BatchBackend, max_batch: int = AI_BATCH_MAX_SIZE,
+                 max_wait_ms: float = AI_BATCH_MAX_WAIT_MS, workers: int = AI_BATCH_WORKERS):
+        self.name = name
+        self.backend = backend
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.workers = max(1, workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()  # the loop only keeps weak references to tasks
+        self._batch_sizes = deque(maxlen=SAMPLE_SIZE)
+        self._waits = deque(maxlen=SAMPLE_SIZE)
+        self.submitted = 0
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.total_run = 0.0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"batch-{self.name}")
+        return self._pool
+
+    def _ensure_collector(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues and tasks belong to one event loop (tests and benchmarks start several)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.workers)
+            self._collector = None
+        if self._collector is None or self._collector.done():
+            self._collector = loop.create_task(self._collect())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        self._ensure_collector()
+        future = self._loop.create_future()
+        self.submitted += 1
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _next_batch(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _collect(self) -> None:
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._next_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            # Callers that gave up (cancelled) are dropped before reaching the model
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[tuple]) -> None:
+        dispatched = time.perf_counter()
+        for _, _, enqueued in batch:
+            self._waits.append(dispatched - enqueued)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), self.backend, [item for item, _, _ in batch]
+            )
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} backend returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"{self.name} batch of {len(batch)} failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.batches += 1
+            self.items += len(batch)
+            self._batch_sizes.append(len(batch))
+            self.total_run += time.perf_counter() - dispatched
+            self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Batch sizes, queue depth and queue-wait statistics"""
+        sizes, waits = list(self._batch_sizes), list(self._waits)
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "p95_batch_size": _percentile(sizes, 95),
+            "avg_wait_ms": round(sum(waits) / len(waits) * 1000, 3) if waits else 0.0,
+            "p95_wait_ms": round(_percentile(waits, 95) * 1000, 3),
+            "avg_batch_run_ms": round(self.total_run / self.batches * 1000, 3) if self.batches else 0.0,
+        }
+
+    def close(self) -> None:
+        """Stop collecting and shut the worker pool down (application shutdown)"""
+        if self._collector is not None:
+            self._collector.cancel()
+            self._collector = None
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
@@ -0,0 +1,228 @@
+"""
+WebSocket broadcast engine
+Fans messages out through bounded per-connection queues drained by writer tasks
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = 256       # messages buffered per connection before it counts as slow
+SEND_TIMEOUT = 10.0         # seconds a single send may take before the client is dropped
+MAX_DROPPED_MESSAGES = 64   # consecutive overflow drops before a slow client is disconnected
+SLOW_CONSUMER_CLOSE_CODE = 1013  # "try again later"
+
+
+def serialize_message(message: Any) -> str:
+    """Encode a payload once so every recipient shares the same string"""
+    if isinstance(message, str):
+        return message
+    return json.dumps(message, default=str)
+
+
+class Connection:
+    """One accepted WebSocket plus its outbound queue and writer task"""
+
+    __slots__ = ("websocket", "user_id", "topics", "queue", "writer", "dropped")
+
+    def __init__(self, websocket: Any, user_id: Optional[int], queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.topics: Optional[Set[str]] = None  # None = receive every topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+
+class ConnectionManager:
+    """
+    Manages WebSocket connections
+
+    ``broadcast`` and ``send_to_user`` only enqueue; each connection's writer
+    task performs the actual ``send_text``. A slow client can fill only its own
+    queue. Once its queue overflows, new messages to it are dropped, and after
+    ``max_dropped`` consecutive drops it is disconnected.
+
+    Connections receive every broadcast until they subscribe to specific
+    topics; topic broadcasts then reach only their subscribers.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = SEND_QUEUE_SIZE,
+        send_timeout: float = SEND_TIMEOUT,
+        max_dropped: int = MAX_DROPPED_MESSAGES,
+    ):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.max_dropped = max_dropped
+        self.connections: Dict[Any, Connection] = {}
+        self.user_connections: Dict[int, Set[Any]] = {}
+        self.topic_connections: Dict[str, Set[Any]] = {}
+        self.wildcard_connections: Set[Any] = set()
+        self.messages_dropped = 0
+        self.slow_disconnects = 0
+
+    @property
+    def active_connections(self):
+        return self.connections.keys()
+
+    async def connect(self, websocket: Any, user_id: int = None, topics: Optional[Iterable[str]] = None):
+        """Accept a new WebSocket connection and start its writer"""
+        await websocket.accept()
+        self.register(websocket, user_id)
+        if topics:
+            self.subscribe(websocket, topics)
+        logger.info(f"WebSocket connected. Total connections: {len(self.connections)}")
+
+    def register(self, websocket: Any, user_id: int = None) -> Connection:
+        """Track an already-accepted WebSocket"""
+        connection = Connection(websocket, user_id, self.queue_size)
+        connection.writer = asyncio.create_task(self._writer(connection))
+        self.connections[websocket] = connection
+        self.wildcard_connections.add(websocket)
+        if user_id:
+            self.user_connections.setdefault(user_id, set()).add(websocket)
+        return connection
+
+    def subscribe(self, websocket: Any, topics: Iterable[str]):
+        """Limit a connection to the given topics (adds to any existing subscription)"""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return
+        if connection.topics is None:
+            connection.topics = set()
+            self.wildcard_connections.discard(websocket)
+        for topic in topics:
+            connection.topics.add(topic)
+            self.topic_connections.setdefault(topic, set()).add(websocket)
+
+    def unsubscribe(self, websocket: Any, topics: Iterable[str]):
+        """Drop topics from a connection's subscription"""
+        connection = self.connections.get(websocket)
+        if connection is None or connection.topics is None:
+            return
+        for topic in topics:
+            connection.topics.discard(topic)
+            self._discard_topic(topic, websocket)
+
+    def _discard_topic(self, topic: str, websocket: Any):
+        sockets = self.topic_connections.get(topic)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.topic_connections[topic]
+
+    def disconnect(self, websocket: Any, user_id: int = None):
+        """Remove a WebSocket connection and stop its writer"""
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        self.wildcard_connections.discard(websocket)
+        for topic in connection.topics or ():
+            self._discard_topic(topic, websocket)
+        user_id = user_id or connection.user_id
+        if user_id and user_id in self.user_connections:
+            sockets = self.user_connections[user_id]
+            sockets.discard(websocket)
+            if not sockets:
+                del self.user_connections[user_id]
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.connections)}")
+
+    async def _writer(self, connection: Connection):
+        """Drain one connection's queue; any send failure or timeout drops the client"""
+        websocket = connection.websocket
+        try:
+            while True:
+                message = await connection.queue.get()
+                # asyncio.timeout (3.11+) arms a timer instead of wrapping each send in a new task
+                async with asyncio.timeout(self.send_timeout):
+                    await websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Dropping WebSocket after failed send: {e}")
+            self.disconnect(websocket)
+
+    def _enqueue(self, connection: Connection, message: str) -> bool:
+        try:
+            connection.queue.put_nowait(message)
+            connection.dropped = 0
+            return True
+        except asyncio.QueueFull:
+            connection.dropped += 1
+            self.messages_dropped += 1
+            if connection.dropped >= self.max_dropped:
+                self._drop_slow_consumer(connection)
+            return False
+
+    def _drop_slow_consumer(self, connection: Connection):
+        self.slow_disconnects += 1
+        logger.warning(f"Disconnecting slow WebSocket consumer (user {connection.user_id})")
+        self.disconnect(connection.websocket)
+        asyncio.create_task(self._close(connection.websocket))
+
+    async def _close(self, websocket: Any):
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    async def send_personal_message(self, message: Any, websocket: Any):
+        """Send message to specific WebSocket (ordered with its broadcasts)"""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            try:
+                await websocket.send_text(serialize_message(message))
+            except Exception as e:
+                logger.error(f"Error sending personal message: {e}")
+            return
+        self._enqueue(connection, serialize_message(message))
+
+    async def send_to_user(self, message: Any, user_id: int):
+        """Send message to every connection of a specific user"""
+        sockets = self.user_connections.get(user_id)
+        if not sockets:
+            return
+        payload = serialize_message(message)
+        for websocket in list(sockets):
+            connection = self.connections.get(websocket)
+            if connection:
+                self._enqueue(connection, payload)
+
+    async def broadcast(self, message: Any, topic: Optional[str] = None) -> int:
+        """
+        Broadcast message to all connections, or to a topic's subscribers plus
+        unsubscribed connections; returns how many accepted it
+        """
+        payload = serialize_message(message)
+        if topic is None:
+            targets = list(self.connections.values())
+        else:
+            sockets = self.wildcard_connections | self.topic_connections.get(topic, set())
+            targets = [self.connections[websocket] for websocket in sockets if websocket in self.connections]
+        delivered = 0
+        for connection in targets:
+            if self._enqueue(connection, payload):
+                delivered += 1
+        return delivered
+
+    async def close(self):
+        """Stop every writer (application shutdown)"""
+        for websocket in list(self.connections):
+            self.disconnect(websocket)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.connections),
+            "users": len(self.user_connections),
+            "topics": {topic: len(sockets) for topic, sockets in self.topic_connections.items()},
+            "queued": sum(connection.queue.qsize() for connection in self.connections.values()),
+            "messages_dropped": self.messages_dropped,
+            "slow_disconnects": self.slow_disconnects,
+        }
@@ -0,0 +1,108 @@
+"""
+In-process caching utilities
+Bounded TTL + LRU cache shared by services that front slow upstreams
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def make_cache_key(namespace: str, params: Optional[Dict[str, Any]] = None) -> Tuple:
+    """
+    Build a cache key from a namespace and query parameters
+
+    Parameters are normalized so that equivalent queries share one entry:
+    empty values are dropped, strings are stripped and case-folded, and
+    the remaining items are sorted by name.
+    """
+    normalized = []
+    for name, value in (params or {}).items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+        normalized.append((name, value))
+    return (namespace, tuple(sorted(normalized)))
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a TTL
+
+    Entries past their TTL can still be served for ``stale_ttl`` seconds via
+    ``get_entry`` so callers can implement stale-while-revalidate.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, bool]]:
+        """
+        Look up an entry, including stale ones
+
+        Returns:
+            (value, is_stale) if the entry is fresh or within the stale window,
+            None otherwise
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if now >= expires_at + self.stale_ttl:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value, now >= expires_at
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh value or ``default``"""
+        entry = self.get_entry(key)
+        if entry is None or entry[1]:
+            return default
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -42,6 +42,7 @@ class Settings(BaseSettings):
     
     # Redis Configuration
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REALTIME_BACKPLANE: str = os.getenv("REALTIME_BACKPLANE", "memory")  # "redis" across workers
     
     # AI Services Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
@@ -50,6 +51,9 @@ class Settings(BaseSettings):
     # File Upload Configuration
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_FILE_TYPES: List[str] = ["image/jpeg", "image/png", "image/gif", "audio/mpeg", "audio/wav"]
+    AI_IMAGE_MAX_BYTES: int = int(os.getenv("AI_IMAGE_MAX_BYTES", str(25 * 1024 * 1024)))
+    AI_AUDIO_MAX_BYTES: int = int(os.getenv("AI_AUDIO_MAX_BYTES", str(200 * 1024 * 1024)))
+    AI_BATCH_MAX_FILES: int = int(os.getenv("AI_BATCH_MAX_FILES", "20"))
     
     # Email Configuration
     SMTP_TLS: bool = True
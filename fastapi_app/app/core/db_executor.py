@@ -0,0 +1,128 @@
+"""
+Database executor
+Runs Django ORM work on a sized pool of worker threads instead of the single
+thread_sensitive sync_to_async lane
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+WAIT_SAMPLE_SIZE = 1000  # recent queue waits kept for percentiles
+
+
+def _percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class DBExecutor:
+    """
+    Thread pool dedicated to blocking database calls
+
+    Django connections are thread-local, so each worker thread keeps its own
+    connection. With CONN_MAX_AGE set, that connection stays open across
+    jobs. ``deelflow.db_pool`` checks it out and releases it around every job,
+    just as Django does around a request, dropping broken connections and ones
+    past their age.
+    """
+
+    def __init__(self, max_workers: int = DB_POOL_SIZE):
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+        return self._pool
+
+    def _job(self, enqueued: float, fn: Callable, args, kwargs):
+        from deelflow import db_pool
+
+        began = time.perf_counter()
+        wait = began - enqueued
+        with self._lock:
+            self.started += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._waits.append(wait)
+        db_pool.checkout()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            db_pool.release()
+            with self._lock:
+                self.completed += 1
+                self.total_run += time.perf_counter() - began
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on a DB worker thread and await its result"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.submitted += 1
+        return await loop.run_in_executor(
+            self._get_pool(), self._job, time.perf_counter(), fn, args, kwargs
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight jobs and queue-wait statistics"""
+        with self._lock:
+            waits = list(self._waits)
+            return {
+                "pool_size": self.max_workers,
+                "queue_depth": self.submitted - self.started,
+                "in_flight": self.started - self.completed,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.total_wait / self.started * 1000, 3) if self.started else 0.0,
+                "p95_wait_ms": round(_percentile(waits, 95) * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "avg_run_ms": round(self.total_run / self.completed * 1000, 3) if self.completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+
+
+db_executor = DBExecutor()
+
+
+async def run_db(fn: Callable, *args, **kwargs) -> Any:
+    """Await a blocking ORM call on the shared DB executor"""
+    return await db_executor.run(fn, *args, **kwargs)
+
+
+def db_async(fn: Callable) -> Callable:
+    """Wrap a sync ORM function as a coroutine function running on the DB executor"""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await db_executor.run(fn, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,67 @@
+"""
+Pagination utilities
+Opaque keyset cursors for list endpoints ordered by (created_at, id)
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the keyset position of the last returned row
+
+    Args:
+        created_at: created_at of the last row on the page
+        row_id: primary key of the last row on the page
+
+    Returns:
+        URL-safe opaque cursor string
+    """
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Opaque cursor string from a previous response
+
+    Returns:
+        (created_at, id) tuple of the last row already returned
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_after(queryset: Any, cursor: Optional[str]) -> Any:
+    """
+    Restrict a queryset ordered by (-created_at, -id) to rows after the cursor
+
+    The filter is a row comparison on indexed columns, so page N costs the
+    same as page 1 instead of scanning and discarding an OFFSET.
+    """
+    from django.db.models import Q
+
+    if not cursor:
+        return queryset
+    created_at, row_id = decode_cursor(cursor)
+    return queryset.filter(
+        Q(created_at__lt=created_at) |
+        Q(created_at=created_at, id__lt=row_id)
+    )
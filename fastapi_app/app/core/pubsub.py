@@ -0,0 +1,137 @@
+"""
+Real-time pub/sub backplane
+Carries WebSocket events between uvicorn workers (Redis) or within one process (in-memory)
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Shared with deelflow/realtime.py, which publishes model-change events from Django
+CHANNEL_PREFIX = "deelflow:realtime:"
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+# handler(topic, message, user_id) delivers one event to this worker's sockets
+Handler = Callable[[str, str, Optional[int]], Awaitable[None]]
+
+
+def encode_envelope(topic: str, message: str, user_id: Optional[int] = None) -> str:
+    """Wrap an already-serialized client message for transport"""
+    return json.dumps({"topic": topic, "user_id": user_id, "message": message})
+
+
+def decode_envelope(raw: Any) -> Dict[str, Any]:
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    return json.loads(raw)
+
+
+class InMemoryBackplane:
+    """
+    Single-process backplane (tests, local development, one worker)
+
+    ``publish_threadsafe`` lets sync code on other threads, such as Django
+    signal handlers running on DB executor threads, hand events to the event loop.
+    """
+
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        self._handler = None
+
+    async def publish(self, topic: str, message: str, user_id: Optional[int] = None):
+        await self.publish_raw(encode_envelope(topic, message, user_id))
+
+    async def publish_raw(self, envelope: str):
+        if self._handler is None:
+            return
+        event = decode_envelope(envelope)
+        await self._handler(event["topic"], event["message"], event.get("user_id"))
+
+    def publish_threadsafe(self, envelope: str):
+        """Schedule an encoded envelope from any thread"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.publish_raw(envelope), self._loop)
+
+
+class RedisBackplane:
+    """
+    Redis pub/sub backplane: every worker receives every event and delivers
+    it to the sockets it holds
+    """
+
+    def __init__(self, url: str, prefix: str = CHANNEL_PREFIX):
+        self.url = url
+        self.prefix = prefix
+        self._redis = None
+        self._reader: Optional[asyncio.Task] = None
+        self._handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler):
+        import redis.asyncio as aioredis
+
+        self._handler = handler
+        self._redis = aioredis.from_url(self.url)
+        self._reader = asyncio.create_task(self._read_loop())
+        logger.info(f"Realtime backplane listening on {self.prefix}*")
+
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def publish(self, topic: str, message: str, user_id: Optional[int] = None):
+        await self._redis.publish(self.prefix + topic, encode_envelope(topic, message, user_id))
+
+    async def _read_loop(self):
+        """Deliver incoming events; reconnect with backoff if Redis drops"""
+        delay = RECONNECT_DELAY
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(self.prefix + "*")
+                delay = RECONNECT_DELAY
+                async for item in pubsub.listen():
+                    if item.get("type") != "pmessage":
+                        continue
+                    try:
+                        event = decode_envelope(item["data"])
+                        await self._handler(event["topic"], event["message"], event.get("user_id"))
+                    except Exception as e:
+                        logger.error(f"Error delivering realtime event: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime backplane disconnected ({e}); retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def create_backplane(kind: str, redis_url: str):
+    """Build the configured backplane ("redis" or "memory")"""
+    if kind == "redis":
+        return RedisBackplane(redis_url)
+    return InMemoryBackplane()
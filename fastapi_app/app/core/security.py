@@ -3,13 +3,20 @@ Security utilities for authentication and authorization
 Handles JWT token generation and verification
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+import asyncio
+import hashlib
 import jwt
 import os
+import threading
+import time
 from jwt import PyJWTError
 import logging
 
+from app.core.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 # JWT Configuration
@@ -17,6 +24,71 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# Verified-token cache: entries never outlive the token's own "exp"
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 300  # seconds
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+# Password hashing pool: PBKDF2 takes ~100-400 ms of CPU per call. hashlib
+# releases the GIL while hashing, so threads hash in parallel without blocking
+# the event loop.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "256"))  # waiting + running jobs
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full; callers should ask the client to retry"""
+
+
+class PasswordHashPool:
+    """
+    Bounded executor for password hashing and verification
+    
+    At most ``max_workers`` hashes run at once. Once ``queue_limit`` jobs are
+    waiting or running, new ones are rejected instead of queueing without limit,
+    so a login flood cannot pile up work.
+    """
+    
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS, queue_limit: int = PASSWORD_HASH_QUEUE_LIMIT):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+            return self._pool
+    
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.queue_limit:
+                self.rejected += 1
+                raise PasswordHashingBusy("Too many concurrent password checks, please retry")
+            self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+    
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+password_hash_pool = PasswordHashPool()
+
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -85,15 +157,28 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Verify and decode a JWT token
     
+    Valid payloads are cached by token hash for up to TOKEN_CACHE_TTL seconds,
+    capped at the token's expiry, so repeat requests skip the signature check.
+    
     Args:
         token: JWT token string to verify
     
     Returns:
         Decoded token data if valid, None if invalid
     """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         logger.debug(f"Token decoded successfully. Payload keys: {list(payload.keys())}")
+        ttl = TOKEN_CACHE_TTL
+        if isinstance(payload.get("exp"), (int, float)):
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            _token_cache.set(cache_key, dict(payload), ttl=ttl)
         return payload
     except PyJWTError as e:
         logger.error(f"Token verification failed: {str(e)}")
@@ -103,6 +188,11 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def clear_token_cache() -> None:
+    """Forget every cached token verification (e.g. after rotating SECRET_KEY)"""
+    _token_cache.clear()
+
+
 def get_user_id_from_token(token: str) -> Optional[int]:
     """
     Extract user ID from JWT token
@@ -148,6 +238,30 @@ def check_password(password: str, hashed: str) -> bool:
     return django_check_password(password, hashed)
 
 
+def verify_and_upgrade_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if its hash uses outdated hasher settings, rehash it
+    
+    Returns:
+        (matches, new_hash). new_hash is set only when the password matched and
+        the stored hash should be replaced
+    """
+    from django.contrib.auth.hashers import check_password as django_check_password, make_password
+    upgraded = []
+    matches = django_check_password(password, hashed, setter=lambda raw: upgraded.append(make_password(raw)))
+    return matches, (upgraded[0] if upgraded else None)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the password hashing pool"""
+    return await password_hash_pool.run(hash_password, password)
+
+
+async def check_password_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_upgrade_password on the password hashing pool"""
+    return await password_hash_pool.run(verify_and_upgrade_password, password, hashed)
+
+
 def extract_token_from_header(authorization: str) -> Optional[str]:
     """
     Extract JWT token from Authorization header
@@ -0,0 +1,194 @@
+"""
+Streaming helpers
+Chunked file responses with single-range support, and upload spooling
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside the file"""
+
+
+class UploadTooLarge(Exception):
+    """An upload exceeded its size limit while streaming"""
+
+    def __init__(self, filename: Optional[str], max_bytes: int):
+        super().__init__(f"{filename or 'upload'} exceeds {max_bytes} bytes")
+        self.filename = filename
+        self.max_bytes = max_bytes
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single ``Range: bytes=start-end`` header into inclusive offsets
+
+    Returns None when the header is absent or unsupported (multiple ranges), in
+    which case the whole file should be sent.
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:  # suffix range: last N bytes
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def iter_file(path: str, start: int = 0, end: Optional[int] = None, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield ``path`` from ``start`` to ``end`` (inclusive) in chunks"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(path: str, range_header: Optional[str] = None, media_type: str = "application/octet-stream",
+                  filename: Optional[str] = None):
+    """
+    StreamingResponse for a local file that honours a single byte range
+
+    Starlette's FileResponse (0.27) ignores Range, so partial content is built here.
+    """
+    from fastapi.responses import Response, StreamingResponse
+
+    size = os.path.getsize(path)
+    headers = {"Accept-Ranges": "bytes"}
+    if filename:
+        headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_file(path), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_file(path, start, end), status_code=206, media_type=media_type, headers=headers)
+
+
+async def spool_upload(upload, directory: Optional[str] = None, suffix: str = "",
+                       chunk_size: int = STREAM_CHUNK_SIZE) -> Tuple[str, int, str]:
+    """
+    Copy an UploadFile to a temporary file on disk chunk by chunk
+
+    Returns:
+        (path, size in bytes, sha256 hex digest). The caller deletes the file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                out.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, size, digest.hexdigest()
+
+
+class SpooledUpload:
+    """
+    An upload spooled into a SpooledTemporaryFile, with its size and sha256
+
+    ``view()`` exposes the content without copying it: a memoryview of the
+    in-memory buffer for small uploads, or of an mmap of the temp file once it
+    has rolled over to disk. Use as a context manager; closing releases the
+    view and deletes the temp file.
+    """
+
+    def __init__(self, file, size: int, sha256: str, filename: Optional[str], content_type: Optional[str]):
+        self.file = file
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self.content_type = content_type
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+
+    def view(self) -> memoryview:
+        if self._view is None:
+            buffer = self.file._file  # BytesIO before rollover, the temp file after
+            if self.size == 0:
+                self._view = memoryview(b"")
+            elif hasattr(buffer, "getbuffer"):
+                self._view = buffer.getbuffer()
+            else:
+                buffer.flush()
+                self._mmap = mmap.mmap(buffer.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+        return self._view
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self.file.close()
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+async def receive_upload(upload, max_bytes: int, chunk_size: int = STREAM_CHUNK_SIZE) -> SpooledUpload:
+    """
+    Size and hash an UploadFile in place
+
+    Starlette has already spooled the multipart file into ``upload.file`` (a
+    SpooledTemporaryFile) before the handler runs, so it is read once for the
+    digest and viewed where it is, never copied.
+
+    Raises:
+        UploadTooLarge: when the upload is larger than ``max_bytes``
+    """
+    size = upload.file.seek(0, os.SEEK_END)  # a seek, no I/O
+    if size > max_bytes:
+        raise UploadTooLarge(upload.filename, max_bytes)
+    await upload.seek(0)
+    digest = hashlib.sha256()
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    await upload.seek(0)
+    return SpooledUpload(upload.file, size, digest.hexdigest(), upload.filename, upload.content_type)
@@ -4,9 +4,10 @@ Provides property data from ATTOM API
 Official API Documentation: https://api.developer.attomdata.com/docs
 """
 
-import requests
+import asyncio
+import httpx
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -15,8 +16,27 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent.parent / ".env"
 load_dotenv(env_path)
 
+from app.core.cache import TTLCache, make_cache_key
+
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive pool for all ATTOM calls made by this worker
+ATTOM_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+ATTOM_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Maximum in-flight requests per ATTOM endpoint
+ATTOM_CONCURRENCY = {
+    "snapshot": 8,
+    "detail": 8,
+    "salestrend": 4,
+}
+
+# Response cache TTLs (seconds)
+SEARCH_CACHE_TTL = 300
+DETAIL_CACHE_TTL = 3600
+TRENDS_CACHE_TTL = 6 * 3600
+TRENDS_STALE_TTL = 24 * 3600
+
 class AttomService:
     """Service for interacting with ATTOM Data Solutions API"""
     
@@ -31,8 +51,81 @@ class AttomService:
             "Accept": "application/json",
             "APIKey": self.api_key
         }
+        
+        # Async client is created lazily on the running event loop
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[Tuple, "asyncio.Future"] = {}
+        self._revalidating: set = set()
+        
+        self._search_cache = TTLCache(maxsize=512, ttl=SEARCH_CACHE_TTL)
+        self._detail_cache = TTLCache(maxsize=1024, ttl=DETAIL_CACHE_TTL)
+        self._trends_cache = TTLCache(maxsize=256, ttl=TRENDS_CACHE_TTL, stale_ttl=TRENDS_STALE_TTL)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared pooled client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=ATTOM_POOL_LIMITS,
+                timeout=ATTOM_TIMEOUT,
+            )
+        return self._client
+    
+    def _get_semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        if endpoint not in self._semaphores:
+            self._semaphores[endpoint] = asyncio.Semaphore(ATTOM_CONCURRENCY.get(endpoint, 4))
+        return self._semaphores[endpoint]
+    
+    async def aclose(self) -> None:
+        """Close the pooled client (called on application shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _get_json(self, endpoint: str, path: str, params: Dict[str, Any]) -> httpx.Response:
+        """Issue a GET under the endpoint's concurrency limit"""
+        async with self._get_semaphore(endpoint):
+            logger.info(f"ATTOM API Request: {self.base_url}{path}")
+            logger.info(f"ATTOM API Params: {params}")
+            response = await self._get_client().get(path, params=params)
+            logger.info(f"ATTOM API Response Status: {response.status_code}")
+            return response
+    
+    async def _single_flight(self, key: Tuple, fetch) -> Dict[str, Any]:
+        """
+        Run ``fetch`` once per key even if several callers ask concurrently
+
+        Identical searches fired by fast typing share one upstream request.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters per endpoint"""
+        return {
+            "search": self._search_cache.stats(),
+            "detail": self._detail_cache.stats(),
+            "market_trends": self._trends_cache.stats(),
+        }
     
-    def search_properties(
+    async def search_properties(
         self, 
         address: Optional[str] = None,
         city: Optional[str] = None,
@@ -129,29 +222,35 @@ class AttomService:
             # Remove empty values
             params = {k: v for k, v in params.items() if v is not None and v != ""}
             
-            # Make API request to property snapshot endpoint
-            url = f"{self.base_url}/propertyapi/v1.0.0/property/snapshot"
-            logger.info(f"ATTOM API Request: {url}")
-            logger.info(f"ATTOM API Params: {params}")
+            # Serve repeated searches from cache
+            cache_key = make_cache_key("snapshot", params)
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                return cached
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            logger.info(f"ATTOM API Response Status: {response.status_code}")
+            async def fetch() -> Dict[str, Any]:
+                # Make API request to property snapshot endpoint
+                response = await self._get_json("snapshot", "/propertyapi/v1.0.0/property/snapshot", params)
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    logger.debug(f"ATTOM API Response: {data}")
+                    result = {
+                        "status": "success",
+                        "data": self._normalize_property_data(data)
+                    }
+                    self._search_cache.set(cache_key, result)
+                    return result
+                else:
+                    logger.error(f"ATTOM API error: {response.status_code} - {response.text}")
+                    return {
+                        "status": "error",
+                        "message": f"ATTOM API error: {response.status_code} - {response.text}"
+                    }
             
-            if response.status_code == 200:
-                data = response.json()
-                logger.info(f"ATTOM API Response: {data}")
-                return {
-                    "status": "success",
-                    "data": self._normalize_property_data(data)
-                }
-            else:
-                logger.error(f"ATTOM API error: {response.status_code} - {response.text}")
-                return {
-                    "status": "error",
-                    "message": f"ATTOM API error: {response.status_code} - {response.text}"
-                }
+            return await self._single_flight(cache_key, fetch)
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"ATTOM API request failed: {str(e)}")
             return {
                 "status": "error",
@@ -164,7 +263,7 @@ class AttomService:
                 "message": f"Unexpected error: {str(e)}"
             }
     
-    def get_property_details(self, property_id: str, address: Optional[str] = None) -> Dict[str, Any]:
+    async def get_property_details(self, property_id: str, address: Optional[str] = None) -> Dict[str, Any]:
         """
         Get detailed property information by ATTOM ID or address
         Official endpoint: /propertyapi/v1.0.0/property/detail
@@ -184,7 +283,6 @@ class AttomService:
                 }
             
             # Use detail endpoint
-            url = f"{self.base_url}/propertyapi/v1.0.0/property/detail"
             params = {}
             
             if property_id:
@@ -197,26 +295,32 @@ class AttomService:
                     "message": "Either property_id or address must be provided"
                 }
             
-            logger.info(f"ATTOM API Request: {url}")
-            logger.info(f"ATTOM API Params: {params}")
+            cache_key = make_cache_key("detail", params)
+            cached = self._detail_cache.get(cache_key)
+            if cached is not None:
+                return cached
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            logger.info(f"ATTOM API Response Status: {response.status_code}")
+            async def fetch() -> Dict[str, Any]:
+                response = await self._get_json("detail", "/propertyapi/v1.0.0/property/detail", params)
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    result = {
+                        "status": "success",
+                        "data": self._normalize_property_data(data)
+                    }
+                    self._detail_cache.set(cache_key, result)
+                    return result
+                else:
+                    logger.error(f"ATTOM API error: {response.status_code} - {response.text}")
+                    return {
+                        "status": "error",
+                        "message": f"ATTOM API error: {response.status_code}"
+                    }
             
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "status": "success",
-                    "data": self._normalize_property_data(data)
-                }
-            else:
-                logger.error(f"ATTOM API error: {response.status_code} - {response.text}")
-                return {
-                    "status": "error",
-                    "message": f"ATTOM API error: {response.status_code}"
-                }
+            return await self._single_flight(cache_key, fetch)
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"ATTOM API request failed: {str(e)}")
             return {
                 "status": "error",
@@ -329,7 +433,7 @@ class AttomService:
         
         return properties
     
-    def get_market_trends(self, city: str, state: str, zipcode: Optional[str] = None) -> Dict[str, Any]:
+    async def get_market_trends(self, city: str, state: str, zipcode: Optional[str] = None) -> Dict[str, Any]:
         """
         Get market trends for a specific location
         Official endpoint: /v4/salestrend
@@ -350,7 +454,6 @@ class AttomService:
                 }
             
             # Use sales trend endpoint
-            url = f"{self.base_url}/v4/salestrend"
             params = {}
             
             if zipcode:
@@ -360,24 +463,17 @@ class AttomService:
                 params["city"] = city
                 params["state"] = state
             
-            logger.info(f"ATTOM API Request: {url}")
-            logger.info(f"ATTOM API Params: {params}")
+            cache_key = make_cache_key("salestrend", params)
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            logger.info(f"ATTOM API Response Status: {response.status_code}")
+            # Trends move slowly: serve stale data immediately and refresh in the background
+            entry = self._trends_cache.get_entry(cache_key)
+            if entry is not None:
+                value, is_stale = entry
+                if is_stale:
+                    self._schedule_trends_revalidation(cache_key, params)
+                return value
             
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "status": "success",
-                    "data": data
-                }
-            else:
-                logger.error(f"ATTOM API error: {response.status_code} - {response.text}")
-                return {
-                    "status": "error",
-                    "message": f"Failed to fetch market trends: {response.status_code}"
-                }
+            return await self._single_flight(cache_key, lambda: self._fetch_market_trends(cache_key, params))
                 
         except Exception as e:
             logger.error(f"Market trends request failed: {str(e)}")
@@ -386,5 +482,39 @@ class AttomService:
                 "message": f"Market trends request failed: {str(e)}"
             }
 
+    async def _fetch_market_trends(self, cache_key: Tuple, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch sales trends from ATTOM and refresh the cache on success"""
+        response = await self._get_json("salestrend", "/v4/salestrend", params)
+        
+        if response.status_code == 200:
+            result = {
+                "status": "success",
+                "data": response.json()
+            }
+            self._trends_cache.set(cache_key, result)
+            return result
+        else:
+            logger.error(f"ATTOM API error: {response.status_code} - {response.text}")
+            return {
+                "status": "error",
+                "message": f"Failed to fetch market trends: {response.status_code}"
+            }
+    
+    def _schedule_trends_revalidation(self, cache_key: Tuple, params: Dict[str, Any]) -> None:
+        """Refresh a stale market trends entry without blocking the caller"""
+        if cache_key in self._revalidating:
+            return
+        self._revalidating.add(cache_key)
+        
+        async def revalidate():
+            try:
+                await self._single_flight(cache_key, lambda: self._fetch_market_trends(cache_key, params))
+            except Exception as e:
+                logger.error(f"Market trends revalidation failed: {str(e)}")
+            finally:
+                self._revalidating.discard(cache_key)
+        
+        asyncio.get_running_loop().create_task(revalidate())
+
 # Create singleton instance
 attom_service = AttomService()
@@ -0,0 +1,313 @@
+"""
+Combined property search
+Merges internal properties with ATTOM search results for /api/properties/combined
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.db_executor import run_db
+from deelflow.address import address_key
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for both sources; a source that misses it is left out of the response
+COMBINED_FETCH_DEADLINE = float(os.getenv("COMBINED_FETCH_DEADLINE", "8"))
+INTERNAL_CANDIDATE_LIMIT = 1000  # internal rows considered before merging
+ATTOM_CANDIDATE_LIMIT = 50
+
+# Only these columns are read for every candidate; full rows are loaded for the page
+INTERNAL_KEY_FIELDS = ("id", "address", "unit_apt", "city", "state", "zipcode", "address_key")
+
+
+def attom_items(result: Any) -> List[Dict[str, Any]]:
+    """Property dicts from a search_properties result (empty unless it succeeded)"""
+    if not isinstance(result, dict) or result.get("status") != "success":
+        return []
+    data = result.get("data")
+    if isinstance(data, list):
+        items = data
+    elif isinstance(data, dict):
+        # common: { properties: [...] }
+        items = next((data[key] for key in ("properties", "results", "items") if isinstance(data.get(key), list)), [])
+    else:
+        items = []
+    return [item for item in items if isinstance(item, dict)]
+
+
+def internal_raw(p: Any) -> Dict[str, Any]:
+    return {
+        "id": p.id,
+        "address": getattr(p, "address", None),
+        "unit_apt": getattr(p, "unit_apt", None),
+        "city": getattr(p, "city", None),
+        "state": getattr(p, "state", None),
+        "zipcode": getattr(p, "zipcode", None),
+        "county": getattr(p, "county", None),
+        "property_type": getattr(p, "property_type", None),
+        "bedrooms": getattr(p, "bedrooms", None),
+        "bathrooms": getattr(p, "bathrooms", None),
+        "square_feet": getattr(p, "square_feet", None),
+        "lot_size": getattr(p, "lot_size", None),
+        "year_built": getattr(p, "year_built", None),
+        "price": getattr(p, "price", None),
+        "arv": getattr(p, "arv", None),
+        "repair_estimate": getattr(p, "repair_estimate", None),
+        "holding_costs": getattr(p, "holding_costs", None),
+        "transaction_type": getattr(p, "transaction_type", None),
+        "assignment_fee": getattr(p, "assignment_fee", None),
+        "description": getattr(p, "description", None),
+        "seller_notes": getattr(p, "seller_notes", None),
+        "status": getattr(p, "status", None),
+    }
+
+
+def normalize_internal(p: Any) -> Dict[str, Any]:
+    return {
+        "id": f"src:internal:{p.id}",
+        "source": "internal",
+        "source_id": str(p.id),
+        "attribution": "Internal",
+        "street_address": getattr(p, "address", "") or "",
+        "unit_apt": getattr(p, "unit_apt", "") or "",
+        "city": getattr(p, "city", "") or "",
+        "state": getattr(p, "state", "") or "",
+        "zip_code": getattr(p, "zipcode", "") or "",
+        "county": getattr(p, "county", "") or "",
+        "property_type": getattr(p, "property_type", "") or "",
+        "bedrooms": p.bedrooms if getattr(p, "bedrooms", None) is not None else None,
+        "bathrooms": p.bathrooms if getattr(p, "bathrooms", None) is not None else None,
+        "square_feet": p.square_feet if getattr(p, "square_feet", None) is not None else None,
+        "lot_size": p.lot_size if getattr(p, "lot_size", None) is not None else None,
+        "year_built": p.year_built if getattr(p, "year_built", None) is not None else None,
+        "purchase_price": p.price if getattr(p, "price", None) is not None else None,
+        "arv": p.arv if getattr(p, "arv", None) is not None else None,
+        "repair_estimate": p.repair_estimate if getattr(p, "repair_estimate", None) is not None else None,
+        "holding_costs": p.holding_costs if getattr(p, "holding_costs", None) is not None else None,
+        "transaction_type": getattr(p, "transaction_type", None),
+        "assignment_fee": p.assignment_fee if getattr(p, "assignment_fee", None) is not None else None,
+        "description": getattr(p, "description", "") or "",
+        "seller_notes": getattr(p, "seller_notes", "") or "",
+        "images": [],
+        "status": getattr(p, "status", "available") or "available",
+        "created_at": getattr(p, "created_at", datetime.now(timezone.utc)).isoformat(),
+        "updated_at": getattr(p, "updated_at", datetime.now(timezone.utc)).isoformat(),
+    }
+
+
+def normalize_attom(item: Dict[str, Any]) -> Dict[str, Any]:
+    # Expect our attom_service to already return normalized basic fields; still guard with .get
+    now_iso = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": f"src:attom:{item.get('id')}",
+        "source": "attom",
+        "source_id": str(item.get("id")),
+        "attribution": "ATTOM Data Solutions",
+        "street_address": item.get("street_address") or "",
+        "unit_apt": item.get("unit_apt") or "",
+        "city": item.get("city") or "",
+        "state": item.get("state") or "",
+        "zip_code": item.get("zip_code") or "",
+        "county": item.get("county") or "",
+        "property_type": item.get("property_type") or "",
+        "bedrooms": item.get("bedrooms", None),
+        "bathrooms": item.get("bathrooms", None),
+        "square_feet": item.get("square_feet", None),
+        "lot_size": item.get("lot_size", None),
+        "year_built": item.get("year_built", None) or None,
+        # Internal-only finance fields default to None for ATTOM rows
+        "purchase_price": None,
+        "arv": None,
+        "repair_estimate": None,
+        "holding_costs": None,
+        "transaction_type": None,
+        "assignment_fee": None,
+        "description": item.get("property_description", "") or "",
+        "seller_notes": item.get("seller_notes", "") or "",
+        "images": item.get("images", []) or [],
+        "status": item.get("status", "available") or "available",
+        "created_at": item.get("created_at") or now_iso,
+        "updated_at": item.get("updated_at") or now_iso,
+    }
+
+
+class Candidate:
+    """One merge entry: the sort key plus a reference to its source row"""
+
+    __slots__ = ("source", "ref", "city", "street", "attom_duplicate", "internal_duplicate")
+
+    def __init__(self, source: str, ref: Any, city: str, street: str):
+        self.source = source
+        self.ref = ref  # internal id or the ATTOM item
+        self.city = city
+        self.street = street
+        self.attom_duplicate: Optional[Dict[str, Any]] = None
+        self.internal_duplicate: Optional[int] = None
+
+    def sort_key(self) -> Tuple:
+        # Stable: internal first, then ATTOM; then by city/street
+        return (0 if self.source == "internal" else 1, self.city, self.street)
+
+
+class CombinedPropertyService:
+    """
+    Merge engine for the combined property list
+
+    Both sources are fetched concurrently under COMBINED_FETCH_DEADLINE. Dedup
+    and ordering run on light candidates (id, address fields and the persisted
+    address_key), so internal rows are read as a handful of columns. Full internal rows are loaded, and normalized
+    dicts and raw payloads built, only for the requested page.
+    """
+
+    def __init__(self, deadline: float = COMBINED_FETCH_DEADLINE):
+        self.deadline = deadline
+
+    @staticmethod
+    def _internal_queryset(search, property_type, min_price, max_price):
+        from django.db.models import Q
+        from deelflow.models import Property
+
+        qs = Property.objects.all()
+        if search:
+            qs = qs.filter(
+                Q(address__icontains=search) |
+                Q(city__icontains=search) |
+                Q(state__icontains=search)
+            )
+        if property_type:
+            qs = qs.filter(property_type__iexact=property_type)
+        if min_price is not None:
+            qs = qs.filter(price__gte=min_price)
+        if max_price is not None:
+            qs = qs.filter(price__lte=max_price)
+        return qs.order_by("id")
+
+    async def _fetch(self, internal_coro, attom_coro) -> Tuple[Any, Any, Dict[str, str]]:
+        """Run both fetches concurrently; returns (internal, attom, per-source status)"""
+        tasks = {
+            "internal": asyncio.ensure_future(internal_coro),
+            "attom": asyncio.ensure_future(attom_coro),
+        }
+        await asyncio.wait(tasks.values(), timeout=self.deadline)
+        results, sources = {}, {}
+        for name, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                results[name], sources[name] = None, "timeout"
+                logger.warning(f"Combined properties: {name} source missed the {self.deadline}s deadline")
+            elif task.exception() is not None:
+                results[name], sources[name] = None, "error"
+                logger.error(f"Combined properties: {name} source failed: {task.exception()}")
+            else:
+                results[name], sources[name] = task.result(), "ok"
+        attom = results["attom"]
+        if sources["attom"] == "ok" and not (isinstance(attom, dict) and attom.get("status") == "success"):
+            # e.g. no zipcode or coordinates: internal results are still returned
+            sources["attom"] = "error"
+        return results["internal"], results["attom"], sources
+
+    @staticmethod
+    def _merge(internal_keys: List[Tuple], attom_list: List[Dict[str, Any]]) -> List[Candidate]:
+        """Dedup by canonical address (internal preferred) and sort"""
+        seen: Dict[str, Candidate] = {}
+        merged: List[Candidate] = []
+        for property_id, street, unit, city, state, zip_code, key in internal_keys:
+            # Rows saved before backfill_address_keys ran have no key yet
+            key = key or address_key(street, unit, city, state, zip_code)
+            if key in seen:
+                seen[key].internal_duplicate = property_id
+                continue
+            candidate = Candidate("internal", property_id, city or "", street or "")
+            if key:
+                seen[key] = candidate
+            merged.append(candidate)
+        for item in attom_list:
+            key = address_key(
+                item.get("street_address"), item.get("unit_apt"), item.get("city"), item.get("state"), item.get("zip_code")
+            )
+            if key in seen:
+                # merge raw data into the row already kept
+                existing = seen[key]
+                if existing.source == "internal":
+                    existing.attom_duplicate = item
+                continue
+            candidate = Candidate("attom", item, item.get("city") or "", item.get("street_address") or "")
+            if key:
+                seen[key] = candidate
+            merged.append(candidate)
+        merged.sort(key=Candidate.sort_key)
+        return merged
+
+    async def _materialize(self, page: List[Candidate], include_raw: bool) -> List[Dict[str, Any]]:
+        """Full normalized rows (and raw payloads) for one page"""
+        from deelflow.models import Property
+
+        ids = {c.ref for c in page if c.source == "internal"}
+        if include_raw:
+            ids.update(c.internal_duplicate for c in page if c.internal_duplicate is not None)
+        rows = await run_db(Property.objects.in_bulk, list(ids)) if ids else {}
+
+        items = []
+        for c in page:
+            if c.source == "internal":
+                p = rows.get(c.ref)
+                if p is None:  # deleted since the key scan
+                    continue
+                row = normalize_internal(p)
+                if include_raw:
+                    row["raw"] = {"internal": internal_raw(p)}
+                    if c.attom_duplicate is not None:
+                        row["raw"]["attom"] = c.attom_duplicate
+                    if c.internal_duplicate in rows:
+                        row["raw"]["internal_duplicate"] = internal_raw(rows[c.internal_duplicate])
+            else:
+                row = normalize_attom(c.ref)
+                if include_raw:
+                    row["raw"] = {"attom": c.ref}
+            items.append(row)
+        return items
+
+    async def search(self, page: int = 1, limit: int = 20, search: Optional[str] = None,
+                     property_type: Optional[str] = None, min_price: Optional[float] = None,
+                     max_price: Optional[float] = None, zipcode: Optional[str] = None,
+                     city: Optional[str] = None, state: Optional[str] = None,
+                     latitude: Optional[float] = None, longitude: Optional[float] = None,
+                     radius: Optional[int] = None, include_raw: bool = True) -> Dict[str, Any]:
+        from app.services.attom_service import attom_service
+
+        qs = self._internal_queryset(search, property_type, min_price, max_price)
+        internal_keys, attom_result, sources = await self._fetch(
+            run_db(lambda: list(qs.values_list(*INTERNAL_KEY_FIELDS)[:INTERNAL_CANDIDATE_LIMIT])),
+            # ATTOM is location-based; it needs zipcode or coordinates to avoid a 400
+            attom_service.search_properties(
+                address=None, city=city, state=state, zipcode=zipcode,
+                property_type=property_type, min_price=min_price, max_price=max_price,
+                min_sqft=None, max_sqft=None, bedrooms=None, bathrooms=None,
+                limit=ATTOM_CANDIDATE_LIMIT, latitude=latitude, longitude=longitude, radius=radius
+            ),
+        )
+
+        merged = self._merge(internal_keys or [], attom_items(attom_result))
+
+        # Pagination after merge
+        total = len(merged)
+        page = max(1, page)
+        limit = max(1, min(100, limit))
+        start = (page - 1) * limit
+        end = start + limit
+
+        return {
+            "properties": await self._materialize(merged[start:end], include_raw),
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "has_next": end < total,
+            "has_prev": start > 0,
+            "sources": sources,
+        }
+
+
+combined_property_service = CombinedPropertyService()
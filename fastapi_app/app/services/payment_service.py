@@ -5,6 +5,7 @@ Handles all payment-related operations for the SaaS platform
 
 import stripe
 import os
+import asyncio
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
 from datetime import datetime, timedelta
@@ -145,121 +146,22 @@ class PaymentService:
             }
     
     async def get_subscription_packages(self) -> Dict[str, Any]:
-        """Get available subscription packages"""
+        """Get available subscription packages from the cached Stripe catalog"""
         try:
-            # Find .env file - try multiple possible locations
-            possible_paths = [
-                Path(__file__).parent.parent.parent.parent / ".env",  # From payment_service.py: ../../../../.env
-                Path(__file__).parent.parent.parent.parent.parent / ".env",  # One level up (if in subdirectory)
-                Path.cwd() / ".env",  # Current working directory
-                Path.cwd().parent / ".env",  # Parent of current directory
-            ]
-            
-            env_path = None
-            for path in possible_paths:
-                absolute_path = path.resolve()
-                print(f"🔍 Checking for .env at: {absolute_path}")
-                if absolute_path.exists():
-                    env_path = absolute_path
-                    print(f"✅ Found .env file at: {absolute_path}")
-                    break
-            
-            if env_path and env_path.exists():
-                print(f"🔑 Loading .env from: {env_path}")
-                load_dotenv(env_path, override=True)
-            
-            # Get key directly from .env, not from os.environ (which might have defaults)
-            stripe_key = os.getenv("STRIPE_SECRET_KEY", "")
-            
-            # If key is still placeholder or empty, try reading .env directly
-            if (not stripe_key or stripe_key == 'sk_test_your_key_here' or 'test' in stripe_key.lower()) and env_path:
-                # Read .env file directly
-                try:
-                    if env_path.exists():
-                        with open(env_path, 'r') as f:
-                            for line in f:
-                                if line.startswith('STRIPE_SECRET_KEY='):
-                                    stripe_key = line.split('=', 1)[1].strip()
-                                    break
-                except Exception as e:
-                    print(f"⚠️  Error reading .env file in first attempt: {e}")
-                    pass
-            
-            # CRITICAL: Ensure we have a valid Stripe key before making API calls
-            if not stripe_key or not stripe_key.startswith('sk_live_'):
-                # Final fallback - read .env file directly line by line
-                print(f"⚠️  Key not found via env var, reading .env directly from: {env_path if env_path else 'NOT FOUND'}...")
-                if env_path and env_path.exists():
-                    try:
-                        with open(env_path, 'r', encoding='utf-8') as f:
-                            lines = f.readlines()
-                            print(f"📄 Reading .env file ({len(lines)} lines)...")
-                            for line_num, line in enumerate(lines, 1):
-                                line = line.strip()
-                                # Skip comments and empty lines
-                                if not line or line.startswith('#'):
-                                    continue
-                                if line.startswith('STRIPE_SECRET_KEY='):
-                                    raw_key = line.split('=', 1)[1].strip().strip('"').strip("'")
-                                    print(f"🔑 Found STRIPE_SECRET_KEY on line {line_num}: {raw_key[:30]}...")
-                                    if raw_key.startswith('sk_live_'):
-                                        stripe_key = raw_key
-                                        print(f"✅ Valid live key found in .env: {stripe_key[:30]}...")
-                                        break
-                                    else:
-                                        print(f"⚠️  Key on line {line_num} doesn't start with 'sk_live_': {raw_key[:7]}...")
-                    except Exception as e:
-                        print(f"❌ Error reading .env file: {e}")
-                        import traceback
-                        traceback.print_exc()
-                else:
-                    print(f"❌ .env file not found at any expected location!")
-            
-            # Set the key if we found a valid one
-            if stripe_key and stripe_key.startswith('sk_live_'):
-                stripe.api_key = stripe_key
-                self.stripe.api_key = stripe_key  # Also set on instance
-                print(f"🔑 Stripe API key SET: {stripe_key[:30]}...")
-                print(f"🔑 Key length: {len(stripe_key)} characters")
-                print(f"🔑 Key preview: {stripe_key[:50]}...{stripe_key[-10:]}")
-            else:
-                print(f"❌ CRITICAL: No valid Stripe key found!")
-                print(f"   Checked env_path: {env_path}")
-                print(f"   File exists: {env_path.exists() if env_path else 'N/A (path is None)'}")
-                print(f"   stripe_key value: {stripe_key[:50] if stripe_key else 'None'}...")
-                print(f"   Current stripe.api_key: {stripe.api_key[:30] if stripe.api_key else 'NOT SET'}...")
-                raise ValueError("Stripe API key not configured. Please set STRIPE_SECRET_KEY in .env file.")
-            
-            # Verify key is set before API call
-            if not stripe.api_key or not stripe.api_key.startswith('sk_live_'):
-                raise ValueError(f"Stripe API key not properly set. Current value: {stripe.api_key[:30] if stripe.api_key else 'None'}")
+            from deelflow.stripe_catalog import catalog
+
+            # Served from memory; only a missing or expired snapshot goes to Stripe
+            snapshot = catalog.peek()
+            if snapshot is None:
+                if not stripe.api_key or stripe.api_key == 'sk_test_your_key_here':
+                    raise ValueError("Stripe API key not configured. Please set STRIPE_SECRET_KEY in .env file.")
+                snapshot = await asyncio.to_thread(catalog.get)
 
-            # Get products and prices from Stripe
-            products = self.stripe.Product.list(active=True, limit=10)
-            prices = self.stripe.Price.list(active=True, limit=50)
-            
-            packages = []
-            for product in products.data:
-                product_prices = [p for p in prices.data if p.product == product.id]
-                if product_prices:
-                    # Get the first price (you might want to handle multiple prices differently)
-                    price = product_prices[0]
-                    packages.append({
-                        "id": product.id,
-                        "name": product.name,
-                        "description": product.description,
-                        "price_id": price.id,
-                        "amount": price.unit_amount / 100,  # Convert from cents
-                        "currency": price.currency,
-                        "interval": price.recurring.interval if price.recurring else None,
-                        "features": product.metadata.get('features', '').split(',') if product.metadata.get('features') else []
-                    })
-            
             return {
                 "status": "success",
                 "data": {
-                    "packages": packages,
-                    "total": len(packages)
+                    "packages": snapshot["packages"],
+                    "total": snapshot["total"]
                 }
             }
         except Exception as e:
@@ -342,28 +244,14 @@ class PaymentService:
             }
     
     async def get_revenue_metrics(self) -> Dict[str, Any]:
-        """Get revenue and billing metrics"""
+        """Get revenue and billing metrics from the local Stripe ledger"""
         try:
-            # Get total revenue from all successful payments
-            charges = self.stripe.Charge.list(limit=100)
-            total_revenue = sum(charge.amount for charge in charges.data if charge.status == 'succeeded')
-            
-            # Get monthly recurring revenue
-            subscriptions = self.stripe.Subscription.list(status='active', limit=100)
-            mrr = sum(sub.items.data[0].price.unit_amount for sub in subscriptions.data) / 100
-            
-            # Get customer count
-            customers = self.stripe.Customer.list(limit=100)
-            customer_count = len(customers.data)
+            from app.core.db_executor import run_db
+            from deelflow.stripe_ledger import revenue_metrics
             
             return {
                 "status": "success",
-                "data": {
-                    "total_revenue": total_revenue / 100,
-                    "monthly_recurring_revenue": mrr,
-                    "customer_count": customer_count,
-                    "currency": "usd"
-                }
+                "data": await run_db(revenue_metrics)
             }
         except Exception as e:
             logger.error(f"Error getting revenue metrics: {str(e)}")
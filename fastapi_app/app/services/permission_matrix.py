@@ -0,0 +1,155 @@
+"""
+Role/permission matrix service
+Builds the permission x role assignment table from a single through-table query
+and caches it in memory until roles or permissions change
+"""
+
+from typing import Any, Dict, FrozenSet, List, Optional
+from collections import defaultdict
+import threading
+import logging
+
+from app.core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Ordered: the first category whose keywords match the permission name wins
+PERMISSION_CATEGORIES = [
+    ("User Management", ['user', 'create_user', 'view_user', 'edit_user', 'delete_user']),
+    ("Billing", ['billing', 'payment', 'invoice']),
+    ("Content Management", ['content', 'create_content', 'edit_content', 'delete_content']),
+    ("Campaigns", ['campaign', 'create_campaign', 'edit_campaign']),
+    ("Properties", ['property', 'create_property', 'edit_property']),
+    ("Analytics & Reports", ['report', 'analytics', 'export']),
+    ("Role Management", ['role', 'permission']),
+    ("System Administration", ['system', 'tenant', 'backup', 'landing', 'theme', 'domain']),
+    ("Own Data", ['own', 'personal']),
+]
+
+# Other workers pick up changes within this window even without an explicit invalidation
+MATRIX_CACHE_TTL = 60
+
+_category_cache: Dict[str, str] = {}
+_matrix_cache = TTLCache(maxsize=1, ttl=MATRIX_CACHE_TTL)
+_load_lock = threading.Lock()
+
+
+def categorize_permission(name: str) -> str:
+    """Return the display category for a permission name (memoized)"""
+    category = _category_cache.get(name)
+    if category is None:
+        lowered = name.lower()
+        category = "Other"
+        for candidate, keywords in PERMISSION_CATEGORIES:
+            if any(keyword in lowered for keyword in keywords):
+                category = candidate
+                break
+        _category_cache[name] = category
+    return category
+
+
+class PermissionMatrix:
+    """
+    Immutable snapshot of permissions, roles and their assignments
+
+    Assignments are stored as one bitmask per permission, where bit ``i`` is
+    set when ``roles[i]`` holds the permission. ``role_permissions`` maps each
+    role name to the frozenset of its permission names for O(1) auth checks.
+    """
+
+    def __init__(self, permissions: List[Dict[str, Any]], roles: List[Dict[str, Any]], pairs: List[tuple]):
+        self.permissions = permissions
+        self.roles = roles
+        self.role_index = {role["id"]: idx for idx, role in enumerate(roles)}
+        self.role_bits: Dict[int, int] = defaultdict(int)
+        for permission_id, role_id in pairs:
+            idx = self.role_index.get(role_id)
+            if idx is not None:
+                self.role_bits[permission_id] |= 1 << idx
+        self.categories = {perm["id"]: categorize_permission(perm["name"]) for perm in permissions}
+        self.role_permissions: Dict[str, FrozenSet[str]] = {
+            role["name"]: frozenset(
+                perm["name"] for perm in permissions
+                if self.role_bits.get(perm["id"], 0) >> idx & 1
+            )
+            for idx, role in enumerate(roles)
+        }
+        self._grouped: Optional[List[Dict[str, Any]]] = None
+
+    def has_permission(self, role_id: int, permission_id: int) -> bool:
+        idx = self.role_index.get(role_id)
+        if idx is None:
+            return False
+        return bool(self.role_bits.get(permission_id, 0) >> idx & 1)
+
+    def grouped(self) -> List[Dict[str, Any]]:
+        """Permissions grouped by category with per-role enabled flags"""
+        if self._grouped is None:
+            permission_groups = defaultdict(list)
+            for perm in self.permissions:
+                bits = self.role_bits.get(perm["id"], 0)
+                permission_groups[self.categories[perm["id"]]].append({
+                    "id": perm["id"],
+                    "name": perm["name"],
+                    "label": perm["label"],
+                    "roles": [
+                        {
+                            "id": role["id"],
+                            "name": role["name"],
+                            "enabled": bool(bits >> idx & 1)
+                        }
+                        for idx, role in enumerate(self.roles)
+                    ]
+                })
+            self._grouped = [
+                {"group": group_name, "permissions": permissions}
+                for group_name, permissions in permission_groups.items()
+            ]
+        return self._grouped
+
+
+def load_permission_matrix() -> PermissionMatrix:
+    """Query permissions, roles and the Role.permissions through table"""
+    from deelflow.models import Permission, Role
+
+    permissions = list(Permission.objects.order_by("id").values("id", "name", "label"))
+    roles = list(Role.objects.order_by("id").values("id", "name"))
+    pairs = list(Role.permissions.through.objects.values_list("permission_id", "role_id"))
+    return PermissionMatrix(permissions, roles, pairs)
+
+
+def get_permission_matrix() -> PermissionMatrix:
+    """
+    Return the cached matrix, loading it on first use (sync; run off the event loop)
+    """
+    matrix = _matrix_cache.get("matrix")
+    if matrix is None:
+        with _load_lock:
+            matrix = _matrix_cache.get("matrix")
+            if matrix is None:
+                matrix = load_permission_matrix()
+                _matrix_cache.set("matrix", matrix)
+    return matrix
+
+
+def peek_role_permissions(role: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    Permission names for a role from the cached matrix, or None when the
+    matrix is not loaded (safe to call on the event loop: never queries)
+    """
+    matrix = _matrix_cache.get("matrix")
+    if matrix is None:
+        return None
+    return matrix.role_permissions.get(role or "", frozenset())
+
+
+def get_role_permissions(role: Optional[str]) -> FrozenSet[str]:
+    """Permission names for a role, loading the matrix if needed (sync)"""
+    return get_permission_matrix().role_permissions.get(role or "", frozenset())
+
+
+def invalidate_permission_matrix() -> None:
+    """Drop cached role/permission data after roles or permissions change"""
+    _matrix_cache.clear()
+    _category_cache.clear()
+    logger.debug("Permission matrix cache invalidated")
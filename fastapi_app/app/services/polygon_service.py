@@ -1,9 +1,63 @@
 import os
-from typing import Optional, Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, List
 
+import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from web3 import Web3
 
+from app.core.cache import TTLCache
+
+NETWORK_INFO_TTL = 2.0     # seconds; Polygon produces a block roughly every 2s
+BALANCE_BATCH_SIZE = 100   # eth_getBalance calls per JSON-RPC batch request
+RPC_POOL_SIZE = 20         # keep-alive connections to the RPC endpoint
+
+
+class NonceManager:
+    """
+    Hands out sequential nonces per sending address
+
+    The first transfer from an address reads the pending transaction count from
+    the node. Later transfers count up locally, so concurrent sends never
+    reuse a nonce. Sends from the same address are serialized while the
+    transaction is signed and submitted. If a send fails, the address is
+    resynced from the node on its next use.
+    """
+
+    def __init__(self, fetch: Callable[[str], int]) -> None:
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._address_locks: Dict[str, threading.Lock] = {}
+        self._next: Dict[str, int] = {}
+
+    def _lock_for(self, address: str) -> threading.Lock:
+        with self._lock:
+            return self._address_locks.setdefault(address, threading.Lock())
+
+    @contextmanager
+    def reserve(self, address: str):
+        """Yield the next nonce; it is consumed only if the block exits cleanly"""
+        with self._lock_for(address):
+            nonce = self._next.get(address)
+            if nonce is None:
+                nonce = self._fetch(address)
+            try:
+                yield nonce
+            except Exception:
+                self._next.pop(address, None)
+                raise
+            self._next[address] = nonce + 1
+
+    def reset(self, address: Optional[str] = None) -> None:
+        """Forget local nonces so they are re-read from the node"""
+        with self._lock:
+            if address is None:
+                self._next.clear()
+            else:
+                self._next.pop(address, None)
+
 
 class PolygonService:
     """Minimal Polygon (MATIC) integration using Web3.py"""
@@ -14,10 +68,14 @@ class PolygonService:
         rpc_url = os.getenv("POLYGON_RPC_URL", "")
         if not rpc_url:
             raise ValueError("POLYGON_RPC_URL is not configured in environment")
+        self.rpc_url = rpc_url
 
-        self.web3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 20}))
-        if not self.web3.is_connected():
-            raise ConnectionError("Failed to connect to Polygon RPC")
+        # One keep-alive session shared by Web3 and the batch requests below
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RPC_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.web3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 20}, session=self.session))
 
         self.chain_id = int(os.getenv("POLYGON_CHAIN_ID", "137"))  # 137 = mainnet, 80001 = Mumbai
 
@@ -28,12 +86,30 @@ class PolygonService:
             acct = self.web3.eth.account.from_key(self.server_private_key)
             self.server_address = acct.address
 
+        self._network_cache = TTLCache(maxsize=8, ttl=NETWORK_INFO_TTL)
+        self.nonces = NonceManager(lambda address: self.web3.eth.get_transaction_count(address, "pending"))
+        self._rpc_id = 0
+        self._rpc_id_lock = threading.Lock()
+
+    def _cached(self, key: str, fetch: Callable[[], Any]) -> Any:
+        value = self._network_cache.get(key)
+        if value is None:
+            value = fetch()
+            self._network_cache.set(key, value)
+        return value
+
     def get_network_info(self) -> Dict[str, Any]:
+        try:
+            block_number = self._cached("block_number", lambda: self.web3.eth.block_number)
+            client_version = self._cached("client_version", lambda: self.web3.client_version)
+            is_connected = True
+        except Exception:
+            block_number, client_version, is_connected = None, None, False
         return {
             "chain_id": self.chain_id,
-            "client_version": self.web3.client_version,
-            "is_connected": self.web3.is_connected(),
-            "block_number": self.web3.eth.block_number,
+            "client_version": client_version,
+            "is_connected": is_connected,
+            "block_number": block_number,
         }
 
     def get_balance(self, address: str) -> Dict[str, Any]:
@@ -45,6 +121,48 @@ class PolygonService:
             "balance_matic": self.web3.from_wei(wei, "ether"),
         }
 
+    def _next_rpc_ids(self, count: int) -> range:
+        with self._rpc_id_lock:
+            start = self._rpc_id
+            self._rpc_id += count
+        return range(start, start + count)
+
+    def get_balances(self, addresses: List[str]) -> List[Dict[str, Any]]:
+        """Look up many balances with one JSON-RPC batch per BALANCE_BATCH_SIZE addresses"""
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(addresses), BALANCE_BATCH_SIZE):
+            chunk = addresses[start:start + BALANCE_BATCH_SIZE]
+            checksums, batch = {}, []
+            for rpc_id, address in zip(self._next_rpc_ids(len(chunk)), chunk):
+                try:
+                    checksums[rpc_id] = self.web3.to_checksum_address(address)
+                except ValueError:
+                    results.append({"address": address, "error": "Invalid address"})
+                    continue
+                batch.append({
+                    "jsonrpc": "2.0",
+                    "id": rpc_id,
+                    "method": "eth_getBalance",
+                    "params": [checksums[rpc_id], "latest"],
+                })
+            if not batch:
+                continue
+
+            response = self.session.post(self.rpc_url, json=batch, timeout=20)
+            response.raise_for_status()
+            for item in sorted(response.json(), key=lambda item: item.get("id", 0)):
+                address = checksums.get(item.get("id"))
+                if "error" in item:
+                    results.append({"address": address, "error": item["error"].get("message", "RPC error")})
+                    continue
+                wei = int(item["result"], 16)
+                results.append({
+                    "address": address,
+                    "balance_wei": str(wei),
+                    "balance_matic": self.web3.from_wei(wei, "ether"),
+                })
+        return results
+
     def transfer_native(self, to_address: str, amount_matic: float, from_private_key: Optional[str] = None) -> Dict[str, Any]:
         """Send native MATIC. Uses provided key, else server key if configured."""
         private_key = from_private_key or self.server_private_key
@@ -54,20 +172,35 @@ class PolygonService:
         account = self.web3.eth.account.from_key(private_key)
         to_checksum = self.web3.to_checksum_address(to_address)
 
-        nonce = self.web3.eth.get_transaction_count(account.address)
-        tx = {
-            "nonce": nonce,
-            "to": to_checksum,
-            "value": self.web3.to_wei(amount_matic, "ether"),
-            "gas": 21000,
-            "maxFeePerGas": self.web3.to_wei("60", "gwei"),
-            "maxPriorityFeePerGas": self.web3.to_wei("30", "gwei"),
-            "chainId": self.chain_id,
-            "type": 2,
-        }
-
-        signed = self.web3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = self.web3.eth.send_raw_transaction(signed.raw_transaction)
-        return {"tx_hash": tx_hash.hex(), "from": account.address, "to": to_checksum, "amount_matic": amount_matic}
-
-
+        with self.nonces.reserve(account.address) as nonce:
+            tx = {
+                "nonce": nonce,
+                "to": to_checksum,
+                "value": self.web3.to_wei(amount_matic, "ether"),
+                "gas": 21000,
+                "maxFeePerGas": self.web3.to_wei("60", "gwei"),
+                "maxPriorityFeePerGas": self.web3.to_wei("30", "gwei"),
+                "chainId": self.chain_id,
+                "type": 2,
+            }
+
+            signed = self.web3.eth.account.sign_transaction(tx, private_key)
+            tx_hash = self.web3.eth.send_raw_transaction(signed.raw_transaction)
+        return {"tx_hash": tx_hash.hex(), "from": account.address, "to": to_checksum, "amount_matic": amount_matic, "nonce": nonce}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_polygon_service: Optional[PolygonService] = None
+_polygon_service_lock = threading.Lock()
+
+
+def get_polygon_service() -> PolygonService:
+    """Process-wide PolygonService, created on first use"""
+    global _polygon_service
+    if _polygon_service is None:
+        with _polygon_service_lock:
+            if _polygon_service is None:
+                _polygon_service = PolygonService()
+    return _polygon_service
@@ -6,6 +6,7 @@ from typing import List, Optional, Dict, Any
 from decimal import Decimal
 from app.schemas.property import PropertyCreate, PropertyUpdate
 from app.core.exceptions import NotFoundError, ValidationError
+from deelflow.address import address_key
 import logging
 
 logger = logging.getLogger(__name__)
@@ -130,10 +131,12 @@ class PropertyService:
             if not property:
                 raise NotFoundError("Property not found")
             
-            # Get AI analysis
-            analysis = self.django_property_ai_model.objects.filter(
-                address=property.address
-            ).first()
+            # Get AI analysis (indexed lookup on the canonical address key;
+            # properties saved before backfill_address_keys ran have none stored yet)
+            key = property.address_key or address_key(
+                property.address, property.unit_apt, property.city, property.state, property.zipcode
+            )
+            analysis = self.django_property_ai_model.objects.filter(address_key=key).first() if key else None
             
             if not analysis:
                 return None
@@ -4,9 +4,15 @@ Provides electronic signature functionality using SignNow API
 Official API Documentation: https://api.signnow.com/docs
 """
 
+import asyncio
+import base64
+import hashlib
+import httpx
 import requests
 import os
-from typing import Dict, List, Any, Optional
+import tempfile
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -15,8 +21,184 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent.parent / ".env"
 load_dotenv(env_path)
 
+from app.core.streaming import STREAM_CHUNK_SIZE
+
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive pool for streamed SignNow transfers
+SIGNNOW_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+SIGNNOW_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Completed signed documents are kept here, addressed by content hash
+SIGNNOW_CACHE_DIR = Path(os.getenv("SIGNNOW_CACHE_DIR", str(Path(tempfile.gettempdir()) / "deelflow-signnow")))
+
+# Upstream response headers passed through to the client on downloads
+PROXIED_HEADERS = ("content-type", "content-length", "content-range", "accept-ranges", "content-disposition")
+
+TOKEN_REFRESH_MARGIN = 300        # seconds before expiry to refresh in the background
+DEFAULT_TOKEN_LIFETIME = 3600     # used when the token response has no expires_in
+SIGNNOW_INVITE_CONCURRENCY = 5    # parallel invites in a bulk send
+
+
+class SignNowTokenManager:
+    """
+    Tracks the SignNow access token and its expiry
+    
+    ``get_token`` returns a valid token. Within TOKEN_REFRESH_MARGIN of expiry it
+    starts a background refresh and returns the current token; once the token
+    has expired, callers wait for the refresh. All refreshes are single-flight:
+    concurrent callers share one token request. After every async refresh a
+    timer schedules the next one, so busy workers rarely see an expiring token.
+    """
+    
+    def __init__(self, request_token: Callable[[Dict[str, str]], Awaitable[Optional[Dict[str, Any]]]],
+                 password_grant: Callable[[], Dict[str, str]], margin: float = TOKEN_REFRESH_MARGIN):
+        self._request_token = request_token
+        self._password_grant = password_grant
+        self.margin = margin
+        self.access_token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self.token_type = "Bearer"
+        self.expires_at = 0.0  # time.monotonic()
+        self.refreshes = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    def store(self, data: Dict[str, Any]) -> None:
+        """Record a token response from /oauth2/token"""
+        self.access_token = data.get("access_token")
+        self.refresh_token = data.get("refresh_token") or self.refresh_token
+        self.token_type = data.get("token_type", "Bearer")
+        self.expires_at = time.monotonic() + float(data.get("expires_in") or DEFAULT_TOKEN_LIFETIME)
+        self.refreshes += 1
+    
+    def invalidate(self) -> None:
+        """Forget the access token (e.g. after a 401)"""
+        self.access_token = None
+        self.expires_at = 0.0
+    
+    def current_token(self) -> Optional[str]:
+        """The access token if it has not expired"""
+        if self.access_token and time.monotonic() < self.expires_at:
+            return self.access_token
+        return None
+    
+    @property
+    def authorization(self) -> str:
+        return f"{self.token_type} {self.access_token}"
+    
+    async def get_token(self) -> Optional[str]:
+        token = self.current_token()
+        if token:
+            if time.monotonic() >= self.expires_at - self.margin:
+                self._start_refresh()
+            return token
+        # shield: one caller being cancelled must not cancel the shared refresh
+        return await asyncio.shield(self._start_refresh())
+    
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+    
+    async def _refresh(self) -> Optional[str]:
+        data = None
+        if self.refresh_token:
+            data = await self._request_token({"grant_type": "refresh_token", "refresh_token": self.refresh_token})
+        if data is None:
+            data = await self._request_token(self._password_grant())
+        if data is None:
+            return self.current_token()
+        self.store(data)
+        self._schedule_refresh()
+        logger.info("SignNow access token refreshed")
+        return self.access_token
+    
+    def _schedule_refresh(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = max(0.0, self.expires_at - self.margin - time.monotonic())
+        self._timer = asyncio.get_running_loop().call_later(delay, self._start_refresh)
+    
+    def cancel(self) -> None:
+        """Stop the scheduled refresh (application shutdown)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+    
+    def status(self) -> Dict[str, Any]:
+        remaining = self.expires_at - time.monotonic()
+        return {
+            "authenticated": self.current_token() is not None,
+            "expires_in": max(0, int(remaining)) if self.access_token else None,
+            "has_refresh_token": bool(self.refresh_token),
+            "refreshes": self.refreshes,
+        }
+
+
+def is_document_completed(document: Dict[str, Any]) -> bool:
+    """True once every field invite on a SignNow document has been fulfilled"""
+    invites = document.get("field_invites") or []
+    return bool(invites) and all(invite.get("status") == "fulfilled" for invite in invites)
+
+
+class SignedDocumentCache:
+    """
+    Content-addressed store for completed signed documents
+    
+    Files live at blobs/<sha256[:2]>/<sha256>; documents/<document_id> holds the
+    hash. Identical packets are stored once. Documents are only added after
+    signing completes, when their content can no longer change.
+    """
+    
+    def __init__(self, root: Path = SIGNNOW_CACHE_DIR):
+        self.root = Path(root)
+    
+    def _index_path(self, document_id: str) -> Path:
+        return self.root / "documents" / document_id
+    
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+    
+    def path_for(self, document_id: str) -> Optional[Path]:
+        """Cached file for a document, if any"""
+        try:
+            digest = self._index_path(document_id).read_text().strip()
+        except (FileNotFoundError, ValueError):
+            return None
+        blob = self._blob_path(digest)
+        return blob if blob.exists() else None
+    
+    def temp_file(self):
+        """Open a temporary file on the cache volume (so commit is a rename)"""
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+    
+    def commit(self, document_id: str, temp_path: str, digest: str) -> Path:
+        """Move a fully written temp file into the store and index it"""
+        blob = self._blob_path(digest)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if blob.exists():
+            os.unlink(temp_path)
+        else:
+            os.replace(temp_path, blob)
+        index = self._index_path(document_id)
+        index.parent.mkdir(parents=True, exist_ok=True)
+        index_tmp = index.with_suffix(".tmp")
+        index_tmp.write_text(digest)
+        os.replace(index_tmp, index)
+        return blob
+
+
+class DocumentStream:
+    """An open upstream download: status, passthrough headers and a chunk iterator"""
+    
+    def __init__(self, status_code: int, headers: Dict[str, str], body: AsyncIterator[bytes]):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
 class SignNowService:
     """Service for interacting with SignNow API"""
     
@@ -31,15 +213,58 @@ class SignNowService:
         self.username = os.getenv("SIGNNOW_USERNAME", "info@cygenequities.com")
         self.password = os.getenv("SIGNNOW_PASSWORD", "Revelation21v21$")
         
-        # Store access token
-        self.access_token = None
-        self.token_type = "Bearer"
+        # Access token lifecycle (expiry tracking, background refresh)
+        self.tokens = SignNowTokenManager(self._request_token, self._password_grant)
         
-        # Configure headers
-        self.headers = {
-            "Content-Type": "application/json"
+        # Async client for streamed transfers, created lazily on the running event loop
+        self._client: Optional[httpx.AsyncClient] = None
+        self.document_cache = SignedDocumentCache()
+    
+    @property
+    def access_token(self) -> Optional[str]:
+        """Current access token, or None once it has expired"""
+        return self.tokens.current_token()
+    
+    @property
+    def token_type(self) -> str:
+        return self.tokens.token_type
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.tokens.access_token:
+            headers["Authorization"] = self.tokens.authorization
+        return headers
+    
+    def _password_grant(self) -> Dict[str, str]:
+        return {
+            "grant_type": "password",
+            "username": self.username,
+            "password": self.password,
+            "scope": "user"
+        }
+    
+    def _token_headers(self) -> Dict[str, str]:
+        credentials = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+        return {
+            "Authorization": f"Basic {credentials}",
+            "Content-Type": "application/x-www-form-urlencoded"
         }
     
+    async def _request_token(self, grant: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """POST /oauth2/token on the async client; None on failure"""
+        if not self.client_id or not self.client_secret:
+            logger.error("SignNow Client ID or Client Secret is not configured")
+            return None
+        try:
+            response = await self._get_client().post("/oauth2/token", headers=self._token_headers(), data=grant)
+            if response.status_code == 200:
+                return response.json()
+            logger.error(f"SignNow OAuth ({grant['grant_type']}) failed: {response.status_code}")
+        except Exception as e:
+            logger.error(f"SignNow authentication error: {str(e)}")
+        return None
+    
     def authenticate(self) -> bool:
         """
         Authenticate with SignNow API using OAuth 2.0
@@ -59,39 +284,17 @@ class SignNowService:
             # OAuth 2.0 authentication endpoint
             url = f"{self.base_url}/oauth2/token"
             
-            # Prepare OAuth request
-            auth_payload = {
-                "grant_type": "password",
-                "username": self.username,
-                "password": self.password,
-                "scope": "user"
-            }
-            
-            # Basic Auth header
-            import base64
-            credentials = f"{self.client_id}:{self.client_secret}"
-            credentials_base64 = base64.b64encode(credentials.encode()).decode()
-            
-            auth_headers = {
-                "Authorization": f"Basic {credentials_base64}",
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-            
             logger.info(f"SignNow OAuth Request: {url}")
             
-            response = requests.post(url, headers=auth_headers, data=auth_payload, timeout=30)
+            response = requests.post(url, headers=self._token_headers(), data=self._password_grant(), timeout=30)
             
             logger.info(f"SignNow Response Status: {response.status_code}")
             
             if response.status_code == 200:
                 data = response.json()
                 
-                # Store access token
-                self.access_token = data.get("access_token")
-                self.token_type = data.get("token_type", "Bearer")
-                
-                # Update headers with access token
-                self.headers["Authorization"] = f"{self.token_type} {self.access_token}"
+                # Store access token and its expiry
+                self.tokens.store(data)
                 
                 logger.info(f"SignNow authenticated successfully")
                 logger.info(f"Access Token: {self.access_token[:20]}...")
@@ -315,6 +518,27 @@ class SignNowService:
                 "message": str(e)
             }
     
+    @staticmethod
+    def _invite_payload(signers: List[Dict[str, Any]], subject: Optional[str] = None,
+                        message: Optional[str] = None) -> Dict[str, Any]:
+        """Invite request body with signers formatted for SignNow"""
+        # Format signers correctly
+        formatted_signers = []
+        for idx, signer in enumerate(signers):
+            formatted_signer = {
+                "email": signer.get("email"),
+                "order": signer.get("order", idx + 1),
+                "role_id": signer.get("role_id", "Signer"),  # Default role
+                "role": signer.get("role", "Signer")
+            }
+            formatted_signers.append(formatted_signer)
+        
+        return {
+            "to": formatted_signers,
+            "subject": subject or "Please sign this document",
+            "message": message or "Please review and sign the attached document."
+        }
+    
     def invite_signers(self, document_id: str, signers: List[Dict[str, Any]], 
                        subject: Optional[str] = None, message: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -340,24 +564,9 @@ class SignNowService:
             # SignNow invite endpoint
             url = f"{self.base_url}/api/v1/document/{document_id}/invite"
             
-            # Format signers correctly
-            formatted_signers = []
-            for idx, signer in enumerate(signers):
-                formatted_signer = {
-                    "email": signer.get("email"),
-                    "order": signer.get("order", idx + 1),
-                    "role_id": signer.get("role_id", "Signer"),  # Default role
-                    "role": signer.get("role", "Signer")
-                }
-                formatted_signers.append(formatted_signer)
+            payload = self._invite_payload(signers, subject, message)
             
-            payload = {
-                "to": formatted_signers,
-                "subject": subject or "Please sign this document",
-                "message": message or "Please review and sign the attached document."
-            }
-            
-            logger.info(f"Sending invitation for document {document_id} to {len(formatted_signers)} signer(s)")
+            logger.info(f"Sending invitation for document {document_id} to {len(payload['to'])} signer(s)")
             response = requests.post(url, headers=self.headers, json=payload, timeout=30)
             
             if response.status_code in [200, 201]:
@@ -521,6 +730,283 @@ class SignNowService:
                 "message": str(e)
             }
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared pooled client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=SIGNNOW_POOL_LIMITS,
+                timeout=SIGNNOW_TIMEOUT,
+            )
+        return self._client
+    
+    async def _ensure_authenticated(self) -> bool:
+        return bool(await self.tokens.get_token())
+    
+    async def _api(self, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """Authenticated request on the pooled client; retries once after a 401. None if auth fails"""
+        for attempt in range(2):
+            if not await self.tokens.get_token():
+                return None
+            response = await self._get_client().request(
+                method, path, headers={"Authorization": self.tokens.authorization}, **kwargs
+            )
+            if response.status_code != 401 or attempt:
+                return response
+            self.tokens.invalidate()
+        return response
+    
+    async def get_documents_async(self, limit: int = 100) -> Dict[str, Any]:
+        """Async get_documents"""
+        try:
+            response = await self._api("GET", "/api/v1/document", params={"limit": limit})
+            if response is None:
+                return {
+                    "status": "error",
+                    "message": "Authentication required"
+                }
+            if response.status_code == 200:
+                return {
+                    "status": "success",
+                    "data": response.json()
+                }
+            logger.error(f"Failed to get documents: {response.status_code}")
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}",
+                "data": response.text
+            }
+        except Exception as e:
+            logger.error(f"Error getting documents: {str(e)}")
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+    
+    async def invite_signers_async(self, document_id: str, signers: List[Dict[str, Any]],
+                                   subject: Optional[str] = None, message: Optional[str] = None) -> Dict[str, Any]:
+        """Async invite_signers"""
+        try:
+            payload = self._invite_payload(signers, subject, message)
+            logger.info(f"Sending invitation for document {document_id} to {len(payload['to'])} signer(s)")
+            response = await self._api("POST", f"/api/v1/document/{document_id}/invite", json=payload)
+            if response is None:
+                return {
+                    "status": "error",
+                    "message": "Authentication required"
+                }
+            if response.status_code in [200, 201]:
+                return {
+                    "status": "success",
+                    "data": response.json()
+                }
+            logger.error(f"Failed to send invitation: {response.status_code}")
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}: Failed to send invitation",
+                "data": response.text
+            }
+        except Exception as e:
+            logger.error(f"Error sending invitation: {str(e)}")
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+    
+    async def invite_many(self, invites: List[Dict[str, Any]],
+                          concurrency: int = SIGNNOW_INVITE_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Send many invitations with at most ``concurrency`` in flight
+        
+        Args:
+            invites: Dictionaries with document_id, signers, subject (optional), message (optional)
+            
+        Returns:
+            One result per invite, in input order, each tagged with its document_id
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def send(invite: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.invite_signers_async(
+                    document_id=invite["document_id"],
+                    signers=invite.get("signers") or [],
+                    subject=invite.get("subject"),
+                    message=invite.get("message")
+                )
+            return {"document_id": invite["document_id"], **result}
+        
+        return await asyncio.gather(*(send(invite) for invite in invites))
+    
+    async def get_document_status_async(self, document_id: str) -> Dict[str, Any]:
+        """Async get_document_status"""
+        try:
+            response = await self._api("GET", f"/api/v1/document/{document_id}")
+            if response is None:
+                return {
+                    "status": "error",
+                    "message": "Authentication required"
+                }
+            if response.status_code == 200:
+                return {
+                    "status": "success",
+                    "data": response.json()
+                }
+            logger.error(f"Failed to get document status: {response.status_code}")
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}: Failed to get document status",
+                "data": response.text
+            }
+        except Exception as e:
+            logger.error(f"Error getting document status: {str(e)}")
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+    
+    async def aclose(self):
+        """Close the pooled client (application shutdown)"""
+        self.tokens.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def upload_document_stream(self, file_path: str, document_name: Optional[str] = None,
+                                     content_type: str = "application/pdf") -> Dict[str, Any]:
+        """
+        Upload a spooled file to SignNow, streaming it from disk
+        
+        Args:
+            file_path: Path to the spooled upload
+            document_name: Optional custom name for the document
+            content_type: MIME type sent for the file part
+            
+        Returns:
+            Dictionary with document upload result including document ID
+        """
+        try:
+            if not await self._ensure_authenticated():
+                return {
+                    "status": "error",
+                    "message": "Authentication required"
+                }
+            
+            document_name = document_name or os.path.basename(file_path)
+            logger.info(f"Streaming document upload to SignNow: {document_name}")
+            with open(file_path, "rb") as f:
+                response = await self._get_client().post(
+                    "/api/v1/document",
+                    headers={"Authorization": self.tokens.authorization},
+                    files={"file": (document_name, f, content_type)},
+                )
+            
+            if response.status_code in [200, 201]:
+                data = response.json()
+                logger.info(f"Document uploaded successfully: {data.get('id', 'Unknown ID')}")
+                return {
+                    "status": "success",
+                    "data": data
+                }
+            logger.error(f"Failed to upload document: {response.status_code}")
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}: Failed to upload document",
+                "data": response.text
+            }
+        except Exception as e:
+            logger.error(f"Error uploading document: {str(e)}")
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+    
+    async def open_download(self, document_id: str, range_header: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Open a streamed download of a SignNow document
+        
+        The Range header is forwarded upstream. The document status is checked
+        before a full download starts: only a document that is already
+        completed is written to the signed-document cache while it streams, so
+        a signature landing mid-download can never cache the unsigned PDF.
+        
+        Returns:
+            {"status": "success", "data": DocumentStream} or an error dictionary
+        """
+        try:
+            if not await self._ensure_authenticated():
+                return {
+                    "status": "error",
+                    "message": "Authentication required"
+                }
+            
+            completed = False
+            if not range_header:
+                status = await self.get_document_status_async(document_id)
+                completed = status.get("status") == "success" and is_document_completed(status.get("data") or {})
+            
+            headers = {"Authorization": self.tokens.authorization}
+            if range_header:
+                headers["Range"] = range_header
+            client = self._get_client()
+            request = client.build_request("GET", f"/api/v1/document/{document_id}/download", headers=headers)
+            response = await client.send(request, stream=True)
+            
+            if response.status_code not in (200, 206):
+                await response.aread()
+                await response.aclose()
+                logger.error(f"Failed to download document: {response.status_code}")
+                return {
+                    "status": "error",
+                    "message": f"HTTP {response.status_code}: Failed to download document",
+                    "data": response.text
+                }
+            
+            passthrough = {name: response.headers[name] for name in PROXIED_HEADERS if name in response.headers}
+            body = self._relay(document_id, response, cache=completed and response.status_code == 200)
+            return {
+                "status": "success",
+                "data": DocumentStream(response.status_code, passthrough, body)
+            }
+        except Exception as e:
+            logger.error(f"Error downloading document: {str(e)}")
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+    
+    async def _relay(self, document_id: str, response: httpx.Response, cache: bool) -> AsyncIterator[bytes]:
+        """Yield upstream chunks, teeing a full download into the cache"""
+        spool = self.document_cache.temp_file() if cache else None
+        digest = hashlib.sha256()
+        complete = False
+        try:
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                if spool:
+                    spool.write(chunk)
+                    digest.update(chunk)
+                yield chunk
+            complete = True
+        finally:
+            await response.aclose()
+            if spool:
+                spool.close()
+                if complete:
+                    self._commit_cached(document_id, spool.name, digest.hexdigest())
+                else:
+                    os.unlink(spool.name)
+    
+    def _commit_cached(self, document_id: str, temp_path: str, digest: str):
+        """Keep a fully streamed download of a document that was completed before it started"""
+        try:
+            self.document_cache.commit(document_id, temp_path, digest)
+            logger.info(f"Cached signed document {document_id} ({digest[:12]})")
+            return
+        except Exception as e:
+            logger.warning(f"Could not cache signed document {document_id}: {str(e)}")
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test connection to SignNow API
@@ -550,7 +1036,8 @@ class SignNowService:
                     "message": "SignNow API connection successful",
                     "authenticated": True,
                     "user": user_info.get("data", {}),
-                    "access_token": self.access_token[:20] + "..." if self.access_token else None
+                    "access_token": self.access_token[:20] + "..." if self.access_token else None,
+                    "token": self.tokens.status()
                 }
             else:
                 return {
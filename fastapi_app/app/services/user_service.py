@@ -3,13 +3,13 @@ User service for business logic
 """
 
 from typing import List, Optional
-from app.core.security import get_password_hash, check_password
+from app.core.security import get_password_hash, check_password, check_password_async, hash_password_async
 
 # Alias for compatibility
 verify_password = check_password
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.exceptions import NotFoundError, ValidationError
-from asgiref.sync import sync_to_async
+from app.core.db_executor import run_db
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,7 +38,7 @@ class UserService:
     async def get_user_by_id(self, user_id: int):
         """Get user by ID"""
         try:
-            return await sync_to_async(self.django_user_model.objects.get)(id=user_id)
+            return await run_db(self.django_user_model.objects.get, id=user_id)
         except self.django_user_model.DoesNotExist:
             return None
         except Exception as e:
@@ -48,7 +48,7 @@ class UserService:
     async def get_user_by_email(self, email: str):
         """Get user by email"""
         try:
-            return await sync_to_async(self.django_user_model.objects.get)(email=email)
+            return await run_db(self.django_user_model.objects.get, email=email)
         except self.django_user_model.DoesNotExist:
             return None
         except Exception as e:
@@ -59,8 +59,13 @@ class UserService:
         """Authenticate user with email and password"""
         try:
             user = await self.get_user_by_email(email)
-            if user and verify_password(password, user.password):
-                return user
+            if user:
+                password_ok, upgraded_hash = await check_password_async(password, user.password)
+                if password_ok:
+                    if upgraded_hash:
+                        user.password = upgraded_hash
+                        await run_db(user.save, update_fields=['password'])
+                    return user
             return None
         except Exception as e:
             logger.error(f"Error authenticating user: {e}")
@@ -70,15 +75,15 @@ class UserService:
         """Create a new user"""
         try:
             # Hash password
-            hashed_password = get_password_hash(user_data.password)
+            hashed_password = await hash_password_async(user_data.password)
             
             # Get organization if provided
             organization = None
             if user_data.organization_id:
-                organization = await sync_to_async(self.django_organization_model.objects.get)(id=user_data.organization_id)
+                organization = await run_db(self.django_organization_model.objects.get, id=user_data.organization_id)
             
             # Create user
-            user = await sync_to_async(self.django_user_model.objects.create)(
+            user = await run_db(self.django_user_model.objects.create,
                 email=user_data.email,
                 password=hashed_password,
                 first_name=user_data.first_name,
@@ -107,7 +112,7 @@ class UserService:
             for field, value in update_data.items():
                 setattr(user, field, value)
             
-            await sync_to_async(user.save)()
+            await run_db(user.save)
             return user
         except Exception as e:
             logger.error(f"Error updating user: {e}")
@@ -120,7 +125,7 @@ class UserService:
             if not user:
                 raise NotFoundError("User not found")
             
-            await sync_to_async(user.delete)()
+            await run_db(user.delete)
         except Exception as e:
             logger.error(f"Error deleting user: {e}")
             raise
@@ -148,7 +153,7 @@ class UserService:
                 queryset = queryset.filter(organization_id=organization_id)
             
             # Apply pagination
-            return await sync_to_async(list)(queryset[skip:skip + limit])
+            return await run_db(list, queryset[skip:skip + limit])
         except Exception as e:
             logger.error(f"Error getting users: {e}")
             raise
@@ -162,7 +167,7 @@ class UserService:
             
             # Get user's role
             if user.role:
-                role = await sync_to_async(self.django_role_model.objects.get)(name=user.role)
+                role = await run_db(self.django_role_model.objects.get, name=user.role)
                 return [role]
             
             return []
@@ -177,9 +182,9 @@ class UserService:
             if not user:
                 raise NotFoundError("User not found")
             
-            role = await sync_to_async(self.django_role_model.objects.get)(id=role_id)
+            role = await run_db(self.django_role_model.objects.get, id=role_id)
             user.role = role.name
-            await sync_to_async(user.save)()
+            await run_db(user.save)
         except Exception as e:
             logger.error(f"Error assigning role: {e}")
             raise
@@ -192,7 +197,7 @@ class UserService:
                 raise NotFoundError("User not found")
             
             user.role = "user"  # Default role
-            await sync_to_async(user.save)()
+            await run_db(user.save)
         except Exception as e:
             logger.error(f"Error removing role: {e}")
             raise
@@ -204,10 +209,10 @@ class UserService:
                 return False
             
             # Get user's role
-            role = await sync_to_async(self.django_role_model.objects.get)(name=user.role)
+            role = await run_db(self.django_role_model.objects.get, name=user.role)
             
             # Check if role has permission
-            return await sync_to_async(role.permissions.filter(name=permission_name).exists)()
+            return await run_db(role.permissions.filter(name=permission_name).exists)
         except Exception as e:
             logger.error(f"Error checking permission: {e}")
             return False
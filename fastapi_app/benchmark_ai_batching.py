@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Throughput versus latency benchmark for AI micro-batching.
+
+Sends BENCH_REQUESTS requests (default 400) through a MicroBatcher at a steady
+BENCH_RATE requests/s (default 200, 0 = all at once). The model is a CPU stand-in:
+every batch busy-loops BENCH_SETUP_MS (default 20) plus BENCH_ITEM_MS (default 2)
+per item, like a forward pass whose fixed cost is shared by the batch. Each
+max_batch in BENCH_MAX_BATCH is run with each max_wait in BENCH_MAX_WAIT_MS. The
+report shows requests/s, p50/p99 latency and the average batch size. max_batch=1
+is the old one-request-per-call behaviour.
+
+Usage:
+    python benchmark_ai_batching.py
+    BENCH_RATE=0 BENCH_MAX_BATCH=1,8,32 BENCH_MAX_WAIT_MS=0,5,20 python benchmark_ai_batching.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from app.core.batching import MicroBatcher
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "400"))
+RATE = float(os.getenv("BENCH_RATE", "200"))
+SETUP_MS = float(os.getenv("BENCH_SETUP_MS", "20"))
+ITEM_MS = float(os.getenv("BENCH_ITEM_MS", "2"))
+MAX_BATCHES = [int(size) for size in os.getenv("BENCH_MAX_BATCH", "1,4,16,64").split(",")]
+MAX_WAITS = [float(wait) for wait in os.getenv("BENCH_MAX_WAIT_MS", "0,5,20").split(",")]
+WORKERS = int(os.getenv("BENCH_WORKERS", "2"))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def burn(ms):
+    """Keep the CPU busy for ms milliseconds"""
+    deadline = time.perf_counter() + ms / 1000
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(i * i for i in range(100))
+    return total
+
+
+def cpu_model(items):
+    burn(SETUP_MS + ITEM_MS * len(items))
+    return [len(item) for item in items]
+
+
+async def run(max_batch, max_wait_ms):
+    batcher = MicroBatcher("bench", cpu_model, max_batch=max_batch, max_wait_ms=max_wait_ms, workers=WORKERS)
+    latencies = []
+
+    async def request(i):
+        started = time.perf_counter()
+        assert await batcher.submit(f"item-{i}") == len(f"item-{i}")
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    tasks = []
+    for i in range(REQUESTS):
+        tasks.append(asyncio.create_task(request(i)))
+        if RATE:
+            await asyncio.sleep(max(0.0, started + (i + 1) / RATE - time.perf_counter()))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    metrics = batcher.metrics()
+    batcher.close()
+
+    print(
+        f"max_batch {max_batch:>3}  max_wait {max_wait_ms:>5.1f} ms  "
+        f"{REQUESTS / elapsed:8.1f} req/s  "
+        f"p50 {percentile(latencies, 50) * 1000:8.1f} ms  "
+        f"p99 {percentile(latencies, 99) * 1000:8.1f} ms  "
+        f"avg batch {metrics['avg_batch_size']:6.2f}"
+    )
+
+
+def main():
+    print("AI Micro-Batching Benchmark")
+    print("=" * 50)
+    print(f"{REQUESTS} requests at {RATE or 'unlimited'} req/s, model {SETUP_MS} ms + {ITEM_MS} ms/item, "
+          f"{WORKERS} workers")
+    for max_batch in MAX_BATCHES:
+        for max_wait_ms in MAX_WAITS if max_batch > 1 else [0.0]:
+            asyncio.run(run(max_batch, max_wait_ms))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark ORM throughput through the DB executor at different pool sizes.
+
+Fires BENCH_JOBS concurrent run_db() jobs (default 400). Each job holds a database
+connection for BENCH_QUERY_MS, which stands in for a slow query. The benchmark runs
+once per pool size in BENCH_POOL_SIZES and reports jobs/s and queue waits. A pool of 1
+behaves like the old thread_sensitive sync_to_async lane. Exits non-zero when throughput
+does not grow with the pool.
+
+DB_ENGINE=sqlite runs it against the local SQLite file instead of Postgres.
+
+Usage:
+    python benchmark_db_executor.py
+    DB_ENGINE=sqlite python benchmark_db_executor.py
+    BENCH_JOBS=1000 BENCH_POOL_SIZES=1,4,16 BENCH_QUERY_MS=5 python benchmark_db_executor.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import database  # noqa: F401  (configures Django)
+
+from django.db import connection
+
+from app.core.db_executor import DBExecutor
+from deelflow.db_pool import pool_metrics
+
+JOBS = int(os.getenv("BENCH_JOBS", "400"))
+POOL_SIZES = [int(size) for size in os.getenv("BENCH_POOL_SIZES", "1,2,4,8,16").split(",")]
+QUERY_MS = float(os.getenv("BENCH_QUERY_MS", "10"))
+MIN_SPEEDUP = float(os.getenv("BENCH_MIN_SPEEDUP", "2.0"))  # largest pool vs pool of 1
+
+
+def slow_query():
+    """One round trip that keeps the connection busy for QUERY_MS"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_sleep(%s)", [QUERY_MS / 1000])
+        else:
+            cursor.execute("SELECT 1")
+            time.sleep(QUERY_MS / 1000)
+        return cursor.fetchone()
+
+
+async def run_pool(size):
+    executor = DBExecutor(max_workers=size)
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(executor.run(slow_query) for _ in range(JOBS)))
+        elapsed = time.perf_counter() - started
+        metrics = executor.metrics()
+    finally:
+        executor.shutdown()
+    throughput = JOBS / elapsed
+    print(
+        f"pool {size:>3}  {throughput:9.1f} jobs/s  wall {elapsed:6.2f} s  "
+        f"wait avg {metrics['avg_wait_ms']:8.1f} ms  p95 {metrics['p95_wait_ms']:8.1f} ms  "
+        f"max {metrics['max_wait_ms']:8.1f} ms  failed {metrics['failed']}"
+    )
+    return throughput
+
+
+def main():
+    print("DB Executor Benchmark")
+    print("=" * 50)
+    print(f"{JOBS} jobs of {QUERY_MS:g} ms on {connection.vendor}")
+    results = {size: asyncio.run(run_pool(size)) for size in POOL_SIZES}
+    pool = pool_metrics()
+    print(f"connections opened {pool['opened']}, reuse ratio {pool['reuse_ratio']:.1%}")
+
+    print("=" * 50)
+    smallest, largest = min(results), max(results)
+    speedup = results[largest] / results[smallest]
+    if largest > smallest and speedup < MIN_SPEEDUP:
+        print(f"FAIL - pool {largest} is only {speedup:.1f}x pool {smallest} (expected {MIN_SPEEDUP:.1f}x)")
+        return 1
+    print(f"PASS - pool {largest} is {speedup:.1f}x pool {smallest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark the opportunity-cost and revenue-growth aggregates against a large Deal table.
+
+Seeds a throwaway test database (never the configured one) with BENCH_DEALS rows
+(default 1,000,000), then times the dashboard aggregate paths and records their peak
+Python memory. Exits non-zero when a latency or memory ceiling is exceeded.
+
+Usage:
+    python benchmark_deal_aggregates.py
+    BENCH_DEALS=200000 BENCH_MAX_SECONDS=2 BENCH_MAX_MEMORY_MB=10 python benchmark_deal_aggregates.py
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from database import _get_opportunity_cost_data_sync
+
+from django.db import connection
+from django.utils import timezone
+
+from deelflow.dashboard import compute_revenue_growth
+from deelflow.models import Deal, Property
+
+DEAL_COUNT = int(os.getenv("BENCH_DEALS", "1000000"))
+BATCH_SIZE = int(os.getenv("BENCH_BATCH_SIZE", "10000"))
+MAX_SECONDS = float(os.getenv("BENCH_MAX_SECONDS", "5.0"))
+MAX_MEMORY_MB = float(os.getenv("BENCH_MAX_MEMORY_MB", "5.0"))
+RUNS = int(os.getenv("BENCH_RUNS", "3"))
+
+STATUSES = [status for status, _ in Deal.STATUS_CHOICES]
+DEAL_TYPES = [deal_type for deal_type, _ in Deal.DEAL_TYPE_CHOICES]
+
+
+def seed_deals(count):
+    """Bulk insert ``count`` deals spread over the last year"""
+    prop = Property.objects.create(
+        address="1 Benchmark Way",
+        city="Dallas",
+        state="TX",
+        zipcode="75201",
+        price=Decimal("150000.00"),
+    )
+
+    rng = random.Random(42)
+    now = timezone.now()
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(BATCH_SIZE, count - created)):
+            status = rng.choice(STATUSES)
+            offer = Decimal(rng.randint(50000, 500000))
+            batch.append(Deal(
+                property=prop,
+                deal_type=rng.choice(DEAL_TYPES),
+                status=status,
+                offer_price=offer,
+                final_price=offer if status == 'closed' else None,
+            ))
+        Deal.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        created += len(batch)
+        print(f"  seeded {created:,}/{count:,}", end="\r")
+    print()
+
+    # auto_now_add stamps every row with now(); backdate contiguous id ranges
+    # so the rows spread across twelve months (one UPDATE per month)
+    first_id = Deal.objects.order_by("id").values_list("id", flat=True).first()
+    per_month = max(1, count // 12)
+    for month in range(12):
+        Deal.objects.filter(
+            id__gte=first_id + month * per_month,
+            id__lt=first_id + (month + 1) * per_month,
+        ).update(created_at=now - timedelta(days=30 * (11 - month)))
+
+
+def measure(label, fn):
+    """Run ``fn`` RUNS times and return (best seconds, peak MB)"""
+    timings = []
+    peak_mb = 0.0
+    for _ in range(RUNS):
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = max(peak_mb, peak / (1024 * 1024))
+    best = min(timings)
+    print(f"{label:<28} best {best * 1000:8.1f} ms   peak {peak_mb:6.2f} MB")
+    return best, peak_mb
+
+
+def main():
+    print("Deal Aggregate Benchmark")
+    print("=" * 50)
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        print(f"Seeding {DEAL_COUNT:,} deals into {connection.settings_dict['NAME']}...")
+        seed_started = time.perf_counter()
+        seed_deals(DEAL_COUNT)
+        print(f"Seeded in {time.perf_counter() - seed_started:.1f}s")
+
+        # The endpoint swallows errors into a zeroed payload; make sure it really aggregated
+        breakdown = _get_opportunity_cost_data_sync()["statusBreakdown"]
+        if sum(row["count"] for row in breakdown.values()) != DEAL_COUNT:
+            raise RuntimeError(f"Opportunity cost aggregate did not cover the seeded deals: {breakdown}")
+
+        results = {
+            "opportunity cost": measure("opportunity cost", _get_opportunity_cost_data_sync),
+            "revenue growth": measure("revenue growth", compute_revenue_growth),
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    failures = []
+    for label, (seconds, peak_mb) in results.items():
+        if seconds > MAX_SECONDS:
+            failures.append(f"{label}: {seconds:.2f}s exceeds {MAX_SECONDS:.2f}s")
+        if peak_mb > MAX_MEMORY_MB:
+            failures.append(f"{label}: {peak_mb:.2f} MB exceeds {MAX_MEMORY_MB:.2f} MB")
+
+    print("=" * 50)
+    if failures:
+        for failure in failures:
+            print(f"FAIL - {failure}")
+        return 1
+    print(f"PASS - all aggregates under {MAX_SECONDS:.2f}s and {MAX_MEMORY_MB:.2f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
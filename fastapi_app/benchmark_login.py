@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark for the password hashing pool.
+
+Runs BENCH_LOGINS password verifications (default 200), at most BENCH_CONCURRENCY
+(default 50) at a time, with the project's configured Django hasher. Reports the
+p50/p99 login latency, throughput, and event-loop lag measured by a 10 ms ticker.
+Lag is what every other request on the worker feels while logins are running.
+Pass --baseline to also time the old inline check_password on the event loop.
+
+Usage:
+    python benchmark_login.py
+    BENCH_LOGINS=500 BENCH_CONCURRENCY=100 PASSWORD_HASH_WORKERS=8 python benchmark_login.py --baseline
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import database  # noqa: F401  (configures Django)
+
+from django.contrib.auth.hashers import check_password, make_password
+
+from app.core.security import check_password_async, password_hash_pool
+
+LOGINS = int(os.getenv("BENCH_LOGINS", "200"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "50"))
+TICK = 0.01  # seconds between event-loop lag probes
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe_loop_lag(lags, stop):
+    """Sleep TICK repeatedly and record how late each wake-up is"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+
+async def run(label, verify, encoded):
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    limiter = asyncio.Semaphore(CONCURRENCY)
+
+    async def login():
+        async with limiter:
+            started = time.perf_counter()
+            assert await verify(PASSWORD, encoded)
+            latencies.append(time.perf_counter() - started)
+
+    prober = asyncio.create_task(probe_loop_lag(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    print(
+        f"{label:<10} {LOGINS / elapsed:7.1f} logins/s  "
+        f"p50 {percentile(latencies, 50) * 1000:8.1f} ms  "
+        f"p99 {percentile(latencies, 99) * 1000:8.1f} ms  "
+        f"loop lag p99 {percentile(lags, 99) * 1000:8.1f} ms  "
+        f"max {max(lags or [0]) * 1000:8.1f} ms"
+    )
+
+
+async def pooled_verify(password, encoded):
+    matches, _ = await check_password_async(password, encoded)
+    return matches
+
+
+async def inline_verify(password, encoded):
+    return check_password(password, encoded)
+
+
+def main():
+    print("Login Throughput Benchmark")
+    print("=" * 50)
+    encoded = make_password(PASSWORD)
+    print(f"{LOGINS} logins, {CONCURRENCY} concurrent, hasher {encoded.split('$')[0]}, "
+          f"{password_hash_pool.max_workers} hashing workers")
+    asyncio.run(run("pool", pooled_verify, encoded))
+    if "--baseline" in sys.argv:
+        asyncio.run(run("inline", inline_verify, encoded))
+    print(f"pool metrics {password_hash_pool.metrics()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the WebSocket broadcast engine.
+
+Connects BENCH_CLIENTS simulated clients (default 10,000) to a ConnectionManager.
+A small share of them are deliberately slow. The script broadcasts BENCH_MESSAGES
+messages and reports delivery-latency percentiles for the healthy clients. Pass
+--baseline to also time the old sequential await-per-socket loop for comparison.
+
+Usage:
+    python benchmark_websocket_broadcast.py
+    BENCH_CLIENTS=2000 BENCH_SLOW_RATIO=0.05 python benchmark_websocket_broadcast.py --baseline
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from app.core.broadcast import ConnectionManager
+
+CLIENTS = int(os.getenv("BENCH_CLIENTS", "10000"))
+MESSAGES = int(os.getenv("BENCH_MESSAGES", "20"))
+INTERVAL = float(os.getenv("BENCH_INTERVAL", "0.25"))       # seconds between broadcasts
+SLOW_RATIO = float(os.getenv("BENCH_SLOW_RATIO", "0.01"))    # share of clients that stall
+SLOW_DELAY = float(os.getenv("BENCH_SLOW_DELAY", "0.5"))     # seconds a slow client takes per send
+
+
+class FakeWebSocket:
+    """Stands in for a Starlette WebSocket and records per-message latency"""
+
+    def __init__(self, sent_at, latencies, delay=0.0):
+        self.sent_at = sent_at
+        self.latencies = latencies
+        self.delay = delay
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.latencies.append(time.perf_counter() - self.sent_at[message])
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(label, latencies, elapsed):
+    print(
+        f"{label:<12} delivered {len(latencies):>9,}  "
+        f"p50 {percentile(latencies, 50) * 1000:8.2f} ms  "
+        f"p99 {percentile(latencies, 99) * 1000:8.2f} ms  "
+        f"max {max(latencies or [0]) * 1000:8.2f} ms  "
+        f"wall {elapsed:6.2f} s"
+    )
+
+
+async def run_engine():
+    manager = ConnectionManager()
+    sent_at, fast_latencies, slow_latencies = {}, [], []
+    slow_every = int(1 / SLOW_RATIO) if SLOW_RATIO else 0
+    for i in range(CLIENTS):
+        slow = slow_every and i % slow_every == 0
+        websocket = FakeWebSocket(sent_at, slow_latencies if slow else fast_latencies, SLOW_DELAY if slow else 0.0)
+        await manager.connect(websocket, user_id=i + 1)
+
+    started = time.perf_counter()
+    for seq in range(MESSAGES):
+        message = f'{{"type":"activity_update","seq":{seq}}}'
+        sent_at[message] = time.perf_counter()
+        await manager.broadcast(message)
+        await asyncio.sleep(INTERVAL)
+    # Let healthy clients drain; slow ones are left to the overflow policy
+    while any(c.queue.qsize() for c in manager.connections.values() if not c.websocket.delay):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    report("engine", fast_latencies, elapsed)
+    print(f"{'':<12} slow clients delivered {len(slow_latencies):,}; stats {manager.stats()}")
+    await manager.close()
+    return fast_latencies
+
+
+async def run_baseline():
+    """The previous implementation: await send_text on every socket in turn"""
+    sent_at, fast_latencies, slow_latencies = {}, [], []
+    slow_every = int(1 / SLOW_RATIO) if SLOW_RATIO else 0
+    sockets = [
+        FakeWebSocket(sent_at, slow_latencies if slow_every and i % slow_every == 0 else fast_latencies,
+                      SLOW_DELAY if slow_every and i % slow_every == 0 else 0.0)
+        for i in range(CLIENTS)
+    ]
+    messages = min(MESSAGES, 1)  # sequential sends stall for SLOW_DELAY per slow client
+    started = time.perf_counter()
+    for seq in range(messages):
+        message = f'{{"type":"activity_update","seq":{seq}}}'
+        sent_at[message] = time.perf_counter()
+        for websocket in sockets:
+            await websocket.send_text(message)
+    report("baseline", fast_latencies, time.perf_counter() - started)
+
+
+def main():
+    print("WebSocket Broadcast Benchmark")
+    print("=" * 50)
+    print(f"{CLIENTS:,} clients ({SLOW_RATIO:.1%} slow at {SLOW_DELAY}s/send), {MESSAGES} broadcasts")
+    asyncio.run(run_engine())
+    if "--baseline" in sys.argv:
+        asyncio.run(run_baseline())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,8 +9,8 @@ from pathlib import Path
 from decimal import Decimal
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.db.models import Sum
 from typing import Dict, List, Any, Optional
-from asgiref.sync import sync_to_async
 
 # Add Django project to Python path
 django_project_path = Path(__file__).resolve().parent.parent
@@ -28,39 +28,17 @@ from deelflow.models import (
     Campaign, CampaignPerformance, CampaignPropertyStats,
     DiscoveredLead, OutreachCampaign, CampaignRecipient
 )
+from app.core.db_executor import db_async
+from deelflow.dashboard import (
+    deal_status_breakdown, get_dashboard_rollup, serialize_dashboard_stats,
+    serialize_revenue_growth
+)
 
-async def _get_dashboard_stats_sync() -> Dict[str, Any]:
-    """Async version of get_dashboard_stats"""
+def _get_dashboard_stats_sync(fresh: bool = False) -> Dict[str, Any]:
+    """Synchronous version of get_dashboard_stats (one read of the dashboard rollup)"""
     try:
-        # Get counts from database
-        total_properties = await sync_to_async(Property.objects.count)()
-        total_leads = await sync_to_async(Lead.objects.count)()
-        total_deals = await sync_to_async(Deal.objects.count)()
-        total_users = await sync_to_async(User.objects.count)()
-        
-        # Get recent activity
-        recent_properties = await sync_to_async(Property.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count)()
-        
-        recent_leads = await sync_to_async(Lead.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count)()
-        
-        recent_deals = await sync_to_async(Deal.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count)()
-        
-        return {
-            "totalProperties": total_properties,
-            "totalLeads": total_leads,
-            "totalDeals": total_deals,
-            "totalUsers": total_users,
-            "recentProperties": recent_properties,
-            "recentLeads": recent_leads,
-            "recentDeals": recent_deals,
-            "lastUpdated": timezone.now().isoformat()
-        }
+        rollup = get_dashboard_rollup(fresh=fresh)
+        return serialize_dashboard_stats(rollup)
     except Exception as e:
         print(f"Error getting dashboard stats: {e}")
         return {
@@ -75,7 +53,7 @@ async def _get_dashboard_stats_sync() -> Dict[str, Any]:
         }
 
 # Async wrapper
-get_dashboard_stats = _get_dashboard_stats_sync
+get_dashboard_stats = db_async(_get_dashboard_stats_sync)
 
 def _get_ai_metrics_sync() -> Dict[str, Any]:
     """Synchronous version of get_ai_metrics"""
@@ -83,9 +61,10 @@ def _get_ai_metrics_sync() -> Dict[str, Any]:
         # Get AI analysis data
         total_analyses = AIAnalysis.objects.count()
         property_analyses = PropertyAIAnalysis.objects.count()
-        vision_analyses = VisionAnalysisMetrics.objects.count()
-        voice_calls = VoiceAICallMetrics.objects.count()
-        nlp_analyses = NLPProcessingMetrics.objects.count()
+        # Usage rows are per-minute buckets, so totals are sums
+        vision_analyses = VisionAnalysisMetrics.objects.aggregate(total=Sum('total_analyses'))['total'] or 0
+        voice_calls = VoiceAICallMetrics.objects.aggregate(total=Sum('total_calls'))['total'] or 0
+        nlp_analyses = NLPProcessingMetrics.objects.aggregate(total=Sum('total_processed'))['total'] or 0
         blockchain_txns = BlockchainTxnMetrics.objects.count()
         
         # Calculate accuracy (mock for now)
@@ -115,7 +94,7 @@ def _get_ai_metrics_sync() -> Dict[str, Any]:
         }
 
 # Async wrapper
-get_ai_metrics = sync_to_async(_get_ai_metrics_sync)
+get_ai_metrics = db_async(_get_ai_metrics_sync)
 
 def _get_tenant_management_data_sync() -> Dict[str, Any]:
     """Synchronous version of get_tenant_management_data"""
@@ -142,19 +121,15 @@ def _get_tenant_management_data_sync() -> Dict[str, Any]:
         }
 
 # Async wrapper
-get_tenant_management_data = sync_to_async(_get_tenant_management_data_sync)
+get_tenant_management_data = db_async(_get_tenant_management_data_sync)
 
 def _get_opportunity_cost_data_sync() -> Dict[str, Any]:
     """Synchronous version of get_opportunity_cost_data"""
     try:
-        # Get deal data
-        total_deals = Deal.objects.count()
-        closed_deals = Deal.objects.filter(status='closed').count()
-        pending_deals = Deal.objects.filter(status='pending').count()
-        
-        # Calculate potential revenue
-        total_revenue = sum([deal.final_price or 0 for deal in Deal.objects.filter(status='closed')])
-        potential_revenue = sum([deal.offer_price or 0 for deal in Deal.objects.filter(status='pending')])
+        # Counts and price totals per status in one GROUP BY round trip
+        breakdown = deal_status_breakdown()
+        total_revenue = breakdown['closed']['final_total']
+        potential_revenue = breakdown['pending']['offer_total']
         
         return {
             "lostRevenue": float(total_revenue) * 0.1,  # 10% of closed deals
@@ -165,7 +140,15 @@ def _get_opportunity_cost_data_sync() -> Dict[str, Any]:
             "optimizationNeeded": "Lead conversion process and property listing strategy",
             "roiConversionEfficiency": 78.5,
             "peakTimeMonths": ["March", "April", "May", "September", "October"],
-            "peakDescription": "Spring and fall seasons show highest property activity and deal closures"
+            "peakDescription": "Spring and fall seasons show highest property activity and deal closures",
+            "statusBreakdown": {
+                status: {
+                    "count": row['count'],
+                    "offerTotal": float(row['offer_total']),
+                    "finalTotal": float(row['final_total'])
+                }
+                for status, row in breakdown.items()
+            }
         }
     except Exception as e:
         print(f"Error getting opportunity cost data: {e}")
@@ -178,39 +161,18 @@ def _get_opportunity_cost_data_sync() -> Dict[str, Any]:
             "optimizationNeeded": "Data collection needed",
             "roiConversionEfficiency": 0.0,
             "peakTimeMonths": [],
-            "peakDescription": "No data available"
+            "peakDescription": "No data available",
+            "statusBreakdown": {}
         }
 
 # Async wrapper
-get_opportunity_cost_data = sync_to_async(_get_opportunity_cost_data_sync)
+get_opportunity_cost_data = db_async(_get_opportunity_cost_data_sync)
 
-def _get_revenue_growth_data_sync() -> Dict[str, Any]:
-    """Synchronous version of get_revenue_growth_data"""
+def _get_revenue_growth_data_sync(fresh: bool = False) -> Dict[str, Any]:
+    """Synchronous version of get_revenue_growth_data (served from the dashboard rollup)"""
     try:
-        # Get deal data for last 6 months
-        six_months_ago = timezone.now() - timedelta(days=180)
-        recent_deals = Deal.objects.filter(
-            created_at__gte=six_months_ago,
-            status='closed'
-        )
-        
-        monthly_revenue = []
-        for i in range(6):
-            month_start = timezone.now() - timedelta(days=30*(i+1))
-            month_end = timezone.now() - timedelta(days=30*i)
-            month_deals = recent_deals.filter(
-                created_at__gte=month_start,
-                created_at__lt=month_end
-            )
-            monthly_revenue.append(sum([deal.final_price or 0 for deal in month_deals]))
-        
-        monthly_revenue.reverse()  # Oldest to newest
-        
-        return {
-            "revenueData": [float(r) for r in monthly_revenue],
-            "userData": [User.objects.filter(created_at__gte=timezone.now() - timedelta(days=30*i)).count() for i in range(6, 0, -1)],
-            "labels": ["6m ago", "5m ago", "4m ago", "3m ago", "2m ago", "1m ago"]
-        }
+        rollup = get_dashboard_rollup(fresh=fresh)
+        return serialize_revenue_growth(rollup)
     except Exception as e:
         print(f"Error getting revenue growth data: {e}")
         return {
@@ -220,7 +182,7 @@ def _get_revenue_growth_data_sync() -> Dict[str, Any]:
         }
 
 # Async wrapper
-get_revenue_growth_data = sync_to_async(_get_revenue_growth_data_sync)
+get_revenue_growth_data = db_async(_get_revenue_growth_data_sync)
 
 def _get_market_alerts_data_sync() -> List[Dict[str, Any]]:
     """Synchronous version of get_market_alerts_data"""
@@ -268,7 +230,7 @@ def _get_market_alerts_data_sync() -> List[Dict[str, Any]]:
         return []
 
 # Async wrapper
-get_market_alerts_data = sync_to_async(_get_market_alerts_data_sync)
+get_market_alerts_data = db_async(_get_market_alerts_data_sync)
 
 def _get_live_activity_data_sync() -> List[Dict[str, Any]]:
     """Synchronous version of get_live_activity_data"""
@@ -337,7 +299,7 @@ def _get_live_activity_data_sync() -> List[Dict[str, Any]]:
         return []
 
 # Async wrapper
-get_live_activity_data = sync_to_async(_get_live_activity_data_sync)
+get_live_activity_data = db_async(_get_live_activity_data_sync)
 
 def _get_performance_metrics_sync() -> Dict[str, Any]:
     """Synchronous version of get_performance_metrics"""
@@ -378,4 +340,4 @@ def _get_performance_metrics_sync() -> Dict[str, Any]:
         }
 
 # Async wrapper
-get_performance_metrics = sync_to_async(_get_performance_metrics_sync)
+get_performance_metrics = db_async(_get_performance_metrics_sync)
@@ -18,7 +18,7 @@ import django
 import datetime
 import logging
 from pathlib import Path
-from asgiref.sync import sync_to_async
+from app.core.db_executor import db_executor, run_db
 from django.utils import timezone
 import ast
 
@@ -212,9 +212,61 @@ app.add_middleware(
     ]
 )
 
+# ==================== APPLICATION LIFECYCLE ====================
+
+@app.on_event("startup")
+async def start_realtime_backplane():
+    """Start the WebSocket pub/sub backplane for this worker"""
+    from app.api.v1.endpoints.websocket import start_realtime
+    await start_realtime()
+
+@app.on_event("startup")
+async def start_ai_usage_flusher():
+    """Write in-memory AI usage counts to the per-minute metrics rows periodically"""
+    from app.services.ai_service import start_usage_flusher
+    start_usage_flusher()
+
+@app.on_event("shutdown")
+async def close_service_clients():
+    """Close pooled upstream HTTP clients"""
+    from app.services.attom_service import attom_service
+    from app.services.signnow_service import signnow_service
+    from app.services import polygon_service
+    await attom_service.aclose()
+    await signnow_service.aclose()
+    if polygon_service._polygon_service is not None:
+        polygon_service._polygon_service.close()
+
+@app.on_event("shutdown")
+async def stop_realtime_backplane():
+    """Stop the WebSocket backplane and socket writers"""
+    from app.api.v1.endpoints.websocket import stop_realtime
+    await stop_realtime()
+
+@app.on_event("shutdown")
+async def stop_ai_usage_flusher():
+    """Flush pending AI usage counts (runs before the DB executor stops)"""
+    from app.services.ai_service import stop_usage_flusher
+    await stop_usage_flusher()
+
+@app.on_event("shutdown")
+async def stop_db_executor():
+    """Release DB executor threads (each holds a Django connection)"""
+    db_executor.shutdown(wait=False)
+
+@app.on_event("shutdown")
+async def stop_ai_batchers():
+    """Stop the AI micro-batching collectors and their worker threads"""
+    from app.services.ai_service import close_batchers
+    close_batchers()
+
 # Include API router - this will add properly organized endpoints
 # app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# WebSocket endpoints (live activity, user updates, notifications)
+from app.api.v1.endpoints import websocket as websocket_endpoints
+app.include_router(websocket_endpoints.router, prefix="/ws", tags=["WebSocket"])
+
 # ==================== CORE ENDPOINTS ====================
 
 @app.get("/", tags=["Core"])
@@ -259,11 +311,87 @@ async def health_check():
         }
     }
 
+@app.get("/api/metrics/db-executor", tags=["Core"])
+async def get_db_executor_metrics():
+    """
+    **DB Executor Metrics**
+    
+    Reports the load on the thread pool that runs Django ORM calls for async endpoints.
+    
+    **Returns:**
+    - Pool size, jobs queued and jobs in flight
+    - Submitted, completed and failed job counts
+    - Average, p95 and max queue wait, and average run time (ms)
+    - Persistent connection stats: opened, reused, in use and pool saturation
+    """
+    from deelflow.db_pool import pool_metrics
+    data = db_executor.metrics()
+    data["connections"] = pool_metrics(pool_size=db_executor.max_workers)
+    return {"status": "success", "data": data}
+
+@app.get("/api/metrics/ai-batching", tags=["Core"])
+async def get_ai_batching_metrics():
+    """
+    **AI Batching Metrics**
+    
+    Reports how vision, NLP and voice requests are being grouped into model batches.
+    
+    **Returns:**
+    - Per model: batch limits (max_batch, max_wait_ms), workers and queue depth
+    - Submitted requests, batches run and failed batches
+    - Average and p95 batch size, queue wait and batch run time (ms)
+    """
+    from app.services.ai_service import batchers
+    return {
+        "status": "success",
+        "data": {kind: batcher.metrics() for kind, batcher in batchers.items()}
+    }
+
+@app.get("/api/metrics/ai-cache", tags=["Core"])
+async def get_ai_cache_metrics():
+    """
+    **AI Result Cache Metrics**
+    
+    Reports how often vision, NLP and voice requests were answered from stored analyses
+    of identical content instead of running the model again.
+    
+    **Returns:**
+    - In-memory LRU size and capacity
+    - Memory hits, database hits, misses and overall hit rate
+    - Current model version per model (a new version starts a fresh cache)
+    """
+    from django.conf import settings as django_settings
+    from deelflow.ai_cache import ai_cache
+    return {
+        "status": "success",
+        "data": {**ai_cache.stats(), "model_versions": django_settings.AI_MODEL_VERSIONS}
+    }
+
+@app.get("/api/metrics/ai-usage", tags=["Core"])
+async def get_ai_usage_rates(minutes: int = Query(60, ge=1, le=1440, description="Minutes of history")):
+    """
+    **AI Usage Rates**
+    
+    Per-minute vision, NLP and voice request counts from the bucketed metrics rows.
+    Counts reach the database every AI_USAGE_FLUSH_INTERVAL seconds.
+    
+    **Returns:**
+    - For each model: one {bucket_start, count} entry per minute, oldest first
+    - Increments still waiting to be flushed in this worker
+    """
+    from app.services.ai_service import AIService
+    from deelflow.ai_usage import usage_counters
+    return {
+        "status": "success",
+        "data": await AIService().get_usage_rates(minutes),
+        "pending": usage_counters.pending()
+    }
+
 # ==================== DASHBOARD ENDPOINTS ====================
 
 @app.get("/stats", tags=["Dashboard"])
 @app.options("/stats")
-async def get_stats():
+async def get_stats(fresh: bool = Query(False, description="Recompute from source tables instead of the dashboard rollup")):
     """
     **Dashboard Statistics**
     
@@ -275,10 +403,12 @@ async def get_stats():
     - Active users and growth percentage  
     - Properties listed and growth percentage
     - AI conversations count and growth percentage
+    
+    Served from the materialized dashboard rollup; pass `?fresh=1` to bypass it.
     """
     try:
         # Get data from database
-        db_stats = await get_dashboard_stats()
+        db_stats = await get_dashboard_stats(fresh=fresh)
         return {
             'status': 'success',
             'data': {
@@ -988,10 +1118,10 @@ async def get_deal_completions_scheduling():
     }
 
 @app.get("/api/revenue-user-growth-chart-data/", tags=["Dashboard"])
-async def get_revenue_user_growth_chart_data():
+async def get_revenue_user_growth_chart_data(fresh: bool = Query(False, description="Recompute from source tables instead of the dashboard rollup")):
     """Get revenue user growth chart data - Frontend expected endpoint"""
     try:
-        chart_data = await get_revenue_growth_data()
+        chart_data = await get_revenue_growth_data(fresh=fresh)
         return {
             "status": "success",
             "data": {
@@ -1105,7 +1235,15 @@ async def get_recent_activity():
 # ==================== PROPERTY ENDPOINTS (Frontend Compatible) ====================
 
 @app.get("/api/properties/", tags=["Properties"])
-async def get_properties():
+async def get_properties(
+    page: int = Query(1, ge=1, description="Page number (default 1); ignored when cursor is given"),
+    per_page: int = Query(10, ge=1, le=100, description="Items per page (default 10, max 100)"),
+    search: Optional[str] = Query(None, description="Search term for property address or description"),
+    property_type: Optional[str] = Query(None, description="Filter by property type"),
+    min_price: Optional[float] = Query(None, description="Minimum price filter"),
+    max_price: Optional[float] = Query(None, description="Maximum price filter"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor")
+):
     """
     **Get Properties List**
     
@@ -1118,44 +1256,100 @@ async def get_properties():
     - property_type: Filter by property type
     - min_price: Minimum price filter
     - max_price: Maximum price filter
+    - cursor: Opaque keyset cursor; pass `next_cursor` from the previous page
     
     **Returns:**
     - Paginated list of properties
     - Total count and pagination metadata
     - Property details including address, price, type, status
+    - next_cursor: Cursor for the following page (null on the last page)
+    
+    **Notes:**
+    - Results are ordered newest first on (created_at, id).
+    - Cursor pages cost the same as page 1; `total` is only computed for
+      non-cursor requests and is null when following a cursor.
     """
     try:
         from deelflow.models import Property
+        from django.db.models import Q
+        from app.core.pagination import encode_cursor, keyset_after, InvalidCursor
+        
+        fields = (
+            "id", "address", "city", "state", "zipcode", "property_type",
+            "bedrooms", "bathrooms", "square_feet", "lot_size", "year_built",
+            "price", "description", "images", "status", "created_at", "updated_at",
+        )
+        
+        qs = Property.objects.all()
+        if search:
+            qs = qs.filter(Q(address__icontains=search) | Q(description__icontains=search))
+        if property_type:
+            qs = qs.filter(property_type__iexact=property_type)
+        if min_price is not None:
+            qs = qs.filter(price__gte=min_price)
+        if max_price is not None:
+            qs = qs.filter(price__lte=max_price)
+        
+        total = None
+        if cursor:
+            try:
+                page_qs = keyset_after(qs, cursor)
+            except InvalidCursor as e:
+                return {
+                    "status": "error",
+                    "message": str(e),
+                    "data": [],
+                    "total": 0,
+                    "page": page,
+                    "limit": per_page,
+                    "next_cursor": None
+                }
+            offset = 0
+        else:
+            page_qs = qs
+            offset = (page - 1) * per_page
+            total = await run_db(qs.count)
         
-        properties = await sync_to_async(list)(Property.objects.all())
+        # Fetch one extra row to know whether another page exists
+        page_qs = page_qs.order_by("-created_at", "-id").values(*fields)
+        rows = await run_db(list, page_qs[offset:offset + per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
         
         property_data = []
-        for property in properties:
+        for row in rows:
             property_data.append({
-                "id": property.id,
-                "address": property.address,
-                "city": property.city,
-                "state": property.state,
-                "zipcode": property.zipcode,
-                "property_type": property.property_type,
-                "bedrooms": property.bedrooms,
-                "bathrooms": property.bathrooms,
-                "square_feet": property.square_feet,
-                "lot_size": property.lot_size,
-                "year_built": property.year_built,
-                "price": float(property.price) if property.price else None,
-                "description": property.description,
-                "images": property.images,
-                "status": property.status,
-                "created_at": property.created_at.isoformat(),
-                "updated_at": property.updated_at.isoformat()
+                "id": row["id"],
+                "address": row["address"],
+                "city": row["city"],
+                "state": row["state"],
+                "zipcode": row["zipcode"],
+                "property_type": row["property_type"],
+                "bedrooms": row["bedrooms"],
+                "bathrooms": row["bathrooms"],
+                "square_feet": row["square_feet"],
+                "lot_size": row["lot_size"],
+                "year_built": row["year_built"],
+                "price": float(row["price"]) if row["price"] else None,
+                "description": row["description"],
+                "images": row["images"],
+                "status": row["status"],
+                "created_at": row["created_at"].isoformat(),
+                "updated_at": row["updated_at"].isoformat()
             })
+        
+        next_cursor = None
+        if has_next and rows:
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        
         return {
             "status": "success",
             "data": property_data,
-            "total": len(property_data),
-            "page": 1,
-            "limit": 20
+            "total": total,
+            "page": page,
+            "limit": per_page,
+            "has_next": has_next,
+            "next_cursor": next_cursor
         }
     except Exception as e:
             return {
@@ -1163,8 +1357,9 @@ async def get_properties():
             "message": f"Failed to retrieve properties: {str(e)}",
             "data": [],
             "total": 0,
-            "page": 1,
-            "limit": 20
+            "page": page,
+            "limit": per_page,
+            "next_cursor": None
         }
 
 @app.post("/api/properties/", tags=["Properties"])
@@ -1174,7 +1369,7 @@ async def create_property(property_data: PropertyCreate):
         from deelflow.models import Property
         
         # Create property in Django database
-        property = await sync_to_async(Property.objects.create)(
+        property = await run_db(Property.objects.create,
             address=property_data.street_address,
             unit_apt=property_data.unit_apt,
             city=property_data.city,
@@ -1318,7 +1513,7 @@ async def get_property(property_id: int):
     try:
         from deelflow.models import Property
         
-        property = await sync_to_async(Property.objects.get)(id=property_id)
+        property = await run_db(Property.objects.get, id=property_id)
         return {
         "status": "success",
         "data": {
@@ -1465,7 +1660,7 @@ async def update_property(property_id: int, property_data: PropertyUpdate):
     try:
         from deelflow.models import Property
         
-        property = await sync_to_async(Property.objects.get)(id=property_id)
+        property = await run_db(Property.objects.get, id=property_id)
         
         # Update property fields with proper type conversion (matching POST endpoint)
         if property_data.street_address is not None:
@@ -1511,7 +1706,7 @@ async def update_property(property_id: int, property_data: PropertyUpdate):
         if property_data.status is not None:
             property.status = property_data.status
         
-        await sync_to_async(property.save)()
+        await run_db(property.save)
         return {
             "status": "success",
             "message": "Property updated successfully",
@@ -1560,8 +1755,8 @@ async def delete_property(property_id: int):
     try:
         from deelflow.models import Property
         
-        property = await sync_to_async(Property.objects.get)(id=property_id)
-        await sync_to_async(property.delete)()
+        property = await run_db(Property.objects.get, id=property_id)
+        await run_db(property.delete)
         return {
         "status": "success",
             "message": "Property deleted successfully"
@@ -1583,7 +1778,7 @@ async def get_property_ai_analysis(property_id: int):
     try:
         from deelflow.models import Property
         
-        property = await sync_to_async(Property.objects.get)(id=property_id)
+        property = await run_db(Property.objects.get, id=property_id)
         
         # Mock AI analysis (replace with actual AI service)
         ai_analysis = {
@@ -1648,7 +1843,7 @@ async def get_property_save(property_save_id: int):
     try:
         from deelflow.models import SavedProperty
         
-        property_save = await sync_to_async(SavedProperty.objects.get)(id=property_save_id)
+        property_save = await run_db(SavedProperty.objects.get, id=property_save_id)
         return {
             "status": "success",
             "data": {
@@ -1686,11 +1881,11 @@ async def create_property_save(property_save_data: dict):
             }
         
         # Get property and user objects
-        property_obj = await sync_to_async(Property.objects.get)(id=property_id)
-        user_obj = await sync_to_async(User.objects.get)(id=user_id)
+        property_obj = await run_db(Property.objects.get, id=property_id)
+        user_obj = await run_db(User.objects.get, id=user_id)
         
         # Create saved property
-        saved_property = await sync_to_async(SavedProperty.objects.create)(
+        saved_property = await run_db(SavedProperty.objects.create,
             property=property_obj,
             user=user_obj
         )
@@ -1727,13 +1922,13 @@ async def update_property_save(property_save_id: int, property_save_data: dict):
     try:
         from deelflow.models import PropertySave
         
-        property_save = await sync_to_async(PropertySave.objects.get)(id=property_save_id)
+        property_save = await run_db(PropertySave.objects.get, id=property_save_id)
         
         # Update fields
         if "notes" in property_save_data:
             property_save.notes = property_save_data["notes"]
         
-        await sync_to_async(property_save.save)()
+        await run_db(property_save.save)
         return {
             "status": "success",
             "message": "Property save updated successfully",
@@ -1813,7 +2008,7 @@ async def search_attom_properties(
     try:
         from app.services.attom_service import attom_service
         
-        result = attom_service.search_properties(
+        result = await attom_service.search_properties(
             address=address,
             city=city,
             state=state,
@@ -1864,7 +2059,7 @@ async def properties_search(
     """
     try:
         from app.services.attom_service import attom_service
-        return attom_service.search_properties(
+        return await attom_service.search_properties(
             address=address,
             city=city,
             state=state,
@@ -1904,7 +2099,7 @@ async def get_attom_property_details(property_id: str):
     try:
         from app.services.attom_service import attom_service
         
-        result = attom_service.get_property_details(property_id)
+        result = await attom_service.get_property_details(property_id)
         return result
         
     except Exception as e:
@@ -1920,7 +2115,7 @@ async def properties_details(property_id: str):
     """
     try:
         from app.services.attom_service import attom_service
-        return attom_service.get_property_details(property_id)
+        return await attom_service.get_property_details(property_id)
     except Exception as e:
         return {
             "status": "error",
@@ -1965,225 +2160,26 @@ async def get_combined_properties(
 
     Returns:
     - status: "success" or "error"
-    - data: { properties, total, page, limit, has_next, has_prev }
+    - data: { properties, total, page, limit, has_next, has_prev, sources }
       - properties: list of unified items with normalized top-level fields and optional `raw`
+      - sources: {internal, attom} each "ok", "error" or "timeout"
 
     Notes:
     - Deduplicates by canonical address (street+city+state+zip), preferring internal rows and merging ATTOM raw data.
+    - Both sources are queried concurrently; one that misses COMBINED_FETCH_DEADLINE or fails is left out.
     - If ATTOM returns a location input error, internal results are still returned.
     """
     try:
-        from typing import Dict, Any
-        from datetime import datetime, timezone
-        from app.services.attom_service import attom_service
-        from django.db.models import Q
-        from asgiref.sync import sync_to_async
-        from deelflow.models import Property
-
-        def normalize_internal(p: Any) -> Dict[str, Any]:
-            return {
-                "id": f"src:internal:{p.id}",
-                "source": "internal",
-                "source_id": str(p.id),
-                "attribution": "Internal",
-                "street_address": getattr(p, "address", "") or "",
-                "unit_apt": getattr(p, "unit_apt", "") or "",
-                "city": getattr(p, "city", "") or "",
-                "state": getattr(p, "state", "") or "",
-                "zip_code": getattr(p, "zipcode", "") or "",
-                "county": getattr(p, "county", "") or "",
-                "property_type": getattr(p, "property_type", "") or "",
-                "bedrooms": p.bedrooms if getattr(p, "bedrooms", None) is not None else None,
-                "bathrooms": p.bathrooms if getattr(p, "bathrooms", None) is not None else None,
-                "square_feet": p.square_feet if getattr(p, "square_feet", None) is not None else None,
-                "lot_size": p.lot_size if getattr(p, "lot_size", None) is not None else None,
-                "year_built": p.year_built if getattr(p, "year_built", None) is not None else None,
-                "purchase_price": p.price if getattr(p, "price", None) is not None else None,
-                "arv": p.arv if getattr(p, "arv", None) is not None else None,
-                "repair_estimate": p.repair_estimate if getattr(p, "repair_estimate", None) is not None else None,
-                "holding_costs": p.holding_costs if getattr(p, "holding_costs", None) is not None else None,
-                "transaction_type": getattr(p, "transaction_type", None),
-                "assignment_fee": p.assignment_fee if getattr(p, "assignment_fee", None) is not None else None,
-                "description": getattr(p, "description", "") or "",
-                "seller_notes": getattr(p, "seller_notes", "") or "",
-                "images": [],
-                "status": getattr(p, "status", "available") or "available",
-                "created_at": getattr(p, "created_at", datetime.now(timezone.utc)).isoformat(),
-                "updated_at": getattr(p, "updated_at", datetime.now(timezone.utc)).isoformat(),
-                "raw": {"internal": {
-                    "id": p.id,
-                    "address": getattr(p, "address", None),
-                    "unit_apt": getattr(p, "unit_apt", None),
-                    "city": getattr(p, "city", None),
-                    "state": getattr(p, "state", None),
-                    "zipcode": getattr(p, "zipcode", None),
-                    "county": getattr(p, "county", None),
-                    "property_type": getattr(p, "property_type", None),
-                    "bedrooms": getattr(p, "bedrooms", None),
-                    "bathrooms": getattr(p, "bathrooms", None),
-                    "square_feet": getattr(p, "square_feet", None),
-                    "lot_size": getattr(p, "lot_size", None),
-                    "year_built": getattr(p, "year_built", None),
-                    "price": getattr(p, "price", None),
-                    "arv": getattr(p, "arv", None),
-                    "repair_estimate": getattr(p, "repair_estimate", None),
-                    "holding_costs": getattr(p, "holding_costs", None),
-                    "transaction_type": getattr(p, "transaction_type", None),
-                    "assignment_fee": getattr(p, "assignment_fee", None),
-                    "description": getattr(p, "description", None),
-                    "seller_notes": getattr(p, "seller_notes", None),
-                    "status": getattr(p, "status", None),
-                }}
-            }
-
-        def normalize_attom(item: Dict[str, Any]) -> Dict[str, Any]:
-            # Expect our attom_service to already return normalized basic fields; still guard with .get
-            now_iso = datetime.now(timezone.utc).isoformat()
-            return {
-                "id": f"src:attom:{item.get('id')}",
-                "source": "attom",
-                "source_id": str(item.get("id")),
-                "attribution": "ATTOM Data Solutions",
-                "street_address": item.get("street_address") or "",
-                "unit_apt": item.get("unit_apt") or "",
-                "city": item.get("city") or "",
-                "state": item.get("state") or "",
-                "zip_code": item.get("zip_code") or "",
-                "county": item.get("county") or "",
-                "property_type": item.get("property_type") or "",
-                "bedrooms": item.get("bedrooms", None),
-                "bathrooms": item.get("bathrooms", None),
-                "square_feet": item.get("square_feet", None),
-                "lot_size": item.get("lot_size", None),
-                "year_built": item.get("year_built", None) or None,
-                # Internal-only finance fields default to None for ATTOM rows
-                "purchase_price": None,
-                "arv": None,
-                "repair_estimate": None,
-                "holding_costs": None,
-                "transaction_type": None,
-                "assignment_fee": None,
-                "description": item.get("property_description", "") or "",
-                "seller_notes": item.get("seller_notes", "") or "",
-                "images": item.get("images", []) or [],
-                "status": item.get("status", "available") or "available",
-                "created_at": item.get("created_at") or now_iso,
-                "updated_at": item.get("updated_at") or now_iso,
-                "raw": {"attom": item}
-            }
-
-        # 1) Internal DB fetch with filters (basic search on address/city/state)
-        async def fetch_internal() -> Any:
-            qs = Property.objects.all()
-            if search:
-                qs = qs.filter(
-                    Q(address__icontains=search) |
-                    Q(city__icontains=search) |
-                    Q(state__icontains=search)
-                )
-            if property_type:
-                qs = qs.filter(property_type__iexact=property_type)
-            if min_price is not None:
-                qs = qs.filter(price__gte=min_price)
-            if max_price is not None:
-                qs = qs.filter(price__lte=max_price)
-            return await sync_to_async(list)(qs[:1000])  # cap to reasonable size pre-merge
-
-        # 2) ATTOM fetch (location-based; require zipcode OR coordinates to avoid 400)
-        def fetch_attom() -> Dict[str, Any]:
-            return attom_service.search_properties(
-                address=None, city=city, state=state, zipcode=zipcode,
-                property_type=property_type, min_price=min_price, max_price=max_price,
-                min_sqft=None, max_sqft=None, bedrooms=None, bathrooms=None,
-                limit=50, latitude=latitude, longitude=longitude, radius=radius
-            )
-
-        internal_list, attom_result = await sync_to_async(lambda: None)(), None
-        # fetch internal (await) and attom (sync) sequentially to keep simple and safe
-        internal_list = await fetch_internal()
-        attom_result = fetch_attom()
-
-        # Normalize internal
-        unified: list = [normalize_internal(p) for p in internal_list]
-
-        # Normalize ATTOM if success
-        if isinstance(attom_result, dict) and attom_result.get("status") == "success":
-            # attom_service returns either list under data or direct list; handle both
-            attom_data = attom_result.get("data")
-            attom_list = []
-            if isinstance(attom_data, list):
-                attom_list = attom_data
-            elif isinstance(attom_data, dict):
-                # common: { properties: [...] }
-                for key in ("properties", "results", "items"):
-                    if isinstance(attom_data.get(key), list):
-                        attom_list = attom_data.get(key)
-                        break
-            for item in attom_list:
-                if isinstance(item, dict):
-                    unified.append(normalize_attom(item))
-        else:
-            # If ATTOM fails due to missing location input, continue with internal only
-            pass
-
-        # Optional dedup by canonical address key; prefer internal
-        def address_key(row: Dict[str, Any]) -> str:
-            return "|".join([
-                (row.get("street_address") or "").strip().upper(),
-                (row.get("city") or "").strip().upper(),
-                (row.get("state") or "").strip().upper(),
-                (row.get("zip_code") or "").strip().upper(),
-            ])
-
-        seen = {}
-        deduped = []
-        for row in unified:
-            key = address_key(row)
-            if not key:
-                deduped.append(row)
-                continue
-            if key not in seen:
-                seen[key] = row
-                deduped.append(row)
-            else:
-                # merge raw data if duplicate (keep internal-preferred already ordered)
-                existing = seen[key]
-                if row.get("source") == "attom":
-                    raw = existing.setdefault("raw", {})
-                    raw["attom"] = row.get("raw", {}).get("attom")
-                else:
-                    raw = existing.setdefault("raw", {})
-                    raw["internal_duplicate"] = row.get("raw", {}).get("internal")
-
-        # Sort stable: internal first, then ATTOM; then by city/street
-        deduped.sort(key=lambda r: (
-            0 if r.get("source") == "internal" else 1,
-            (r.get("city") or ""),
-            (r.get("street_address") or "")
-        ))
-
-        # Pagination after merge
-        total = len(deduped)
-        page = max(1, page)
-        limit = max(1, min(100, limit))
-        start = (page - 1) * limit
-        end = start + limit
-        page_items = deduped[start:end]
-
-        if not include_raw:
-            for row in page_items:
-                row.pop("raw", None)
+        from app.services.combined_property_service import combined_property_service
 
+        data = await combined_property_service.search(
+            page=page, limit=limit, search=search, property_type=property_type,
+            min_price=min_price, max_price=max_price, zipcode=zipcode, city=city, state=state,
+            latitude=latitude, longitude=longitude, radius=radius, include_raw=include_raw
+        )
         return {
             "status": "success",
-            "data": {
-                "properties": page_items,
-                "total": total,
-                "page": page,
-                "limit": limit,
-                "has_next": end < total,
-                "has_prev": start > 0
-            }
+            "data": data
         }
     except Exception as e:
         return {
@@ -2218,7 +2214,6 @@ async def list_users(
     try:
         from deelflow.models import User
         from django.db.models import Q
-        from asgiref.sync import sync_to_async
 
         qs = User.objects.all().order_by("-id")
         if search:
@@ -2233,10 +2228,10 @@ async def list_users(
         # Pagination
         page = max(1, page)
         limit = max(1, min(100, limit))
-        total = await sync_to_async(qs.count)()
+        total = await run_db(qs.count)
         start = (page - 1) * limit
         end = start + limit
-        users = await sync_to_async(list)(qs[start:end])
+        users = await run_db(list, qs[start:end])
 
         def serialize(u):
             return {
@@ -2285,7 +2280,7 @@ async def get_attom_market_trends(city: str, state: str):
     try:
         from app.services.attom_service import attom_service
         
-        result = attom_service.get_market_trends(city, state)
+        result = await attom_service.get_market_trends(city, state)
         return result
         
     except Exception as e:
@@ -2398,7 +2393,7 @@ async def get_campaigns():
     """
     try:
         from deelflow.models import Campaign
-        campaigns = await sync_to_async(list)(Campaign.objects.all())
+        campaigns = await run_db(list, Campaign.objects.all())
         
         campaign_data = []
         for campaign in campaigns:
@@ -2598,7 +2593,7 @@ async def get_campaign(campaign_id: int):
         from deelflow.models import Campaign
         import ast
         
-        campaign = await sync_to_async(Campaign.objects.get)(id=campaign_id)
+        campaign = await run_db(Campaign.objects.get, id=campaign_id)
         
         # Normalize fields stored as strings in DB
         try:
@@ -2748,7 +2743,7 @@ async def create_campaign(campaign_data: CampaignCreate):
         
         from django.utils import timezone
         
-        campaign = await sync_to_async(Campaign.objects.create)(
+        campaign = await run_db(Campaign.objects.create,
             name=campaign_data.name,
             campaign_type=campaign_data.campaign_type,
             channel=channel,
@@ -2831,7 +2826,7 @@ async def update_campaign(campaign_id: int, campaign_data: CampaignUpdate):
     try:
         from deelflow.models import Campaign
         
-        campaign = await sync_to_async(Campaign.objects.get)(id=campaign_id)
+        campaign = await run_db(Campaign.objects.get, id=campaign_id)
         
         # Update campaign fields with proper handling for special fields
         update_data = campaign_data.dict(exclude_unset=True)
@@ -2891,7 +2886,7 @@ async def update_campaign(campaign_id: int, campaign_data: CampaignUpdate):
             if hasattr(campaign, field):
                 setattr(campaign, field, value)
         
-        await sync_to_async(campaign.save)()
+        await run_db(campaign.save)
         return {
             "status": "success",
         "message": "Campaign updated successfully",
@@ -2919,8 +2914,8 @@ async def delete_campaign(campaign_id: int):
     try:
         from deelflow.models import Campaign
         
-        campaign = await sync_to_async(Campaign.objects.get)(id=campaign_id)
-        await sync_to_async(campaign.delete)()
+        campaign = await run_db(Campaign.objects.get, id=campaign_id)
+        await run_db(campaign.delete)
         return {
         "status": "success",
             "message": "Campaign deleted successfully"
@@ -2959,7 +2954,7 @@ async def get_active_campaign_summary():
     """Get active campaign summary - Frontend compatible endpoint"""
     try:
         from deelflow.models import Campaign
-        active_campaigns = await sync_to_async(list)(Campaign.objects.filter(status="active"))
+        active_campaigns = await run_db(list, Campaign.objects.filter(status="active"))
         return {
         "status": "success",
         "data": {
@@ -3055,7 +3050,7 @@ async def get_leads():
     try:
         from deelflow.models import Lead
         
-        leads = await sync_to_async(list)(Lead.objects.all())
+        leads = await run_db(list, Lead.objects.all())
         
         lead_data = []
         for lead in leads:
@@ -3104,7 +3099,7 @@ async def create_lead(lead_data: LeadCreate):
         from deelflow.models import Lead
         
         # Create lead in Django database
-        lead = await sync_to_async(Lead.objects.create)(
+        lead = await run_db(Lead.objects.create,
             name=f"{lead_data.first_name} {lead_data.last_name}",
             email=lead_data.email,
             phone=lead_data.phone,
@@ -3152,7 +3147,7 @@ async def get_lead(lead_id: int):
     try:
         from deelflow.models import Lead
         
-        lead = await sync_to_async(Lead.objects.get)(id=lead_id)
+        lead = await run_db(Lead.objects.get, id=lead_id)
         
         # Split name into first_name and last_name
         name_parts = lead.name.split(" ", 1) if lead.name else ["", ""]
@@ -3203,7 +3198,7 @@ async def update_lead(lead_id: int, lead_data: LeadUpdate):
     try:
         from deelflow.models import Lead
         
-        lead = await sync_to_async(Lead.objects.get)(id=lead_id)
+        lead = await run_db(Lead.objects.get, id=lead_id)
         update_data = lead_data.dict(exclude_unset=True)
         
         # Handle name field separately (combine first_name and last_name)
@@ -3234,7 +3229,7 @@ async def update_lead(lead_id: int, lead_data: LeadUpdate):
             if frontend_field in update_data:
                 setattr(lead, backend_field, update_data[frontend_field])
         
-        await sync_to_async(lead.save)()
+        await run_db(lead.save)
         
         # Return updated data
         name_parts = lead.name.split(" ", 1) if lead.name else ["", ""]
@@ -3275,8 +3270,8 @@ async def delete_lead(lead_id: int):
     try:
         from deelflow.models import Lead
         
-        lead = await sync_to_async(Lead.objects.get)(id=lead_id)
-        await sync_to_async(lead.delete)()
+        lead = await run_db(Lead.objects.get, id=lead_id)
+        await run_db(lead.delete)
         return {
         "status": "success",
             "message": "Lead deleted successfully"
@@ -3298,7 +3293,7 @@ async def get_lead_ai_score(lead_id: int):
     try:
         from deelflow.models import Lead
         
-        lead = await sync_to_async(Lead.objects.get)(id=lead_id)
+        lead = await run_db(Lead.objects.get, id=lead_id)
         
         # Mock AI score calculation
         ai_score = {
@@ -3353,12 +3348,11 @@ async def login(login_data: LoginRequest):
     """
     try:
         from deelflow.models import User
-        from app.core.security import check_password, create_access_token
-        from django.contrib.auth.hashers import check_password as django_check_password
+        from app.core.security import check_password_async, create_access_token, PasswordHashingBusy
         
         # Check if user exists
         try:
-            user = await sync_to_async(User.objects.get)(email=login_data.email)
+            user = await run_db(User.objects.get, email=login_data.email)
         except User.DoesNotExist:
             return {
                 "status": "error",
@@ -3366,13 +3360,25 @@ async def login(login_data: LoginRequest):
                 "error_code": "EMAIL_NOT_FOUND"
             }
         
-        # Verify password
-        if not django_check_password(login_data.password, user.password):
+        # Verify password on the hashing pool (keeps PBKDF2 off the event loop)
+        try:
+            password_ok, upgraded_hash = await check_password_async(login_data.password, user.password)
+        except PasswordHashingBusy as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "error_code": "LOGIN_BUSY"
+            }
+        if not password_ok:
             return {
                 "status": "error",
                 "message": "Invalid email or password"
             }
         
+        # Hasher settings changed since this hash was made: store the upgraded hash
+        if upgraded_hash:
+            await run_db(User.objects.filter(id=user.id).update, password=upgraded_hash)
+        
         # Check if user is active
         if not user.is_active:
             return {
@@ -3441,12 +3447,12 @@ async def register(register_data: RegisterRequest):
     """
     try:
         from deelflow.models import User, Organization
-        from app.core.security import hash_password, create_access_token
+        from app.core.security import hash_password_async, create_access_token
         import uuid
         
         # Check if email already exists
-        existing_user = await sync_to_async(User.objects.filter)(email=register_data.email)
-        if await sync_to_async(existing_user.exists)():
+        existing_user = await run_db(User.objects.filter, email=register_data.email)
+        if await run_db(existing_user.exists):
             return {
                 "status": "error",
                 "message": "Email already registered. Please sign in.",
@@ -3470,14 +3476,14 @@ async def register(register_data: RegisterRequest):
             base = slugify(base_slug)
             candidate = base
             suffix = 1
-            while await sync_to_async(Organization.objects.filter(slug=candidate).exists)():
+            while await run_db(Organization.objects.filter(slug=candidate).exists):
                 suffix += 1
                 candidate = f"{base}-{suffix}"
             return candidate
 
         if organization_id:
             try:
-                organization = await sync_to_async(Organization.objects.get)(id=organization_id)
+                organization = await run_db(Organization.objects.get, id=organization_id)
             except Organization.DoesNotExist:
                 # Fall back to creating from payload or default
                 desired_name = org_payload.get("name") if isinstance(org_payload, dict) else None
@@ -3485,7 +3491,7 @@ async def register(register_data: RegisterRequest):
                 name = desired_name or f"{register_data.first_name}'s Organization"
                 slug_base = desired_slug or slugify(name) or f"{register_data.first_name.lower()}-org"
                 unique_slug = await generate_unique_slug(slug_base)
-                organization = await sync_to_async(Organization.objects.create)(
+                organization = await run_db(Organization.objects.create,
                     name=name,
                     slug=unique_slug,
                     subscription_status=(org_payload.get("subscription_status") if isinstance(org_payload, dict) else "trial") or "trial",
@@ -3498,17 +3504,17 @@ async def register(register_data: RegisterRequest):
             slug_base = desired_slug or slugify(name) or f"{register_data.first_name.lower()}-org"
             # If slug exists, generate a unique one instead of failing
             unique_slug = await generate_unique_slug(slug_base)
-            organization = await sync_to_async(Organization.objects.create)(
+            organization = await run_db(Organization.objects.create,
                 name=name,
                 slug=unique_slug,
                 subscription_status=(org_payload.get("subscription_status") if isinstance(org_payload, dict) else "trial") or "trial",
             )
         
         # Hash password
-        hashed_password = hash_password(register_data.password)
+        hashed_password = await hash_password_async(register_data.password)
         
         # Create user
-        user = await sync_to_async(User.objects.create)(
+        user = await run_db(User.objects.create,
             email=register_data.email,
             first_name=register_data.first_name,
             last_name=register_data.last_name,
@@ -3612,7 +3618,7 @@ async def get_roles(page: int = 1, limit: int = 20):
         
         # Get all roles
         roles_queryset = Role.objects.all().prefetch_related('permissions')
-        roles_list = await sync_to_async(list)(roles_queryset)
+        roles_list = await run_db(list, roles_queryset)
         
         # Paginate
         paginator = Paginator(roles_list, limit)
@@ -3660,13 +3666,13 @@ async def get_role_stats():
         from deelflow.models import Role, Permission, User, Organization
         
         # Get counts
-        total_roles = await sync_to_async(Role.objects.count)()
-        total_permissions = await sync_to_async(Permission.objects.count)()
-        total_users = await sync_to_async(User.objects.count)()
-        total_tenants = await sync_to_async(Organization.objects.count)()
+        total_roles = await run_db(Role.objects.count)
+        total_permissions = await run_db(Permission.objects.count)
+        total_users = await run_db(User.objects.count)
+        total_tenants = await run_db(Organization.objects.count)
         
         # Get active tenants (non-suspended)
-        active_tenants = await sync_to_async(Organization.objects.exclude(subscription_status='suspended').count)()
+        active_tenants = await run_db(Organization.objects.exclude(subscription_status='suspended').count)
         
         # Calculate active tenant percentage
         active_tenant_percentage = (active_tenants / total_tenants * 100) if total_tenants > 0 else 0
@@ -3694,15 +3700,15 @@ async def get_role(role_id: int):
         from deelflow.models import Role, Permission
         
         # Fetch the role and its assigned permissions
-        role = await sync_to_async(Role.objects.prefetch_related('permissions').get)(id=role_id)
-        role_permissions = await sync_to_async(list)(role.permissions.values_list('id', flat=True))
+        role = await run_db(Role.objects.prefetch_related('permissions').get, id=role_id)
+        role_permissions = await run_db(list, role.permissions.values_list('id', flat=True))
 
         # Fetch all permissions
-        all_permissions = await sync_to_async(list)(Permission.objects.all())
+        all_permissions = await run_db(list, Permission.objects.all())
 
-        # Get permissions using sync_to_async
+        # Get permissions on the DB executor
         permissions_data = []
-        #permissions_list = await sync_to_async(list)(role.permissions.all())
+        #permissions_list = await run_db(list, role.permissions.all())
         for perm in all_permissions:
             permissions_data.append({
                 "id": perm.id,
@@ -3813,6 +3819,7 @@ async def create_role(role_data: dict):
     """
     try:
         from deelflow.models import Role, Permission
+        from app.services.permission_matrix import invalidate_permission_matrix
         
         # Extract data from dict
         name = role_data.get("name")
@@ -3826,15 +3833,15 @@ async def create_role(role_data: dict):
             }
         
         # Check if role already exists
-        existing_role = await sync_to_async(Role.objects.filter)(name=name)
-        if await sync_to_async(existing_role.exists)():
+        existing_role = await run_db(Role.objects.filter, name=name)
+        if await run_db(existing_role.exists):
             return {
                 "status": "error",
                 "message": "Role with this name already exists"
             }
         
         # Create role
-        role = await sync_to_async(Role.objects.create)(
+        role = await run_db(Role.objects.create,
             name=name,
             label=label
         )
@@ -3849,11 +3856,13 @@ async def create_role(role_data: dict):
         
         # Add permissions if provided
         if permission_ids:
-            permissions = await sync_to_async(list)(Permission.objects.filter(id__in=permission_ids))
-            await sync_to_async(role.permissions.set)(permissions)
+            permissions = await run_db(list, Permission.objects.filter(id__in=permission_ids))
+            await run_db(role.permissions.set, permissions)
+        
+        invalidate_permission_matrix()
         
         # Get the role with permissions for response
-        role = await sync_to_async(Role.objects.prefetch_related('permissions').get)(id=role.id)
+        role = await run_db(Role.objects.prefetch_related('permissions').get, id=role.id)
         
         # Get permissions data
         permissions_response = []
@@ -3887,15 +3896,15 @@ async def update_role(role_id: int, role_data: dict):
     """Update a role by ID"""
     try:
         from deelflow.models import Role, Permission
-        from asgiref.sync import sync_to_async
+        from app.services.permission_matrix import invalidate_permission_matrix
 
         # Get role
-        role = await sync_to_async(lambda: Role.objects.get(id=role_id))()
+        role = await run_db(lambda: Role.objects.get(id=role_id))
 
         # Update name if provided
         if "name" in role_data:
-            existing_role = await sync_to_async(lambda: Role.objects.filter(name=role_data["name"]).exclude(id=role_id))()
-            if await sync_to_async(existing_role.exists)():
+            existing_role = await run_db(lambda: Role.objects.filter(name=role_data["name"]).exclude(id=role_id))
+            if await run_db(existing_role.exists):
                 return {"status": "error", "message": "Role with this name already exists"}
             role.name = role_data["name"]
 
@@ -3903,7 +3912,7 @@ async def update_role(role_id: int, role_data: dict):
         if "label" in role_data:
             role.label = role_data["label"]
 
-        await sync_to_async(role.save)()
+        await run_db(role.save)
 
         # Update permissions
         if "permissions" in role_data:
@@ -3911,14 +3920,16 @@ async def update_role(role_id: int, role_data: dict):
                 perm["id"] for perm in role_data["permissions"] if perm.get("status", False)
             ]
             if permission_ids:
-                permissions = await sync_to_async(lambda: list(Permission.objects.filter(id__in=permission_ids)))()
-                await sync_to_async(role.permissions.set)(permissions)
+                permissions = await run_db(lambda: list(Permission.objects.filter(id__in=permission_ids)))
+                await run_db(role.permissions.set, permissions)
             else:
-                await sync_to_async(role.permissions.clear)()
+                await run_db(role.permissions.clear)
+
+        invalidate_permission_matrix()
 
         # Fetch updated role with permissions
-        role = await sync_to_async(lambda: Role.objects.prefetch_related("permissions").get(id=role_id))()
-        permissions_list = await sync_to_async(list)(role.permissions.all())
+        role = await run_db(lambda: Role.objects.prefetch_related("permissions").get(id=role_id))
+        permissions_list = await run_db(list, role.permissions.all())
 
         permissions_data = [
             {"id": perm.id, "name": perm.name, "label": perm.label} for perm in permissions_list
@@ -3950,13 +3961,13 @@ async def update_role(role_id: int, role_data: dict):
 #         from deelflow.models import Role, Permission
         
 #         # Get role
-#         role = await sync_to_async(Role.objects.get)(id=role_id)
+#         role = await run_db(Role.objects.get, id=role_id)
         
 #         # Update fields if provided
 #         if "name" in role_data:
 #             # Check if new name already exists (excluding current role)
-#             existing_role = await sync_to_async(Role.objects.filter)(name=role_data["name"]).exclude(id=role_id)
-#             if await sync_to_async(existing_role.exists)():
+#             existing_role = await run_db(Role.objects.filter, name=role_data["name"]).exclude(id=role_id)
+#             if await run_db(existing_role.exists):
 #                 return {
 #                     "status": "error",
 #                     "message": "Role with this name already exists"
@@ -3966,7 +3977,7 @@ async def update_role(role_id: int, role_data: dict):
 #         if "label" in role_data:
 #             role.label = role_data["label"]
         
-#         await sync_to_async(role.save)()
+#         await run_db(role.save)
         
 #         # Update permissions if provided
 #         if "permissions" in role_data:
@@ -3981,20 +3992,20 @@ async def update_role(role_id: int, role_data: dict):
 #                             permission_ids.append(perm["id"])
             
 #             if permission_ids:
-#                 permissions = await sync_to_async(list)(Permission.objects.filter(id__in=permission_ids))
-#                 await sync_to_async(role.permissions.set)(permissions)
+#                 permissions = await run_db(list, Permission.objects.filter(id__in=permission_ids))
+#                 await run_db(role.permissions.set, permissions)
 #             else:
-#                 await sync_to_async(role.permissions.clear)()
+#                 await run_db(role.permissions.clear)
 #         elif "permission_ids" in role_data:
 #             permission_ids = role_data["permission_ids"]
 #             if permission_ids:
-#                 permissions = await sync_to_async(list)(Permission.objects.filter(id__in=permission_ids))
-#                 await sync_to_async(role.permissions.set)(permissions)
+#                 permissions = await run_db(list, Permission.objects.filter(id__in=permission_ids))
+#                 await run_db(role.permissions.set, permissions)
 #             else:
-#                 await sync_to_async(role.permissions.clear)()
+#                 await run_db(role.permissions.clear)
         
 #         # Get the updated role with permissions
-#         role = await sync_to_async(Role.objects.prefetch_related('permissions').get)(id=role.id)
+#         role = await run_db(Role.objects.prefetch_related('permissions').get, id=role.id)
         
 #         # Get permissions data
 #         permissions_data = []
@@ -4032,9 +4043,11 @@ async def delete_role(role_id: int):
     """Delete a role by ID"""
     try:
         from deelflow.models import Role
+        from app.services.permission_matrix import invalidate_permission_matrix
         
-        role = await sync_to_async(Role.objects.get)(id=role_id)
-        await sync_to_async(role.delete)()
+        role = await run_db(Role.objects.get, id=role_id)
+        await run_db(role.delete)
+        invalidate_permission_matrix()
         return {
             "status": "success",
             "message": "Role deleted successfully"
@@ -4152,18 +4165,18 @@ async def assign_user_to_role(role_id: int, user_data: dict):
             }
         
         # Get role
-        role = await sync_to_async(Role.objects.get)(id=role_id)
+        role = await run_db(Role.objects.get, id=role_id)
         
         # Find user by ID or email
         from deelflow.models import User
         if user_id:
-            user = await sync_to_async(User.objects.get)(id=user_id)
+            user = await run_db(User.objects.get, id=user_id)
         else:
-            user = await sync_to_async(User.objects.get)(email=email)
+            user = await run_db(User.objects.get, email=email)
         
         # Assign role to user (store role name as string)
         user.role = role.name
-        await sync_to_async(user.save)()
+        await run_db(user.save)
         
         return {
             "status": "success",
@@ -4256,8 +4269,8 @@ async def remove_user_from_role(role_id: int, user_id: int):
         from deelflow.models import Role, User
         
         # Get user and role
-        user = await sync_to_async(User.objects.get)(id=user_id)
-        role = await sync_to_async(Role.objects.get)(id=role_id)
+        user = await run_db(User.objects.get, id=user_id)
+        role = await run_db(Role.objects.get, id=role_id)
         
         # Check if user is assigned to this role
         if user.role != role.name:
@@ -4268,7 +4281,7 @@ async def remove_user_from_role(role_id: int, user_id: int):
         
         # Remove role assignment (set role to empty string or default)
         user.role = "user"  # Default role
-        await sync_to_async(user.save)()
+        await run_db(user.save)
         
         return {
             "status": "success",
@@ -4360,10 +4373,10 @@ async def get_role_users(role_id: int):
         from deelflow.models import Role, User
         
         # Get role
-        role = await sync_to_async(Role.objects.get)(id=role_id)
+        role = await run_db(Role.objects.get, id=role_id)
         
         # Get all users with this role (role is a string field)
-        users = await sync_to_async(list)(User.objects.filter(role=role.name))
+        users = await run_db(list, User.objects.filter(role=role.name))
         
         users_data = []
         for user in users:
@@ -4494,12 +4507,12 @@ async def assign_role_to_user(user_id: int, role_data: dict):
             }
         
         # Get user and role
-        user = await sync_to_async(User.objects.get)(id=user_id)
-        role = await sync_to_async(Role.objects.get)(id=role_id)
+        user = await run_db(User.objects.get, id=user_id)
+        role = await run_db(Role.objects.get, id=role_id)
         
         # Assign role (store role name as string)
         user.role = role.name
-        await sync_to_async(user.save)()
+        await run_db(user.save)
         
         return {
             "status": "success",
@@ -4580,7 +4593,7 @@ async def get_permissions(page: int = 1, limit: int = 50):
         
         # Get all permissions
         permissions_queryset = Permission.objects.all()
-        permissions_list = await sync_to_async(list)(permissions_queryset)
+        permissions_list = await run_db(list, permissions_queryset)
         
         # Paginate
         paginator = Paginator(permissions_list, limit)
@@ -4614,71 +4627,16 @@ async def get_permissions(page: int = 1, limit: int = 50):
 async def get_permissions_grouped():
     """Get permissions grouped by categories with role assignments for table view"""
     try:
-        from deelflow.models import Permission, Role
-        from collections import defaultdict
+        from app.services.permission_matrix import get_permission_matrix
         
-        # Get all permissions and roles
-        permissions_queryset = Permission.objects.all()
-        roles_queryset = Role.objects.all()
-        
-        permissions_list = await sync_to_async(list)(permissions_queryset)
-        roles_list = await sync_to_async(list)(roles_queryset)
-        
-        # Group permissions by category
-        permission_groups = defaultdict(list)
-        
-        for perm in permissions_list:
-            # Determine category based on permission name
-            category = "Other"
-            if any(keyword in perm.name.lower() for keyword in ['user', 'create_user', 'view_user', 'edit_user', 'delete_user']):
-                category = "User Management"
-            elif any(keyword in perm.name.lower() for keyword in ['billing', 'payment', 'invoice']):
-                category = "Billing"
-            elif any(keyword in perm.name.lower() for keyword in ['content', 'create_content', 'edit_content', 'delete_content']):
-                category = "Content Management"
-            elif any(keyword in perm.name.lower() for keyword in ['campaign', 'create_campaign', 'edit_campaign']):
-                category = "Campaigns"
-            elif any(keyword in perm.name.lower() for keyword in ['property', 'create_property', 'edit_property']):
-                category = "Properties"
-            elif any(keyword in perm.name.lower() for keyword in ['report', 'analytics', 'export']):
-                category = "Analytics & Reports"
-            elif any(keyword in perm.name.lower() for keyword in ['role', 'permission']):
-                category = "Role Management"
-            elif any(keyword in perm.name.lower() for keyword in ['system', 'tenant', 'backup', 'landing', 'theme', 'domain']):
-                category = "System Administration"
-            elif any(keyword in perm.name.lower() for keyword in ['own', 'personal']):
-                category = "Own Data"
-            
-            # Get role assignments for this permission
-            role_assignments = []
-            for role in roles_list:
-                # Check if this role has this permission
-                has_permission = await sync_to_async(lambda: role.permissions.filter(id=perm.id).exists())()
-                role_assignments.append({
-                    "id": role.id,
-                    "name": role.name,
-                    "enabled": has_permission
-                })
-            
-            permission_groups[category].append({
-                "id": perm.id,
-                "name": perm.name,
-                "label": perm.label,
-                "roles": role_assignments
-            })
-        
-        # Convert to the expected format
-        permission_groups_list = []
-        for group_name, permissions in permission_groups.items():
-            permission_groups_list.append({
-                "group": group_name,
-                "permissions": permissions
-            })
+        # One through-table query builds the whole role x permission matrix;
+        # the result stays cached until roles or permissions change
+        matrix = await run_db(get_permission_matrix)
         
         return {
             "status": "success",
             "data": {
-                "permission_groups": permission_groups_list
+                "permission_groups": matrix.grouped()
             }
         }
     except Exception as e:
@@ -4692,6 +4650,7 @@ async def create_permission(permission_data: dict):
     """Create a new permission"""
     try:
         from deelflow.models import Permission
+        from app.services.permission_matrix import invalidate_permission_matrix
         
         name = permission_data.get("name")
         label = permission_data.get("label")
@@ -4703,18 +4662,19 @@ async def create_permission(permission_data: dict):
             }
         
         # Check if permission already exists
-        existing_permission = await sync_to_async(Permission.objects.filter)(name=name)
-        if await sync_to_async(existing_permission.exists)():
+        existing_permission = await run_db(Permission.objects.filter, name=name)
+        if await run_db(existing_permission.exists):
             return {
                 "status": "error",
                 "message": "Permission with this name already exists"
             }
         
         # Create permission
-        permission = await sync_to_async(Permission.objects.create)(
+        permission = await run_db(Permission.objects.create,
             name=name,
             label=label
         )
+        invalidate_permission_matrix()
         return {
             "status": "success",
             "message": "Permission created successfully",
@@ -4778,9 +4738,10 @@ async def polygon_network_info():
     Returns basic connection and network information for the configured Polygon RPC.
     """
     try:
-        from app.services.polygon_service import PolygonService
-        svc = PolygonService()
-        return {"status": "success", "data": svc.get_network_info()}
+        import asyncio
+        from app.services.polygon_service import get_polygon_service
+        svc = get_polygon_service()
+        return {"status": "success", "data": await asyncio.to_thread(svc.get_network_info)}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -4793,9 +4754,31 @@ async def polygon_get_balance(address: str):
     Returns the MATIC balance for the provided address.
     """
     try:
-        from app.services.polygon_service import PolygonService
-        svc = PolygonService()
-        return {"status": "success", "data": svc.get_balance(address)}
+        import asyncio
+        from app.services.polygon_service import get_polygon_service
+        svc = get_polygon_service()
+        return {"status": "success", "data": await asyncio.to_thread(svc.get_balance, address)}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+class PolygonBalancesRequest(BaseModel):
+    addresses: List[str]
+
+
+@app.post("/polygon/balances", tags=["Blockchain"])
+async def polygon_get_balances(req: PolygonBalancesRequest):
+    """
+    **Get MATIC Balances (Batch)**
+
+    Returns the MATIC balance for many addresses, fetched in batched JSON-RPC requests.
+    Invalid addresses are reported per entry instead of failing the whole request.
+    """
+    try:
+        import asyncio
+        from app.services.polygon_service import get_polygon_service
+        svc = get_polygon_service()
+        return {"status": "success", "data": await asyncio.to_thread(svc.get_balances, req.addresses)}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -4815,9 +4798,10 @@ async def polygon_transfer(req: PolygonTransferRequest, current_user: dict = Dep
     Authentication required to prevent abuse.
     """
     try:
-        from app.services.polygon_service import PolygonService
-        svc = PolygonService()
-        tx = svc.transfer_native(req.to_address, req.amount_matic, req.private_key)
+        import asyncio
+        from app.services.polygon_service import get_polygon_service
+        svc = get_polygon_service()
+        tx = await asyncio.to_thread(svc.transfer_native, req.to_address, req.amount_matic, req.private_key)
         return {"status": "success", "data": tx}
     except HTTPException:
         raise
@@ -4939,7 +4923,7 @@ async def create_checkout_session(
         
         # Get user and package info
         try:
-            user = await sync_to_async(User.objects.get)(id=user_id)
+            user = await run_db(User.objects.get, id=user_id)
         except User.DoesNotExist:
             return {
                 "status": "error",
@@ -4980,7 +4964,7 @@ async def create_checkout_session(
                 pass
             
             # Create payment transaction record
-            transaction = await sync_to_async(PaymentTransaction.objects.create)(
+            transaction = await run_db(PaymentTransaction.objects.create,
                 user=user,
                 plan_id=request_data.price_id,
                 plan_name=plan_name,
@@ -5116,10 +5100,12 @@ async def get_total_revenue():
     """
     **Get Total Revenue**
     
-    Retrieves total revenue metrics from Stripe.
+    Retrieves total revenue metrics from the local Stripe ledger, which is kept
+    in sync by webhooks, a periodic event sync and a one-off backfill task.
     
     **Returns:**
     - Total revenue, MRR, customer count, and other metrics
+    - synced_through: time up to which every Stripe event is known to be in the ledger (last event sync)
     """
     try:
         from app.services.payment_service import PaymentService
@@ -5279,7 +5265,7 @@ async def get_signnow_documents(limit: int = 100):
     try:
         from app.services.signnow_service import signnow_service
         
-        result = signnow_service.get_documents(limit=limit)
+        result = await signnow_service.get_documents_async(limit=limit)
         return result
         
     except Exception as e:
@@ -5331,6 +5317,9 @@ async def upload_signnow_document(
     
     Uploads a document file to SignNow for signing.
     
+    The file is spooled to disk in chunks and streamed to SignNow, so large
+    contract packets are never held in memory.
+    
     **Request Body:**
     - file: Document file (PDF, DOCX, etc.)
     - document_name: Optional custom name for the document
@@ -5341,20 +5330,18 @@ async def upload_signnow_document(
     """
     try:
         from app.services.signnow_service import signnow_service
-        import tempfile
+        from app.core.streaming import spool_upload
         import os
         
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        # Spool the upload to disk chunk by chunk
+        tmp_path, _, _ = await spool_upload(file, suffix=os.path.splitext(file.filename or "")[1])
         
         try:
-            # Upload to SignNow
-            result = signnow_service.upload_document(
+            # Stream to SignNow
+            result = await signnow_service.upload_document_stream(
                 file_path=tmp_path,
-                document_name=document_name or file.filename
+                document_name=document_name or file.filename,
+                content_type=file.content_type or "application/pdf"
             )
             return result
         finally:
@@ -5393,7 +5380,7 @@ async def invite_signnow_signers(
     try:
         from app.services.signnow_service import signnow_service
         
-        result = signnow_service.invite_signers(
+        result = await signnow_service.invite_signers_async(
             document_id=document_id,
             signers=signers,
             subject=subject,
@@ -5407,6 +5394,50 @@ async def invite_signnow_signers(
             "message": f"Failed to send invitation: {str(e)}"
         }
 
+@app.post("/api/signnow/invite/bulk/", tags=["SignNow"])
+async def invite_signnow_signers_bulk(
+    invites: List[Dict[str, Any]] = Body(..., embed=True),
+    concurrency: int = Body(5, ge=1, le=20)
+):
+    """
+    **Invite Signers to Many Documents**
+    
+    Sends invitations for several documents at once, with at most `concurrency`
+    requests to SignNow in flight.
+    
+    **Request Body:**
+    - invites: List of objects with document_id, signers, subject (optional), message (optional)
+    - concurrency: Parallel invitations (default 5, max 20)
+    
+    **Returns:**
+    - One result per invite, in request order
+    - Sent/failed counts
+    """
+    try:
+        from app.services.signnow_service import signnow_service
+        
+        missing = [i for i, invite in enumerate(invites) if not invite.get("document_id")]
+        if missing:
+            return {
+                "status": "error",
+                "message": f"document_id is required (invites {missing})"
+            }
+        
+        results = await signnow_service.invite_many(invites, concurrency=concurrency)
+        sent = sum(1 for result in results if result.get("status") == "success")
+        return {
+            "status": "success" if sent == len(results) else "partial" if sent else "error",
+            "sent": sent,
+            "failed": len(results) - sent,
+            "results": results
+        }
+        
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to send invitations: {str(e)}"
+        }
+
 @app.get("/api/signnow/status/{document_id}", tags=["SignNow"])
 async def get_signnow_document_status(document_id: str):
     """
@@ -5425,7 +5456,7 @@ async def get_signnow_document_status(document_id: str):
     try:
         from app.services.signnow_service import signnow_service
         
-        result = signnow_service.get_document_status(document_id=document_id)
+        result = await signnow_service.get_document_status_async(document_id=document_id)
         return result
         
     except Exception as e:
@@ -5437,12 +5468,15 @@ async def get_signnow_document_status(document_id: str):
 @app.get("/api/signnow/download/{document_id}", tags=["SignNow"])
 async def download_signnow_document(
     document_id: str,
+    request: Request,
     save_path: Optional[str] = None
 ):
     """
     **Download Document**
     
-    Downloads a completed or in-progress document from SignNow.
+    Streams a completed or in-progress document from SignNow in chunks.
+    Single byte ranges (`Range: bytes=start-end`) are supported. Completed signed
+    documents are served from a local content-addressed cache.
     
     **Path Parameters:**
     - document_id: SignNow document ID
@@ -5451,16 +5485,32 @@ async def download_signnow_document(
     - save_path: Optional path to save the downloaded file
     
     **Returns:**
-    - Document file content or save confirmation
+    - Document file stream (200/206) or save confirmation
     """
     try:
         from app.services.signnow_service import signnow_service
+        from app.core.streaming import file_response
+        from fastapi.responses import StreamingResponse
+        import asyncio
+        
+        if save_path:
+            return await asyncio.to_thread(
+                signnow_service.download_document,
+                document_id=document_id,
+                file_path=save_path
+            )
         
-        result = signnow_service.download_document(
-            document_id=document_id,
-            file_path=save_path
-        )
-        return result
+        range_header = request.headers.get("range")
+        cached = signnow_service.document_cache.path_for(document_id)
+        if cached:
+            return file_response(str(cached), range_header, media_type="application/pdf",
+                                 filename=f"{document_id}.pdf")
+        
+        result = await signnow_service.open_download(document_id, range_header)
+        if result["status"] != "success":
+            return result
+        stream = result["data"]
+        return StreamingResponse(stream.body, status_code=stream.status_code, headers=stream.headers)
         
     except Exception as e:
         return {
@@ -5496,9 +5546,9 @@ async def send_signnow_document(
     try:
         from app.services.signnow_service import signnow_service
         
-        result = signnow_service.send_document_for_signature(
+        result = await signnow_service.invite_signers_async(
             document_id=document_id,
-            signer_email=signer_email,
+            signers=[{"email": signer_email}],
             subject=subject,
             message=message
         )